@@ -1,6 +1,7 @@
 from .hsi import HSI
 
-from .lime import Lime, HSIAttributes, HSISpatialAttributes, HSISpectralAttributes
+from .lime import Lime, HSIAttributes, HSISpatialAttributes, HSISpectralAttributes, HSIAttributionPlan
+from .runner import ExplanationRunner
 
 from . import utils
 from . import visualize
@@ -11,6 +12,8 @@ __all__ = [
     "HSIAttributes",
     "HSISpatialAttributes",
     "HSISpectralAttributes",
+    "HSIAttributionPlan",
+    "ExplanationRunner",
     "utils",
     "visualize",
 ]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+from typing_extensions import Any, Callable, Sequence
+
+from meteors.lime import Lime
+from meteors.runner import ExplanationRunner
+from meteors.utils.models import ExplainableModel
+
+
+def load_callable(spec: str) -> Callable:
+    """Imports the object given as `module:attribute`, where the attribute may be a dotted path.
+
+    The current working directory is searched first, so modules next to the data can be used without installing them.
+
+    Args:
+        spec (str): The import path of the object, e.g. `models.classifier:predict`.
+
+    Returns:
+        Callable: The imported object.
+
+    Raises:
+        ValueError: If the specification is not of the form `module:attribute` or the object is not callable.
+    """
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"The model must be given as module:callable, got {spec}")
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    obj: Any = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        obj = getattr(obj, name)
+    if not callable(obj):
+        raise ValueError(f"{spec} is not callable")
+    return obj
+
+
+def _parse_param(value: str) -> tuple[str, Any]:
+    """Parses a `key=value` parameter of the segmentation method, converting the value to a number if possible."""
+    key, sep, raw = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got {value}")
+    for convert in (int, float):
+        try:
+            return key, convert(raw)
+        except ValueError:
+            pass
+    return key, raw
+
+
+def _parse_wavelengths(value: str) -> list[float]:
+    return [float(wavelength) for wavelength in value.split(",")]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the parser of the `meteors` command."""
+    parser = argparse.ArgumentParser(prog="meteors", description="Explanations of models for hyperspectral data.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    explain = subparsers.add_parser(
+        "explain",
+        help="Explain every cube of a directory with LIME.",
+        description="Explains every .npy/.npz cube of a directory with LIME, resuming an interrupted run.",
+    )
+    explain.add_argument("--model", required=True, help="The forward function of the model, as module:callable.")
+    explain.add_argument("--input", required=True, help="The directory searched recursively for .npy/.npz cubes.")
+    explain.add_argument("--output", required=True, help="The directory of the attributions and the manifest.")
+    explain.add_argument("--mode", choices=["spatial", "spectral"], default="spatial", help="The attribution method.")
+    explain.add_argument(
+        "--problem-type",
+        choices=["regression", "classification", "segmentation"],
+        default="classification",
+        help="The problem type of the model.",
+    )
+    explain.add_argument("--target", type=int, default=None, help="The output index to attribute.")
+    explain.add_argument("--segmentation", choices=["slic", "patch"], default="slic", help="The segmentation method.")
+    explain.add_argument(
+        "--segmentation-param",
+        type=_parse_param,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="A parameter of the segmentation method, e.g. patch_size=8, may be repeated.",
+    )
+    explain.add_argument(
+        "--band-names", nargs="+", default=None, help="The band names grouped by the spectral mode, required by it."
+    )
+    explain.add_argument("--n-samples", type=int, default=10, help="The number of perturbed samples per cube.")
+    explain.add_argument(
+        "--batch-size", type=int, default=4, help="The number of perturbed samples per forward call of the model."
+    )
+    explain.add_argument("--workers", type=int, default=1, help="The number of worker processes.")
+    explain.add_argument(
+        "--wavelengths",
+        type=_parse_wavelengths,
+        default=None,
+        help="Comma separated wavelengths of the cubes that do not store them.",
+    )
+    explain.add_argument("--orientation", default="CHW", help="The orientation of the cubes, e.g. CHW or HWC.")
+    return parser
+
+
+def explain(args: argparse.Namespace) -> int:
+    """Runs the `explain` command.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        int: The exit code, 1 if any cube failed.
+    """
+    forward_func = load_callable(args.model)
+    lime = Lime(ExplainableModel(forward_func, args.problem_type))
+    attribute_params: dict[str, Any] = {
+        "target": args.target,
+        "n_samples": args.n_samples,
+        "perturbations_per_eval": args.batch_size,
+    }
+    if args.mode == "spatial":
+        attribute_params["segmentation_method"] = args.segmentation
+        attribute_params.update(dict(args.segmentation_param))
+    else:
+        attribute_params["band_names"] = args.band_names
+    runner = ExplanationRunner(lime, args.output, method=args.mode, n_workers=args.workers, **attribute_params)
+
+    start = time.perf_counter()
+    summary = runner.run(args.input, wavelengths=args.wavelengths, orientation=tuple(args.orientation))
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    records = runner.completed()
+    # Every perturbed sample is one forward pass of the model, evaluated in batches of batch_size
+    n_forwards = sum(records[key].get("n_samples") or 0 for key in summary.completed if key in records)
+    print(
+        f"Explained {len(summary.completed)} cubes ({len(summary.skipped)} skipped, {len(summary.failed)} failed) "
+        f"in {elapsed:.2f} s: {len(summary.completed) / elapsed:.2f} cubes/s, {n_forwards / elapsed:.2f} forwards/s"
+    )
+    return 1 if summary.failed else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """The entry point of the `meteors` command.
+
+    Args:
+        argv (Sequence[str] | None, optional): The arguments, defaults to the arguments of the process.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "explain" and args.mode == "spectral" and not args.band_names:
+        parser.error("--band-names is required with --mode spectral")
+    if args.command == "explain":
+        return explain(args)
+    return 2  # pragma: no cover
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing_extensions import Annotated, Self, Literal, Callable, Any, TypeVar, Type
+from typing_extensions import Annotated, Awaitable, Self, Literal, Callable, Any, TypeVar, Type, overload
+import asyncio
+import concurrent.futures
+import copy
+import inspect
+import threading
 import warnings
 
 from abc import ABC
@@ -20,9 +25,21 @@ from pydantic import BaseModel, ConfigDict, Field, model_validator, ValidationIn
 from pydantic.functional_validators import BeforeValidator
 
 from meteors import HSI
-from meteors.lime_base import Lime as LimeBase
+from meteors.lime_base import (
+    AttributionPlan,
+    Lime as LimeBase,
+    LimeTrainingData,
+    MAX_EXHAUSTIVE_FEATURES,
+    ProcessPoolForward,
+    default_batch_perturb_func,
+)
 from meteors.utils.models import ExplainableModel, InterpretableModel, SkLearnLasso
-from meteors.utils.utils import torch_dtype_to_python_dtype, change_dtype_of_list, expand_spectral_mask
+from meteors.utils.utils import (
+    torch_dtype_to_python_dtype,
+    change_dtype_of_list,
+    expand_spectral_mask,
+    expand_values_by_mask,
+)
 
 try:
     from fast_slic import Slic as slic
@@ -31,6 +48,7 @@ except ImportError:
 
 
 # Types
+T = TypeVar("T")
 IntOrFloat = TypeVar("IntOrFloat", int, float)
 ListOfWavelengthsIndices = TypeVar("ListOfWavelengthsIndices", list[tuple[int, int]], tuple[int, int], list[int], int)
 ListOfWavelengths = TypeVar(
@@ -480,6 +498,10 @@ class HSIAttributes(BaseModel):
         mask (torch.Tensor | None): `superpixel` or `superband` mask used for the explanation.
         device (torch.device): Device to be used for inference. If None, the device of the input hsi will be used.
             Defaults to None.
+        n_samples (int | None): Number of perturbed samples the interpretable model was trained on. Defaults to None.
+        truncated (bool): Whether the sampling was stopped early by a time or forward-pass budget. Defaults to False.
+        training_set (LimeTrainingData | None): Training set of the interpretable model, kept to refit it with `refit`.
+            Defaults to None.
         model_config (ConfigDict): Configuration dictionary for the model.
     """
 
@@ -522,6 +544,26 @@ class HSIAttributes(BaseModel):
             ),
         ),
     ] = None
+    n_samples: Annotated[
+        int | None,
+        Field(
+            ge=0,
+            description="Number of perturbed samples the interpretable model was trained on. Defaults to None.",
+        ),
+    ] = None
+    truncated: Annotated[
+        bool,
+        Field(
+            description=("Whether the sampling was stopped early by a time or forward-pass budget. Defaults to False."),
+        ),
+    ] = False
+    training_set: Annotated[
+        LimeTrainingData | None,
+        Field(
+            exclude=True,
+            description="Training set of the interpretable model, kept to refit it with `refit`. Defaults to None.",
+        ),
+    ] = None
 
     @property
     def flattened_attributes(self) -> torch.Tensor:
@@ -595,6 +637,45 @@ class HSIAttributes(BaseModel):
             self.mask = self.mask.to(device)
         return self
 
+    def refit(self, interpretable_model: InterpretableModel | None = None, kernel_width: float | None = None) -> Self:
+        """Refits the interpretable model to the training set kept by the attribution, without evaluating the explained
+        model again, e.g. to tune the regularization of the interpretable model or the kernel width.
+
+        Args:
+            interpretable_model (InterpretableModel | None, optional): The interpretable model to fit, copied before
+                the fit. Defaults to None, the interpretable model of the attribution.
+            kernel_width (float | None, optional): The width of the exponential kernel weighting the samples.
+                Defaults to None, the kernel width of the attribution.
+
+        Returns:
+            Self: A new object with the attributions and the score of the refitted interpretable model, sharing the hsi,
+                the mask and the training set.
+
+        Raises:
+            ValueError: If the training set was not kept, see `keep_training_set` of `Lime.get_spatial_attributes`.
+            ValueError: If the training set holds no feature mask mapping the interpretable features to the hsi.
+            ValueError: If the kernel width is changed but the attribution did not use an exponential kernel of a known
+                width.
+
+        Examples:
+            >>> attrs = lime.get_spatial_attributes(hsi, segmentation_mask, keep_training_set=True)
+            >>> for alpha in (0.01, 0.05, 0.1):
+            >>>     refitted = attrs.refit(SkLearnLasso(alpha=alpha), kernel_width=0.5)
+        """
+        if self.training_set is None:
+            raise ValueError("The training set was not kept, attribute with `keep_training_set=True` to refit")
+        if self.training_set.feature_mask is None:
+            raise ValueError("The training set holds no feature mask to map the interpretable features to the hsi")
+
+        coefs, score = self.training_set.fit(
+            copy.deepcopy(interpretable_model) if interpretable_model is not None else None, kernel_width
+        )
+        # The feature mask of the attribution has a leading batch dimension and may be broadcast over the hsi
+        feature_ids = self.training_set.feature_mask.squeeze(0).to(self.device)
+        attributes = expand_values_by_mask(coefs.flatten().to(self.device), feature_ids)
+        attributes = attributes.expand_as(self.attributes).to(self.attributes.dtype)
+        return self.model_copy(update={"attributes": attributes, "score": float(score)})
+
     def change_orientation(self, target_orientation: tuple[str, str, str] | list[str] | str, inplace=False) -> Self:
         """Changes the orientation of the image data along with the attributions to the target orientation.
 
@@ -619,6 +700,13 @@ class HSIAttributes(BaseModel):
 
         if current_orientation != attrs.hsi.orientation:
             new_orientation = attrs.hsi.orientation
+            if attrs.training_set is not None and attrs.training_set.feature_mask is not None:
+                feature_mask = attrs.training_set.feature_mask.expand(1, *attrs.attributes.shape)
+                attrs.training_set = attrs.training_set._replace(
+                    feature_mask=feature_mask.permute(
+                        0, *(1 + current_orientation.index(axis) for axis in new_orientation)
+                    )
+                )
             attrs.attributes = attrs.attributes.permute(
                 current_orientation.index(new_orientation[0]),
                 current_orientation.index(new_orientation[1]),
@@ -645,6 +733,8 @@ class HSISpatialAttributes(HSIAttributes):
         mask (torch.Tensor | None): Original Spatial (Segmentation) mask used for the explanation.
         device (torch.device): Device to be used for inference. If None, the device of the input hsi will be used.
             Defaults to None.
+        n_samples (int | None): Number of perturbed samples the interpretable model was trained on. Defaults to None.
+        truncated (bool): Whether the sampling was stopped early by a time or forward-pass budget. Defaults to False.
         model_config (ConfigDict): Configuration dictionary for the model.
         segmentation_mask (torch.Tensor): Spatial (Segmentation) mask used for the explanation.
     """
@@ -702,6 +792,8 @@ class HSISpectralAttributes(HSIAttributes):
         mask (torch.Tensor | None): Original Band mask used for the explanation.
         device (torch.device): Device to be used for inference. If None, the device of the input hsi will be used.
             Defaults to None.
+        n_samples (int | None): Number of perturbed samples the interpretable model was trained on. Defaults to None.
+        truncated (bool): Whether the sampling was stopped early by a time or forward-pass budget. Defaults to False.
         model_config (ConfigDict): Configuration dictionary for the model.
         band_names (dict[str | tuple[str, ...], int]): Dictionary that translates the band names into the band segment ids.
     """
@@ -763,6 +855,131 @@ class HSISpectralAttributes(HSIAttributes):
 ###################################################################
 
 
+class _AsyncForwardBridge:
+    """Calls an async forward function from the synchronous LIME sampling.
+
+    In a thread running an attribution of the async methods of `Lime`, the coroutine is scheduled on the event loop of
+    the caller and a `torch.futures.Future` of its result is returned, so the loop stays free while the model runs and
+    several batches may be awaited at once with `futures_in_flight`. In a thread without a running event loop, the
+    coroutine is run to completion with `asyncio.run`. The synchronous methods of `Lime` called from a running event
+    loop would block it while waiting for the coroutine, so they raise an error pointing to the async methods.
+
+    Args:
+        forward_func (Callable[..., Awaitable[torch.Tensor]]): The async forward function.
+    """
+
+    def __init__(self, forward_func: Callable[..., Awaitable[torch.Tensor]]):
+        self.forward_func = forward_func
+        self._local = threading.local()
+
+    def bind(self, loop: asyncio.AbstractEventLoop | None) -> None:
+        """Sets the event loop the coroutines of the current thread are scheduled on, None to run them directly."""
+        self._local.loop = loop
+
+    async def _forward(self, *args: Any) -> torch.Tensor:
+        """Awaits the forward function, as a coroutine accepted by the event loops."""
+        return await self.forward_func(*args)
+
+    def __call__(self, *args: Any) -> torch.Tensor | torch.futures.Future:
+        loop = getattr(self._local, "loop", None)
+        if loop is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self._forward(*args))
+            raise RuntimeError(
+                "The explainable model has an async forward function and an event loop is running in this thread, "
+                "use the async methods `aget_spatial_attributes` or `aget_spectral_attributes` instead"
+            )
+        result: torch.futures.Future = torch.futures.Future()
+
+        def on_done(future: concurrent.futures.Future) -> None:
+            error = future.exception()
+            if error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(future.result())
+
+        asyncio.run_coroutine_threadsafe(self._forward(*args), loop).add_done_callback(on_done)
+        return result
+
+
+def _is_async_forward(forward_func: Callable) -> bool:
+    """Checks whether a forward function returns coroutines, including modules and callables with an async `forward`
+    or `__call__` method."""
+    if isinstance(forward_func, torch.nn.Module):
+        return inspect.iscoroutinefunction(forward_func.forward)
+    return inspect.iscoroutinefunction(forward_func) or inspect.iscoroutinefunction(
+        getattr(type(forward_func), "__call__", None)
+    )
+
+
+class HSIAttributionPlan:
+    """Reusable plan of LIME attributions of hsi images sharing a shape and a segmentation or band mask.
+
+    The mask, its interpretable features and the model dependent setup are prepared once, when the plan is created with
+    `Lime.plan_spatial_attributes` or `Lime.plan_spectral_attributes`, so calling the plan on a stream of hsi images
+    only samples, evaluates the model and fits the interpretable model.
+
+    Args:
+        plan (AttributionPlan): The attribution plan of the underlying LIME method.
+        mask (torch.Tensor): The segmentation or band mask, of the shape of the hsi images.
+        band_names (dict[str | tuple[str, ...], int] | None): The band names of spectral attributions, None for spatial
+            attributions.
+        device (torch.device): The device of the attributions.
+    """
+
+    def __init__(
+        self,
+        plan: AttributionPlan,
+        mask: torch.Tensor,
+        band_names: list[str | list[str]] | dict[tuple[str, ...] | str, int] | None,
+        device: torch.device,
+    ) -> None:
+        self.plan = plan
+        self.mask = mask
+        self.band_names = band_names
+        self.device = device
+
+    def __call__(self, hsi: HSI) -> HSISpatialAttributes | HSISpectralAttributes:
+        """Attributes an hsi with the plan.
+
+        Args:
+            hsi (HSI): The hsi to attribute, of the same shape as the hsi the plan was created for.
+
+        Returns:
+            HSISpatialAttributes | HSISpectralAttributes: The spatial or spectral attributes of the hsi, depending on
+                the kind of the plan.
+
+        Raises:
+            AssertionError: If the hsi is not an instance of the HSI class.
+            ValueError: If the hsi does not have the shape the plan was created for.
+        """
+        assert isinstance(hsi, HSI), "hsi should be an instance of HSI class"
+        hsi = hsi.to(self.device)
+        lime_attributes, score, sampling_info = self.plan.attribute(
+            hsi.get_image().unsqueeze(0), return_sampling_info=True
+        )
+        if self.band_names is None:
+            return HSISpatialAttributes(
+                hsi=hsi,
+                attributes=lime_attributes.squeeze(0),
+                mask=self.mask,
+                score=score,
+                n_samples=sampling_info.n_samples,
+                truncated=sampling_info.truncated,
+            )
+        return HSISpectralAttributes(
+            hsi=hsi,
+            attributes=lime_attributes.squeeze(0),
+            mask=self.mask,
+            band_names=self.band_names,
+            score=score,
+            n_samples=sampling_info.n_samples,
+            truncated=sampling_info.truncated,
+        )
+
+
 class Explainer(ABC):
     """Explainer class for explaining models.
 
@@ -814,24 +1031,52 @@ class Lime(Explainer):
 
     Args:
         explainable_model (ExplainableModel): The explainable model to be explained.
-        interpretable_model (InterpretableModel): The interpretable model used to approximate the black-box model.
-            Defaults to `SkLearnLasso` with alpha parameter set to 0.08.
+        interpretable_model (InterpretableModel | None, optional): The interpretable model used to approximate the
+            black-box model. Each attribution fits its own copy of it, so one explainer may be used from several
+            threads at once. Defaults to `SkLearnLasso` with alpha parameter set to 0.08.
         similarity_func (Callable[[torch.Tensor], torch.Tensor] | None, optional): The similarity function used by Lime.
             Defaults to None.
         perturb_func (Callable[[torch.Tensor], torch.Tensor] | None, optional): The perturbation function used by Lime.
             Defaults to None.
+        batch_similarity_func (Callable | None, optional): The similarity function computing the weights of a whole
+            batch of perturbed samples at once, e.g. created with `get_exp_kernel_batch_similarity_function`.
+            Defaults to None.
+        batch_perturb_func (Callable | None, optional): The sampling design drawing all the perturbations of the
+            interpretable features at once, e.g. `antithetic_batch_perturb_func`, `stratified_batch_perturb_func` or
+            `sobol_batch_perturb_func` from `meteors.lime_base`. Defaults to None, which draws each feature independently
+            with probability 0.5.
+        forward_pool (ProcessPoolForward | None, optional): A pool of worker processes the forward calls are sharded
+            across, created with the forward function of the explainable model. Useful for models holding the GIL,
+            e.g. scikit-learn pixel classifiers. Defaults to None, which evaluates the model in the calling process.
     """
 
     def __init__(
         self,
         explainable_model: ExplainableModel,
-        interpretable_model: InterpretableModel = SkLearnLasso(alpha=0.08),
+        interpretable_model: InterpretableModel | None = None,
         similarity_func: Callable[[torch.Tensor], torch.Tensor] | None = None,
         perturb_func: Callable[[torch.Tensor], torch.Tensor] | None = None,
+        batch_similarity_func: Callable | None = None,
+        batch_perturb_func: Callable | None = None,
+        forward_pool: ProcessPoolForward | None = None,
     ):
+        # A new default surrogate per explainer, the attributions fit copies of it
+        if interpretable_model is None:
+            interpretable_model = SkLearnLasso(alpha=0.08)
         super().__init__(explainable_model, interpretable_model)
+        forward_func: Callable[..., Any] = self.explainable_model.forward_func
+        # The coroutines of an async forward function are bridged into the synchronous sampling
+        self._async_forward = _AsyncForwardBridge(forward_func) if _is_async_forward(forward_func) else None
+        if self._async_forward is not None:
+            forward_func = self._async_forward
         self._lime = self._construct_lime(
-            self.explainable_model.forward_func, interpretable_model, similarity_func, perturb_func
+            forward_func,
+            interpretable_model,
+            similarity_func,
+            perturb_func,
+            batch_similarity_func,
+            batch_perturb_func,
+            forward_pool,
         )
 
     @staticmethod
@@ -840,6 +1085,9 @@ class Lime(Explainer):
         interpretable_model: InterpretableModel,
         similarity_func: Callable | None,
         perturb_func: Callable[[torch.Tensor], torch.Tensor] | None,
+        batch_similarity_func: Callable | None = None,
+        batch_perturb_func: Callable | None = None,
+        forward_pool: ProcessPoolForward | None = None,
     ) -> LimeBase:
         """Constructs the LimeBase object.
 
@@ -848,6 +1096,12 @@ class Lime(Explainer):
             interpretable_model (InterpretableModel): The interpretable model used to approximate the black-box model.
             similarity_func (Callable | None): The similarity function used by Lime.
             perturb_func (Callable[[torch.Tensor], torch.Tensor] | None): The perturbation function used by Lime.
+            batch_similarity_func (Callable | None, optional): The batched similarity function used by Lime.
+                Defaults to None.
+            batch_perturb_func (Callable | None, optional): The batched sampling design used by Lime.
+                Defaults to None.
+            forward_pool (ProcessPoolForward | None, optional): The pool of worker processes evaluating the model.
+                Defaults to None.
 
         Returns:
             LimeBase: The constructed LimeBase object.
@@ -857,6 +1111,9 @@ class Lime(Explainer):
             interpretable_model=interpretable_model,
             similarity_func=similarity_func,
             perturb_func=perturb_func,
+            batch_similarity_func=batch_similarity_func,
+            batch_perturb_func=batch_perturb_func,
+            forward_pool=forward_pool,
         )
 
     @staticmethod
@@ -1445,6 +1702,7 @@ class Lime(Explainer):
             return band_mask, dict_labels_to_segment_ids
         return band_mask
 
+    @overload
     def get_spatial_attributes(
         self,
         hsi: HSI,
@@ -1455,8 +1713,66 @@ class Lime(Explainer):
         verbose: bool = False,
         postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
         segmentation_method: Literal["slic", "patch"] = "slic",
+        max_samples: int | None = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: Literal["values", "ranking"] = "values",
+        time_budget: float | None = None,
+        max_forward_calls: int | None = None,
+        deduplicate_samples: bool = False,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
         **segmentation_method_params: Any,
-    ) -> HSISpatialAttributes:
+    ) -> HSISpatialAttributes: ...
+
+    @overload
+    def get_spatial_attributes(
+        self,
+        hsi: HSI,
+        segmentation_mask: np.ndarray | torch.Tensor | None = None,
+        *,
+        target: list[int] | Literal["all"],
+        n_samples: int = 10,
+        perturbations_per_eval: int = 4,
+        verbose: bool = False,
+        postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+        segmentation_method: Literal["slic", "patch"] = "slic",
+        max_samples: int | None = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: Literal["values", "ranking"] = "values",
+        time_budget: float | None = None,
+        max_forward_calls: int | None = None,
+        deduplicate_samples: bool = False,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
+        **segmentation_method_params: Any,
+    ) -> list[HSISpatialAttributes]: ...
+
+    def get_spatial_attributes(
+        self,
+        hsi: HSI,
+        segmentation_mask: np.ndarray | torch.Tensor | None = None,
+        target: int | list[int] | Literal["all"] | None = None,
+        n_samples: int = 10,
+        perturbations_per_eval: int = 4,
+        verbose: bool = False,
+        postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+        segmentation_method: Literal["slic", "patch"] = "slic",
+        max_samples: int | None = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: Literal["values", "ranking"] = "values",
+        time_budget: float | None = None,
+        max_forward_calls: int | None = None,
+        deduplicate_samples: bool = False,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
+        **segmentation_method_params: Any,
+    ) -> HSISpatialAttributes | list[HSISpatialAttributes]:
         """
         Get spatial attributes of an hsi image using the LIME method. Based on the provided hsi and segmentation mask
         LIME method attributes the `superpixels` provided by the segmentation mask. Please refer to the original paper
@@ -1473,8 +1789,11 @@ class Lime(Explainer):
                 A segmentation mask according to which the attribution should be performed.
                 If None, a new segmentation mask is created using the `segmentation_method`.
                     Additional parameters for the segmentation method may be passed as kwargs. Defaults to None.
-            target (int, optional): If the model creates more than one output, it analyzes the given target.
-                Defaults to None.
+            target (int | list[int] | Literal["all"] | None, optional): If the model creates more than one output, it
+                analyzes the given target. A list of targets, or "all" for every output of the model, is attributed
+                from a single set of model evaluations, fitting one interpretable model per target, and a list with
+                the attributes of each target is returned. Multiple targets are typed as a keyword argument only, so
+                the result of a single target keeps its precise type. Defaults to None.
             n_samples (int, optional): The number of samples to generate/analyze in LIME. The more the better but slower. Defaults to 10.
             perturbations_per_eval (int, optional): The number of perturbations to evaluate at once (Simply the inner batch size).
                 Defaults to 4.
@@ -1486,11 +1805,44 @@ class Lime(Explainer):
                    Defaults to None.
             segmentation_method (Literal["slic", "patch"], optional):
                 Segmentation method used only if `segmentation_mask` is None. Defaults to "slic".
+            max_samples (int | None, optional): If provided, the sampling is adaptive: `n_samples` is the minimum
+                number of samples, after which the interpretable model is refitted every `refit_every` batches and the
+                sampling stops once its coefficients stabilise or `max_samples` samples were used. The number of
+                samples actually used is stored in the `n_samples` attribute of the result. Defaults to None.
+            refit_every (int, optional): The number of batches of `perturbations_per_eval` samples between the refits
+                of adaptive sampling. Defaults to 1.
+            convergence_tol (float, optional): The tolerance of the convergence check of adaptive sampling.
+                With the "values" criterion, no coefficient may change by more than `convergence_tol` times the largest
+                absolute coefficient, with the "ranking" criterion, the Spearman correlation of the coefficients of
+                consecutive refits must be at least `1 - convergence_tol`. Defaults to 0.01.
+            convergence_criterion (Literal["values", "ranking"], optional): The convergence criterion of adaptive
+                sampling. Defaults to "values".
+            time_budget (float | None, optional): The time budget of the sampling in seconds. Once it is exhausted,
+                the interpretable model is fitted on the samples collected so far and the result is marked as
+                `truncated`. `n_samples` (or `max_samples`) stays the upper bound of the number of samples, so set it
+                to the most samples worth spending when the budget is the intended limit. Defaults to None.
+            max_forward_calls (int | None, optional): The maximum number of forward calls of the explained model,
+                each evaluating a batch of at most `perturbations_per_eval` samples. Once reached, the sampling stops
+                as with `time_budget`. Defaults to None.
+            deduplicate_samples (bool, optional): Whether to evaluate the explained model only once for each
+                distinct perturbation. Repeated perturbations reuse the cached model output and still count in the fit
+                of the interpretable model, which saves forward calls when the number of segments is small compared to
+                `n_samples`. Defaults to False.
+            pipeline_depth (int, optional): The number of batches of perturbed images built by a background thread
+                while the explained model evaluates the current batch. Each batch built ahead takes its own buffer of
+                `perturbations_per_eval` images. Defaults to 0, building and evaluating the batches in turn.
+            futures_in_flight (int, optional): The maximum number of batches awaited at the same time if the forward
+                function of the explainable model returns a `torch.futures.Future`, e.g. a model behind an inference
+                server. Higher values overlap the round trips of several batches. Defaults to 1.
+            keep_training_set (bool, optional): Whether to keep the perturbed samples, bit-packed, the model outputs
+                and the similarities on the result, so `HSIAttributes.refit` can fit another interpretable model or
+                kernel width without evaluating the explained model again. Defaults to False.
             **segmentation_method_params (Any): Additional parameters for the segmentation method.
 
         Returns:
-            HSISpatialAttributes: An `HSISpatialAttributes` object that contains the hsi, the attributions,
-                the segmentation mask, and the score of the interpretable model used for the explanation.
+            HSISpatialAttributes | list[HSISpatialAttributes]: An `HSISpatialAttributes` object that contains the hsi,
+                the attributions, the segmentation mask, and the score of the interpretable model used for the
+                explanation, or a list of them in the order of the targets if multiple targets are attributed.
 
         Raises:
             ValueError: If the Lime object is not initialized or is not an instance of LimeBase.
@@ -1519,60 +1871,237 @@ class Lime(Explainer):
 
         assert isinstance(hsi, HSI), "hsi should be an instance of HSI class"
 
-        if self.explainable_model.problem_type == "segmentation":
-            assert postprocessing_segmentation_output, (
-                "postprocessing_segmentation_output is required for segmentation problem type, please provide "
-                "the `postprocessing_segmentation_output`. For a reference "
-                "we provided an example function to use `agg_segmentation_postprocessing` from `meteors.utils.utils` module"
-            )
-        elif postprocessing_segmentation_output is not None:
-            logger.warning(
-                "postprocessing_segmentation_output is provided but the problem is not segmentation, will be ignored"
-            )
-            postprocessing_segmentation_output = None
+        postprocessing_segmentation_output = self._validate_postprocessing(postprocessing_segmentation_output)
 
-        if segmentation_mask is None:
-            segmentation_mask = self.get_segmentation_mask(hsi, segmentation_method, **segmentation_method_params)
-        segmentation_mask = ensure_torch_tensor(
-            segmentation_mask, "Segmentation mask should be None, numpy array, or torch tensor"
+        segmentation_mask = self._prepare_segmentation_mask(
+            hsi, segmentation_mask, segmentation_method, **segmentation_method_params
         )
-        if segmentation_mask.ndim != hsi.image.ndim:
-            segmentation_mask = segmentation_mask.unsqueeze(dim=hsi.spectral_axis)
 
         hsi = hsi.to(self.device)
         segmentation_mask = segmentation_mask.to(self.device)
 
-        lime_attributes, score = self._lime.attribute(
+        multiple_targets = isinstance(target, (list, str))
+        lime_attributes, score, sampling_info = self._lime.attribute(
             inputs=hsi.get_image().unsqueeze(0),
-            target=target,
+            target=None if isinstance(target, (list, str)) else target,
+            targets=target if isinstance(target, (list, str)) else None,
             feature_mask=segmentation_mask.unsqueeze(0),
             n_samples=n_samples,
             perturbations_per_eval=perturbations_per_eval,
             model_postprocessing=postprocessing_segmentation_output,
             show_progress=verbose,
             return_input_shape=True,
+            max_samples=max_samples,
+            refit_every=refit_every,
+            convergence_tol=convergence_tol,
+            convergence_criterion=convergence_criterion,
+            return_sampling_info=True,
+            time_budget=time_budget,
+            max_forward_calls=max_forward_calls,
+            deduplicate_samples=deduplicate_samples,
+            pipeline_depth=pipeline_depth,
+            futures_in_flight=futures_in_flight,
+            keep_training_set=keep_training_set,
         )
 
+        if multiple_targets:
+            return [
+                HSISpatialAttributes(
+                    hsi=hsi,
+                    attributes=target_attributes.squeeze(0),
+                    mask=segmentation_mask.expand_as(hsi.image),
+                    score=target_score,
+                    n_samples=sampling_info.n_samples,
+                    truncated=sampling_info.truncated,
+                    training_set=(
+                        sampling_info.training_set.select_target(target_idx)
+                        if sampling_info.training_set is not None
+                        else None
+                    ),
+                )
+                for target_idx, (target_attributes, target_score) in enumerate(zip(lime_attributes, score))
+            ]
+
         spatial_attribution = HSISpatialAttributes(
             hsi=hsi,
             attributes=lime_attributes.squeeze(0),
             mask=segmentation_mask.expand_as(hsi.image),
             score=score,
+            n_samples=sampling_info.n_samples,
+            truncated=sampling_info.truncated,
+            training_set=sampling_info.training_set,
         )
 
         return spatial_attribution
 
+    def get_spatial_attributes_batch(
+        self,
+        hsis: list[HSI],
+        segmentation_masks: list[np.ndarray | torch.Tensor | None] | None = None,
+        target: int | None = None,
+        n_samples: int = 10,
+        perturbations_per_eval: int = 4,
+        verbose: bool = False,
+        postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+        segmentation_method: Literal["slic", "patch"] = "slic",
+        **segmentation_method_params: Any,
+    ) -> list[HSISpatialAttributes]:
+        """
+        Get spatial attributes of several hsi images at once using the LIME method. The perturbations of all the images
+        are interleaved, so every forward call of the explainable model evaluates `perturbations_per_eval` perturbations
+        of each image, which fills a large batch of the model even if `perturbations_per_eval` is small. The
+        interpretable model of each image is trained independently, as in `get_spatial_attributes`.
+
+        Args:
+            hsis (list[HSI]): The HSI objects for which the attribution is performed. All the images must have the same
+                shape to be evaluated in a single batch of the model.
+            segmentation_masks (list[np.ndarray | torch.Tensor | None] | None, optional): The segmentation mask of each
+                hsi. If None, or None for a given hsi, a new segmentation mask is created using the
+                `segmentation_method`. Defaults to None.
+            target (int, optional): If the model creates more than one output, it analyzes the given target.
+                Defaults to None.
+            n_samples (int, optional): The number of samples to generate/analyze in LIME for each hsi. Defaults to 10.
+            perturbations_per_eval (int, optional): The number of perturbations of each hsi evaluated at once, the
+                batch of the model has `len(hsis) * perturbations_per_eval` perturbations. Defaults to 4.
+            verbose (bool, optional): Whether to show the progress bar. Defaults to False.
+            postprocessing_segmentation_output (Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None): A
+                segmentation postprocessing function for segmentation problem type, see `get_spatial_attributes`.
+                Defaults to None.
+            segmentation_method (Literal["slic", "patch"], optional):
+                Segmentation method used only for the hsis without a segmentation mask. Defaults to "slic".
+            **segmentation_method_params (Any): Additional parameters for the segmentation method.
+
+        Returns:
+            list[HSISpatialAttributes]: The `HSISpatialAttributes` of each hsi, in the order of `hsis`.
+
+        Raises:
+            ValueError: If the number of segmentation masks does not match the number of hsis or the hsis have
+                different shapes.
+            AssertionError: If explainable model type is `segmentation` and `postprocessing_segmentation_output` is not provided.
+            AssertionError: If any hsi is not an instance of the HSI class.
+
+        Examples:
+            >>> simple_model = lambda x: torch.rand((x.shape[0], 2))
+            >>> hsis = [mt.HSI(image=torch.rand((4, 24, 24)), wavelengths=[462.08, 465.27, 468.47, 471.68]) for _ in range(3)]
+            >>> lime = mt_lime.Lime(
+                    explainable_model=ExplainableModel(simple_model, "regression"), interpretable_model=SkLearnLasso(alpha=0.1)
+                )
+            >>> spatial_attributions = lime.get_spatial_attributes_batch(hsis, target=0, segmentation_method="patch")
+            >>> len(spatial_attributions)
+            3
+        """
+        if self._lime is None or not isinstance(self._lime, LimeBase):
+            raise ValueError("Lime object not initialized")  # pragma: no cover
+
+        for hsi in hsis:
+            assert isinstance(hsi, HSI), "hsi should be an instance of HSI class"
+
+        if segmentation_masks is None:
+            segmentation_masks = [None] * len(hsis)
+        if len(segmentation_masks) != len(hsis):
+            raise ValueError("The number of segmentation masks must match the number of hsis")
+        if any(hsi.image.shape != hsis[0].image.shape for hsi in hsis):
+            raise ValueError("All the hsis must have the same shape to be evaluated in a single batch")
+
+        postprocessing_segmentation_output = self._validate_postprocessing(postprocessing_segmentation_output)
+
+        hsis = [hsi.to(self.device) for hsi in hsis]
+        masks = [
+            self._prepare_segmentation_mask(
+                hsi, segmentation_mask, segmentation_method, **segmentation_method_params
+            ).to(self.device)
+            for hsi, segmentation_mask in zip(hsis, segmentation_masks)
+        ]
+
+        results = self._lime.attribute_batch(
+            inputs=[hsi.get_image().unsqueeze(0) for hsi in hsis],
+            feature_masks=[segmentation_mask.unsqueeze(0) for segmentation_mask in masks],
+            target=target,
+            n_samples=n_samples,
+            perturbations_per_eval=perturbations_per_eval,
+            model_postprocessing=postprocessing_segmentation_output,
+            show_progress=verbose,
+        )
+
+        return [
+            HSISpatialAttributes(
+                hsi=hsi,
+                attributes=lime_attributes.squeeze(0),
+                mask=segmentation_mask.expand_as(hsi.image),
+                score=score,
+                n_samples=n_samples,
+            )
+            for hsi, segmentation_mask, (lime_attributes, score) in zip(hsis, masks, results)
+        ]
+
+    @overload
+    def get_spectral_attributes(
+        self,
+        hsi: HSI,
+        band_mask: np.ndarray | torch.Tensor | None = None,
+        target: int | None = None,
+        n_samples: int = 10,
+        perturbations_per_eval: int = 4,
+        verbose: bool = False,
+        postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+        band_names: list[str | list[str]] | dict[tuple[str, ...] | str, int] | None = None,
+        max_samples: int | None = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: Literal["values", "ranking"] = "values",
+        time_budget: float | None = None,
+        max_forward_calls: int | None = None,
+        deduplicate_samples: bool = False,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
+    ) -> HSISpectralAttributes: ...
+
+    @overload
+    def get_spectral_attributes(
+        self,
+        hsi: HSI,
+        band_mask: np.ndarray | torch.Tensor | None = None,
+        *,
+        target: list[int] | Literal["all"],
+        n_samples: int = 10,
+        perturbations_per_eval: int = 4,
+        verbose: bool = False,
+        postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+        band_names: list[str | list[str]] | dict[tuple[str, ...] | str, int] | None = None,
+        max_samples: int | None = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: Literal["values", "ranking"] = "values",
+        time_budget: float | None = None,
+        max_forward_calls: int | None = None,
+        deduplicate_samples: bool = False,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
+    ) -> list[HSISpectralAttributes]: ...
+
     def get_spectral_attributes(
         self,
         hsi: HSI,
         band_mask: np.ndarray | torch.Tensor | None = None,
-        target=None,
+        target: int | list[int] | Literal["all"] | None = None,
         n_samples: int = 10,
         perturbations_per_eval: int = 4,
         verbose: bool = False,
         postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
         band_names: list[str | list[str]] | dict[tuple[str, ...] | str, int] | None = None,
-    ) -> HSISpectralAttributes:
+        max_samples: int | None = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: Literal["values", "ranking"] = "values",
+        time_budget: float | None = None,
+        max_forward_calls: int | None = None,
+        deduplicate_samples: bool = False,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
+    ) -> HSISpectralAttributes | list[HSISpectralAttributes]:
         """
         Attributes the hsi image using LIME method for spectral data. Based on the provided hsi and band mask, the LIME
         method attributes the hsi based on `superbands` (clustered bands) provided by the band mask.
@@ -1586,9 +2115,15 @@ class Lime(Explainer):
             hsi (HSI): An HSI object for which the attribution is performed.
             band_mask (np.ndarray | torch.Tensor | None, optional): Band mask that is used for the spectral attribution.
                 If equals to None, the band mask is created within the function. Defaults to None.
-            target (int, optional): If the model creates more than one output, it analyzes the given target.
-                Defaults to None.
+            target (int | list[int] | Literal["all"] | None, optional): If the model creates more than one output, it
+                analyzes the given target. A list of targets, or "all" for every output of the model, is attributed
+                from a single set of model evaluations, fitting one interpretable model per target, and a list with
+                the attributes of each target is returned. Multiple targets are typed as a keyword argument only, so
+                the result of a single target keeps its precise type. Defaults to None.
             n_samples (int, optional): The number of samples to generate/analyze in LIME. The more the better but slower. Defaults to 10.
+                If the number of band groups `k` is small enough that `2**k <= n_samples`, every combination of the band
+                groups is evaluated exactly once instead, which is exact and cheaper. This only replaces the default
+                sampling design: with a custom `batch_perturb_func` or with `max_samples`, `n_samples` are sampled.
             perturbations_per_eval (int, optional): The number of perturbations to evaluate at once (Simply the inner batch size).
                 Defaults to 4.
             verbose (bool, optional): Specifies whether to show progress during the attribution process. Defaults to False.
@@ -1598,10 +2133,43 @@ class Lime(Explainer):
                 inner lime active region mask as input and return the 1d output (for example number of pixel for each class) and not class mask.
                 Defaults to None.
             band_names (list[str] | dict[str | tuple[str, ...], int] | None, optional): Band names. Defaults to None.
+            max_samples (int | None, optional): If provided, the sampling is adaptive: `n_samples` is the minimum
+                number of samples, after which the interpretable model is refitted every `refit_every` batches and the
+                sampling stops once its coefficients stabilise or `max_samples` samples were used. The number of
+                samples actually used is stored in the `n_samples` attribute of the result. Defaults to None.
+            refit_every (int, optional): The number of batches of `perturbations_per_eval` samples between the refits
+                of adaptive sampling. Defaults to 1.
+            convergence_tol (float, optional): The tolerance of the convergence check of adaptive sampling.
+                With the "values" criterion, no coefficient may change by more than `convergence_tol` times the largest
+                absolute coefficient, with the "ranking" criterion, the Spearman correlation of the coefficients of
+                consecutive refits must be at least `1 - convergence_tol`. Defaults to 0.01.
+            convergence_criterion (Literal["values", "ranking"], optional): The convergence criterion of adaptive
+                sampling. Defaults to "values".
+            time_budget (float | None, optional): The time budget of the sampling in seconds. Once it is exhausted,
+                the interpretable model is fitted on the samples collected so far and the result is marked as
+                `truncated`. `n_samples` (or `max_samples`) stays the upper bound of the number of samples, so set it
+                to the most samples worth spending when the budget is the intended limit. Defaults to None.
+            max_forward_calls (int | None, optional): The maximum number of forward calls of the explained model,
+                each evaluating a batch of at most `perturbations_per_eval` samples. Once reached, the sampling stops
+                as with `time_budget`. Defaults to None.
+            deduplicate_samples (bool, optional): Whether to evaluate the explained model only once for each
+                distinct perturbation. Repeated perturbations reuse the cached model output and still count in the fit
+                of the interpretable model, which saves forward calls when the number of segments is small compared to
+                `n_samples`. Defaults to False.
+            pipeline_depth (int, optional): The number of batches of perturbed images built by a background thread
+                while the explained model evaluates the current batch. Each batch built ahead takes its own buffer of
+                `perturbations_per_eval` images. Defaults to 0, building and evaluating the batches in turn.
+            futures_in_flight (int, optional): The maximum number of batches awaited at the same time if the forward
+                function of the explainable model returns a `torch.futures.Future`, e.g. a model behind an inference
+                server. Higher values overlap the round trips of several batches. Defaults to 1.
+            keep_training_set (bool, optional): Whether to keep the perturbed samples, bit-packed, the model outputs
+                and the similarities on the result, so `HSIAttributes.refit` can fit another interpretable model or
+                kernel width without evaluating the explained model again. Defaults to False.
 
         Returns:
-            HSISpectralAttributes: An HSISpectralAttributes object containing the hsi, the attributions,
-                the band mask, the band names, and the score of the interpretable model used for the explanation.
+            HSISpectralAttributes | list[HSISpectralAttributes]: An HSISpectralAttributes object containing the hsi,
+                the attributions, the band mask, the band names, and the score of the interpretable model used for the
+                explanation, or a list of them in the order of the targets if multiple targets are attributed.
 
         Raises:
             ValueError: If the Lime object is not initialized or is not an instance of LimeBase.
@@ -1632,6 +2200,282 @@ class Lime(Explainer):
         if self._lime is None or not isinstance(self._lime, LimeBase):
             raise ValueError("Lime object not initialized")  # pragma: no cover
 
+        postprocessing_segmentation_output = self._validate_postprocessing(postprocessing_segmentation_output)
+
+        assert isinstance(hsi, HSI), "hsi should be an instance of HSI class"
+
+        band_mask, band_names = self._prepare_band_mask(hsi, band_mask, band_names)
+
+        hsi = hsi.to(self.device)
+        band_mask = band_mask.to(self.device)
+
+        exhaustive = self._use_exhaustive_sampling(band_mask, n_samples, max_samples)
+
+        multiple_targets = isinstance(target, (list, str))
+        lime_attributes, score, sampling_info = self._lime.attribute(
+            inputs=hsi.get_image().unsqueeze(0),
+            target=None if isinstance(target, (list, str)) else target,
+            targets=target if isinstance(target, (list, str)) else None,
+            feature_mask=band_mask.unsqueeze(0),
+            n_samples=n_samples,
+            perturbations_per_eval=perturbations_per_eval,
+            model_postprocessing=postprocessing_segmentation_output,
+            show_progress=verbose,
+            return_input_shape=True,
+            max_samples=max_samples,
+            refit_every=refit_every,
+            convergence_tol=convergence_tol,
+            convergence_criterion=convergence_criterion,
+            return_sampling_info=True,
+            time_budget=time_budget,
+            max_forward_calls=max_forward_calls,
+            deduplicate_samples=deduplicate_samples,
+            exhaustive=exhaustive,
+            pipeline_depth=pipeline_depth,
+            futures_in_flight=futures_in_flight,
+            keep_training_set=keep_training_set,
+        )
+
+        if multiple_targets:
+            return [
+                HSISpectralAttributes(
+                    hsi=hsi,
+                    attributes=target_attributes.squeeze(0),
+                    mask=band_mask.expand_as(hsi.image),
+                    band_names=band_names,
+                    score=target_score,
+                    n_samples=sampling_info.n_samples,
+                    truncated=sampling_info.truncated,
+                    training_set=(
+                        sampling_info.training_set.select_target(target_idx)
+                        if sampling_info.training_set is not None
+                        else None
+                    ),
+                )
+                for target_idx, (target_attributes, target_score) in enumerate(zip(lime_attributes, score))
+            ]
+
+        spectral_attribution = HSISpectralAttributes(
+            hsi=hsi,
+            attributes=lime_attributes.squeeze(0),
+            mask=band_mask.expand_as(hsi.image),
+            band_names=band_names,
+            score=score,
+            n_samples=sampling_info.n_samples,
+            truncated=sampling_info.truncated,
+            training_set=sampling_info.training_set,
+        )
+
+        return spectral_attribution
+
+    async def aget_spatial_attributes(
+        self, hsi: HSI, *args: Any, executor: concurrent.futures.Executor | None = None, **kwargs: Any
+    ) -> HSISpatialAttributes | list[HSISpatialAttributes]:
+        """Asynchronous variant of `get_spatial_attributes`, taking the same arguments.
+
+        The sampling, the transformations and the fit of the interpretable model run in the executor, so the event loop
+        keeps serving other requests during the attribution. If the forward function of the explainable model is a
+        coroutine function, its calls are scheduled on the event loop of the caller, and with `futures_in_flight`
+        several batches of the same attribution are awaited at once.
+
+        Args:
+            hsi (HSI): An HSI object for which the attribution is performed.
+            *args (Any): The positional arguments of `get_spatial_attributes`.
+            executor (concurrent.futures.Executor | None, optional): The executor running the attribution.
+                Defaults to None, the default executor of the event loop.
+            **kwargs (Any): The keyword arguments of `get_spatial_attributes`.
+
+        Returns:
+            HSISpatialAttributes | list[HSISpatialAttributes]: The spatial attributes, see `get_spatial_attributes`.
+        """
+        return await self._run_in_executor(executor, self.get_spatial_attributes, hsi, *args, **kwargs)
+
+    async def aget_spectral_attributes(
+        self, hsi: HSI, *args: Any, executor: concurrent.futures.Executor | None = None, **kwargs: Any
+    ) -> HSISpectralAttributes | list[HSISpectralAttributes]:
+        """Asynchronous variant of `get_spectral_attributes`, taking the same arguments.
+
+        The attribution runs in the executor in the same way as in `aget_spatial_attributes`.
+
+        Args:
+            hsi (HSI): An HSI object for which the attribution is performed.
+            *args (Any): The positional arguments of `get_spectral_attributes`.
+            executor (concurrent.futures.Executor | None, optional): The executor running the attribution.
+                Defaults to None, the default executor of the event loop.
+            **kwargs (Any): The keyword arguments of `get_spectral_attributes`.
+
+        Returns:
+            HSISpectralAttributes | list[HSISpectralAttributes]: The spectral attributes, see
+                `get_spectral_attributes`.
+        """
+        return await self._run_in_executor(executor, self.get_spectral_attributes, hsi, *args, **kwargs)
+
+    async def _run_in_executor(
+        self, executor: concurrent.futures.Executor | None, method: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Runs a method in the executor, with the calls of an async forward function scheduled on the running loop.
+
+        Args:
+            executor (concurrent.futures.Executor | None): The executor, None for the default one of the loop.
+            method (Callable[..., T]): The method to run.
+            *args (Any): The positional arguments of the method.
+            **kwargs (Any): The keyword arguments of the method.
+
+        Returns:
+            T: The result of the method.
+        """
+        loop = asyncio.get_running_loop()
+        async_forward = self._async_forward
+
+        def run() -> T:
+            if async_forward is None:
+                return method(*args, **kwargs)
+            async_forward.bind(loop)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                async_forward.bind(None)
+
+        return await loop.run_in_executor(executor, run)
+
+    def plan_spatial_attributes(
+        self,
+        hsi: HSI,
+        segmentation_mask: np.ndarray | torch.Tensor | None = None,
+        target: int | None = None,
+        n_samples: int = 10,
+        perturbations_per_eval: int = 4,
+        postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+        segmentation_method: Literal["slic", "patch"] = "slic",
+        **segmentation_method_params: Any,
+    ) -> HSIAttributionPlan:
+        """
+        Prepares a reusable plan of spatial attributions for hsi images of the same shape and segmentation mask. The
+        segmentation mask, its interpretable features and the model dependent setup are computed once, so explaining
+        many tiles with the same segmentation, e.g. the patch segmentation, only samples and fits the interpretable
+        model for each of them.
+
+        Args:
+            hsi (HSI): An example hsi, the plan attributes hsi images of its shape.
+            segmentation_mask (np.ndarray | torch.Tensor | None, optional): The segmentation mask shared by the
+                attributions. If None, it is created for the example hsi using the `segmentation_method`.
+                Defaults to None.
+            target (int, optional): If the model creates more than one output, it analyzes the given target.
+                Defaults to None.
+            n_samples (int, optional): The number of samples to generate/analyze in LIME. Defaults to 10.
+            perturbations_per_eval (int, optional): The number of perturbations to evaluate at once. Defaults to 4.
+            postprocessing_segmentation_output (Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None): A
+                segmentation postprocessing function for segmentation problem type, see `get_spatial_attributes`.
+                Defaults to None.
+            segmentation_method (Literal["slic", "patch"], optional):
+                Segmentation method used only if `segmentation_mask` is None. Defaults to "slic".
+            **segmentation_method_params (Any): Additional parameters for the segmentation method.
+
+        Returns:
+            HSIAttributionPlan: The plan, returning the `HSISpatialAttributes` of an hsi when called with it.
+
+        Raises:
+            AssertionError: If explainable model type is `segmentation` and `postprocessing_segmentation_output` is not provided.
+            AssertionError: If the hsi is not an instance of the HSI class.
+
+        Examples:
+            >>> plan = lime.plan_spatial_attributes(hsi, segmentation_method="patch", patch_size=20)
+            >>> spatial_attributions = [plan(tile) for tile in tiles]
+        """
+        if self._lime is None or not isinstance(self._lime, LimeBase):
+            raise ValueError("Lime object not initialized")  # pragma: no cover
+
+        assert isinstance(hsi, HSI), "hsi should be an instance of HSI class"
+        postprocessing_segmentation_output = self._validate_postprocessing(postprocessing_segmentation_output)
+        segmentation_mask = self._prepare_segmentation_mask(
+            hsi, segmentation_mask, segmentation_method, **segmentation_method_params
+        ).to(self.device)
+        hsi = hsi.to(self.device)
+
+        plan = self._lime.plan(
+            hsi.get_image().unsqueeze(0),
+            feature_mask=segmentation_mask.unsqueeze(0),
+            target=target,
+            n_samples=n_samples,
+            perturbations_per_eval=perturbations_per_eval,
+            model_postprocessing=postprocessing_segmentation_output,
+        )
+        return HSIAttributionPlan(plan, segmentation_mask.expand_as(hsi.image), None, self.device)
+
+    def plan_spectral_attributes(
+        self,
+        hsi: HSI,
+        band_mask: np.ndarray | torch.Tensor | None = None,
+        target: int | None = None,
+        n_samples: int = 10,
+        perturbations_per_eval: int = 4,
+        postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+        band_names: list[str | list[str]] | dict[tuple[str, ...] | str, int] | None = None,
+    ) -> HSIAttributionPlan:
+        """
+        Prepares a reusable plan of spectral attributions for hsi images of the same shape and band mask. The band
+        mask, including the lookup of the band names, and the model dependent setup are computed once, so explaining
+        many hsi images with the same bands only samples and fits the interpretable model for each of them.
+
+        Args:
+            hsi (HSI): An example hsi, the plan attributes hsi images of its shape and wavelengths.
+            band_mask (np.ndarray | torch.Tensor | None, optional): The band mask shared by the attributions. If None,
+                it is created from the band names. Defaults to None.
+            target (int, optional): If the model creates more than one output, it analyzes the given target.
+                Defaults to None.
+            n_samples (int, optional): The number of samples to generate/analyze in LIME. As in
+                `get_spectral_attributes`, every combination of the band groups is evaluated instead if it is cheaper.
+                Defaults to 10.
+            perturbations_per_eval (int, optional): The number of perturbations to evaluate at once. Defaults to 4.
+            postprocessing_segmentation_output (Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None): A
+                segmentation postprocessing function for segmentation problem type, see `get_spectral_attributes`.
+                Defaults to None.
+            band_names (list[str | list[str]] | dict[tuple[str, ...] | str, int] | None, optional): The band names,
+                see `get_spectral_attributes`. Defaults to None.
+
+        Returns:
+            HSIAttributionPlan: The plan, returning the `HSISpectralAttributes` of an hsi when called with it.
+
+        Raises:
+            AssertionError: If explainable model type is `segmentation` and `postprocessing_segmentation_output` is not provided.
+            AssertionError: If the hsi is not an instance of the HSI class.
+        """
+        if self._lime is None or not isinstance(self._lime, LimeBase):
+            raise ValueError("Lime object not initialized")  # pragma: no cover
+
+        assert isinstance(hsi, HSI), "hsi should be an instance of HSI class"
+        postprocessing_segmentation_output = self._validate_postprocessing(postprocessing_segmentation_output)
+        band_mask, band_names = self._prepare_band_mask(hsi, band_mask, band_names)
+        band_mask = band_mask.to(self.device)
+        hsi = hsi.to(self.device)
+
+        plan = self._lime.plan(
+            hsi.get_image().unsqueeze(0),
+            feature_mask=band_mask.unsqueeze(0),
+            target=target,
+            n_samples=n_samples,
+            perturbations_per_eval=perturbations_per_eval,
+            model_postprocessing=postprocessing_segmentation_output,
+            exhaustive=self._use_exhaustive_sampling(band_mask, n_samples),
+        )
+        return HSIAttributionPlan(plan, band_mask.expand_as(hsi.image), band_names, self.device)
+
+    def _validate_postprocessing(
+        self, postprocessing_segmentation_output: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None
+    ) -> Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None:
+        """Validates the segmentation postprocessing function against the problem type of the explainable model.
+
+        Args:
+            postprocessing_segmentation_output (Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None): The
+                segmentation postprocessing function.
+
+        Returns:
+            Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None: The postprocessing function, or None if the
+                problem is not segmentation.
+
+        Raises:
+            AssertionError: If explainable model type is `segmentation` and `postprocessing_segmentation_output` is not provided.
+        """
         if self.explainable_model.problem_type == "segmentation":
             assert postprocessing_segmentation_output, (
                 "postprocessing_segmentation_output is required for segmentation problem type, please provide "
@@ -1643,9 +2487,52 @@ class Lime(Explainer):
                 "postprocessing_segmentation_output is provided but the problem is not segmentation, will be ignored"
             )
             postprocessing_segmentation_output = None
+        return postprocessing_segmentation_output
 
-        assert isinstance(hsi, HSI), "hsi should be an instance of HSI class"
+    def _prepare_segmentation_mask(
+        self,
+        hsi: HSI,
+        segmentation_mask: np.ndarray | torch.Tensor | None,
+        segmentation_method: Literal["slic", "patch"],
+        **segmentation_method_params: Any,
+    ) -> torch.Tensor:
+        """Creates the segmentation mask if it is not provided and converts it to a tensor matching the hsi dimensions.
+
+        Args:
+            hsi (HSI): The hsi the segmentation mask is used for.
+            segmentation_mask (np.ndarray | torch.Tensor | None): The segmentation mask, or None to create one.
+            segmentation_method (Literal["slic", "patch"]): Segmentation method used if `segmentation_mask` is None.
+            **segmentation_method_params (Any): Additional parameters for the segmentation method.
 
+        Returns:
+            torch.Tensor: The segmentation mask.
+        """
+        if segmentation_mask is None:
+            segmentation_mask = self.get_segmentation_mask(hsi, segmentation_method, **segmentation_method_params)
+        segmentation_mask = ensure_torch_tensor(
+            segmentation_mask, "Segmentation mask should be None, numpy array, or torch tensor"
+        )
+        if segmentation_mask.ndim != hsi.image.ndim:
+            segmentation_mask = segmentation_mask.unsqueeze(dim=hsi.spectral_axis)
+        return segmentation_mask
+
+    def _prepare_band_mask(
+        self,
+        hsi: HSI,
+        band_mask: np.ndarray | torch.Tensor | None,
+        band_names: list[str | list[str]] | dict[tuple[str, ...] | str, int] | None,
+    ) -> tuple[torch.Tensor, list[str | list[str]] | dict[tuple[str, ...] | str, int]]:
+        """Creates the band mask if it is not provided, expands it to the hsi shape and resolves the band names.
+
+        Args:
+            hsi (HSI): The hsi the band mask is used for.
+            band_mask (np.ndarray | torch.Tensor | None): The band mask, or None to create one from the band names.
+            band_names (list[str | list[str]] | dict[tuple[str, ...] | str, int] | None): The band names.
+
+        Returns:
+            tuple[torch.Tensor, list[str | list[str]] | dict[tuple[str, ...] | str, int]]: The band mask and the band
+                names.
+        """
         if band_mask is None:
             band_mask, band_names = self.get_band_mask(hsi, band_names)
         band_mask = ensure_torch_tensor(band_mask, "Band mask should be None, numpy array, or torch tensor")
@@ -1664,30 +2551,35 @@ class Lime(Explainer):
             logger.debug(
                 "Band names are provided and will be used. In the future, there should be an option to validate them."
             )
+        return band_mask, band_names
 
-        hsi = hsi.to(self.device)
-        band_mask = band_mask.to(self.device)
+    def _use_exhaustive_sampling(self, band_mask: torch.Tensor, n_samples: int, max_samples: int | None = None) -> bool:
+        """Checks whether evaluating every combination of the band groups is cheaper than sampling `n_samples`.
 
-        lime_attributes, score = self._lime.attribute(
-            inputs=hsi.get_image().unsqueeze(0),
-            target=target,
-            feature_mask=band_mask.unsqueeze(0),
-            n_samples=n_samples,
-            perturbations_per_eval=perturbations_per_eval,
-            model_postprocessing=postprocessing_segmentation_output,
-            show_progress=verbose,
-            return_input_shape=True,
-        )
+        With few band groups, the exhaustive enumeration is exact and takes fewer model evaluations than sampling. It
+        only replaces the default sampling design, a custom `batch_perturb_func` or an adaptive sampling budget given
+        by `max_samples` is always kept.
 
-        spectral_attribution = HSISpectralAttributes(
-            hsi=hsi,
-            attributes=lime_attributes.squeeze(0),
-            mask=band_mask.expand_as(hsi.image),
-            band_names=band_names,
-            score=score,
-        )
+        Args:
+            band_mask (torch.Tensor): The band mask.
+            n_samples (int): The requested number of samples.
+            max_samples (int | None, optional): The maximum number of samples of the adaptive sampling.
+                Defaults to None.
 
-        return spectral_attribution
+        Returns:
+            bool: Whether to use the exhaustive sampling.
+        """
+        num_interp_features = int(band_mask.max() - band_mask.min()) + 1
+        exhaustive = (
+            self._lime.batch_perturb_func is default_batch_perturb_func
+            and max_samples is None
+            and self._lime.perturb_interpretable_space
+            and num_interp_features <= MAX_EXHAUSTIVE_FEATURES
+            and 2**num_interp_features <= n_samples
+        )
+        if exhaustive:
+            logger.debug(f"Enumerating all {2**num_interp_features} combinations of the bands instead of sampling")
+        return exhaustive
 
     @staticmethod
     def _get_slick_segmentation_mask(
@@ -5,12 +5,34 @@
 # https://captum.ai/api/_modules/captum/attr/_core/lime.html#LimeBase
 ######################################################################
 
+import concurrent.futures
+import copy
+import functools
 import inspect
+import itertools
 import math
+import os
+import queue
+import threading
+import time
 import typing
 import warnings
+from collections import deque
 from inspect import signature
-from typing import Any, Callable, cast, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    cast,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import torch
 
@@ -30,7 +52,6 @@ from captum._utils.common import (
 from captum._utils.progress import progress
 from captum._utils.typing import (
     BaselineType,
-    Literal,
     TargetType,
     TensorOrTupleOfTensorsGeneric,
 )
@@ -45,9 +66,201 @@ from torch import Tensor
 from torch.futures import Future
 from torch.nn import CosineSimilarity
 from torch.utils.data import DataLoader, TensorDataset
-from sklearn.metrics import r2_score
 
-from meteors.utils.models import InterpretableModel, SkLearnLasso
+from meteors.utils.models import ForwardCache, InterpretableModel, SkLearnLasso
+from meteors.utils.models.models import LinearModelStatistics
+from meteors.utils.utils import expand_values_by_mask
+
+# The largest number of interpretable features whose 2^n binary samples may be enumerated by the exhaustive sampling
+MAX_EXHAUSTIVE_FEATURES = 16
+# Options of `LimeBase.attribute` supported only by the batched sampling in the interpretable space
+_BATCHED_OPTIONS = ("deduplicate_samples", "exhaustive", "targets", "pipeline_depth", "futures_in_flight")
+# Pairs of options of `LimeBase.attribute` that cannot be used together
+_INCOMPATIBLE_OPTIONS = (
+    ("deduplicate_samples", "pipeline_depth"),
+    ("deduplicate_samples", "futures_in_flight"),
+    ("streaming_fit", "targets"),
+    ("streaming_fit", "keep_training_set"),
+    ("exhaustive", "max_samples"),
+)
+
+
+class LimeSamplingInfo(NamedTuple):
+    """Information about the sampling of a LIME attribution.
+
+    Attributes:
+        n_samples (int): The number of samples the interpretable model was trained on.
+        converged (bool): Whether adaptive sampling stopped because the interpretable model converged before reaching
+            the maximum number of samples. Always False if the sampling is not adaptive.
+        truncated (bool): Whether the sampling was stopped early because the time or forward-pass budget was exhausted.
+        training_set (LimeTrainingData, optional): The training set of the interpretable model, kept only if requested
+            with `keep_training_set` and for the attribution of a single example.
+    """
+
+    n_samples: int
+    converged: bool
+    truncated: bool = False
+    training_set: Optional["LimeTrainingData"] = None
+
+
+class LimeTrainingData(NamedTuple):
+    """The training set of the interpretable model of a LIME attribution, kept to refit the interpretable model without
+    evaluating the explained model again.
+
+    The binary interpretable samples are stored bit-packed, 8 features per byte, so the design matrix takes 32 times
+    less memory than the float tensor the interpretable model is trained on.
+
+    Attributes:
+        packed_samples (Tensor): The interpretable samples packed into bytes, shape
+            n_samples x ceil(num_interp_features / 8), the first feature in the least significant bit.
+        num_interp_features (int): The number of interpretable features.
+        outputs (Tensor): The model outputs for the samples, shape n_samples, or n_samples x n_targets for the
+            attribution of multiple targets.
+        similarities (Tensor): The similarities of the samples to the original input, shape n_samples.
+        kernel_width (float, optional): The width of the exponential kernel the similarities were computed with, None
+            if the similarity function is not an exponential kernel of a known width.
+        interpretable_model (InterpretableModel, optional): An unfitted copy of the interpretable model of the
+            attribution, the one `fit` uses by default.
+        feature_mask (Tensor, optional): The interpretable feature of every element of the input, as used by the
+            attribution after any postprocessing of the mask, None if unknown.
+    """
+
+    packed_samples: Tensor
+    num_interp_features: int
+    outputs: Tensor
+    similarities: Tensor
+    kernel_width: Optional[float] = None
+    interpretable_model: Optional[InterpretableModel] = None
+    feature_mask: Optional[Tensor] = None
+
+    @classmethod
+    def from_samples(
+        cls,
+        samples: Tensor,
+        outputs: Tensor,
+        similarities: Tensor,
+        kernel_width: Optional[float] = None,
+        interpretable_model: Optional[InterpretableModel] = None,
+        feature_mask: Optional[Tensor] = None,
+    ) -> "LimeTrainingData":
+        """Packs the training set of an attribution.
+
+        Args:
+            samples (Tensor): The binary interpretable samples, shape n_samples x num_interp_features.
+            outputs (Tensor): The model outputs for the samples.
+            similarities (Tensor): The similarities of the samples to the original input.
+            kernel_width (float, optional): The width of the exponential kernel of the similarities.
+                Default: None
+            interpretable_model (InterpretableModel, optional): An unfitted copy of the interpretable model.
+                Default: None
+            feature_mask (Tensor, optional): The interpretable feature of every element of the input.
+                Default: None
+
+        Returns:
+            LimeTrainingData: The packed training set, holding copies of the outputs and the similarities.
+
+        Raises:
+            ValueError: If the samples are not binary.
+        """
+        if not bool(((samples == 0) | (samples == 1)).all()):
+            raise ValueError("Keeping the training set requires binary interpretable samples.")
+        n_samples, num_interp_features = samples.shape
+        padded = torch.zeros(
+            (n_samples, math.ceil(num_interp_features / 8) * 8), dtype=torch.long, device=samples.device
+        )
+        padded[:, :num_interp_features] = samples
+        powers = 2 ** torch.arange(8, dtype=torch.long, device=samples.device)
+        packed = (padded.view(n_samples, -1, 8) * powers).sum(dim=2).to(torch.uint8)
+        return cls(
+            packed,
+            num_interp_features,
+            outputs.clone(),
+            similarities.clone(),
+            kernel_width,
+            interpretable_model,
+            feature_mask,
+        )
+
+    @property
+    def n_samples(self) -> int:
+        """The number of samples of the training set."""
+        return self.packed_samples.shape[0]
+
+    def samples(self) -> Tensor:
+        """Unpacks the interpretable samples.
+
+        Returns:
+            Tensor: The float samples of shape n_samples x num_interp_features.
+        """
+        bits = torch.arange(8, dtype=torch.long, device=self.packed_samples.device)
+        unpacked = (self.packed_samples.long().unsqueeze(2) >> bits) & 1
+        return unpacked.reshape(self.n_samples, -1)[:, : self.num_interp_features].float()
+
+    def weights(self, kernel_width: Optional[float] = None) -> Tensor:
+        """Returns the weights of the samples for an exponential kernel of the given width.
+
+        The exponential kernel weights a sample at distance d by exp(-d^2 / (2 * w^2)), so the weights for the width w
+        are the stored similarities raised to the power (w0 / w)^2, where w0 is the width they were computed with.
+
+        Args:
+            kernel_width (float, optional): The width of the kernel, None for the width of the attribution.
+                Default: None
+
+        Returns:
+            Tensor: The weights of shape n_samples.
+
+        Raises:
+            ValueError: If the kernel width is not positive or the width of the stored similarities is unknown.
+        """
+        if kernel_width is None or kernel_width == self.kernel_width:
+            return self.similarities
+        if kernel_width <= 0:
+            raise ValueError(f"kernel_width must be positive, got {kernel_width}")
+        if self.kernel_width is None:
+            raise ValueError(
+                "The similarities were not computed with an exponential kernel of a known width and cannot be rescaled"
+            )
+        return self.similarities ** ((self.kernel_width / kernel_width) ** 2)
+
+    def select_target(self, index: int) -> "LimeTrainingData":
+        """Returns the training set of a single target of the attribution of multiple targets.
+
+        Args:
+            index (int): The position of the target in the targets of the attribution.
+
+        Returns:
+            LimeTrainingData: The training set sharing the samples, with the outputs of the target.
+        """
+        return self._replace(outputs=self.outputs[:, index])
+
+    def fit(
+        self, interpretable_model: Optional[InterpretableModel] = None, kernel_width: Optional[float] = None
+    ) -> Tuple[Tensor, Tensor]:
+        """Fits an interpretable model to the training set.
+
+        Args:
+            interpretable_model (InterpretableModel, optional): The interpretable model, fitted in place, None for a copy
+                of the interpretable model of the attribution.
+                Default: None
+            kernel_width (float, optional): The width of the kernel weighting the samples, see `weights`.
+                Default: None
+
+        Returns:
+            Tuple[Tensor, Tensor]: The representation of the interpretable model and its R^2 score.
+
+        Raises:
+            ValueError: If the training set holds the outputs of multiple targets, see `select_target`.
+            ValueError: If no interpretable model is provided nor was kept with the training set.
+        """
+        if self.outputs.dim() > 1:
+            raise ValueError("The training set holds multiple targets, select one of them with `select_target`")
+        if interpretable_model is None:
+            if self.interpretable_model is None:
+                raise ValueError("No interpretable model was kept with the training set, provide one to fit")
+            interpretable_model = _clone_interpretable_model(self.interpretable_model)
+        return _fit_surrogate(
+            interpretable_model, self.samples(), self.outputs, self.weights(kernel_width), self.outputs.device
+        )
 
 
 class LimeBase(PerturbationAttribution):
@@ -87,6 +300,10 @@ class LimeBase(PerturbationAttribution):
         perturb_interpretable_space: bool,
         from_interp_rep_transform: Optional[Callable],
         to_interp_rep_transform: Optional[Callable],
+        batch_perturb_func: Optional[Callable] = None,
+        batch_from_interp_rep_transform: Optional[Callable] = None,
+        batch_similarity_func: Optional[Callable] = None,
+        forward_pool: Optional["ProcessPoolForward"] = None,
     ) -> None:
         """Initializes an instance of the LimeBase class.
 
@@ -97,7 +314,8 @@ class LimeBase(PerturbationAttribution):
                     representing the entire batch.
             interpretable_model (InterpretableModel): Model object to train interpretable model.
                     A Model object provides a `fit` method to train the model,
-                    given a dataloader, with batches containing three tensors:
+                    given an iterable of batches (e.g. a dataloader), with batches
+                    containing three tensors:
 
                     - interpretable_inputs: Tensor
                       [2D num_samples x num_interp_features],
@@ -112,9 +330,13 @@ class LimeBase(PerturbationAttribution):
                     SkLearn linear models as well as SGD-based PyTorch linear
                     models.
 
+                    The whole training set is passed to `fit` as a single batch.
+
                     Note that calling fit multiple times should retrain the
-                    interpretable model, each attribution call reuses
-                    the same given interpretable model object.
+                    interpretable model. Each attribution call fits its own
+                    deep copy of the given interpretable model object, which
+                    itself is never fitted, so concurrent attribution calls
+                    of the same instance are independent.
             similarity_func (Callable): Function which takes a single sample
                     along with its corresponding interpretable representation
                     and returns the weight of the interpretable sample for
@@ -224,6 +446,83 @@ class LimeBase(PerturbationAttribution):
 
                     All kwargs passed to the attribute method are
                     provided as keyword arguments (kwargs) to this callable.
+            batch_perturb_func (Callable, optional): Function which returns
+                    the whole design matrix of interpretable samples at once,
+                    a tensor of shape n_samples x num_interp_features. If it is
+                    provided and perturb_interpretable_space is True, the
+                    samples are drawn in a single tensor operation and passed
+                    to the rest of the pipeline in chunks of
+                    perturbations_per_eval instead of one by one through
+                    perturb_func.
+
+                    The expected signature of this callable is:
+
+                    >>> batch_perturb_func(
+                    >>>    original_input: Tensor or tuple[Tensor, ...],
+                    >>>    n_samples: int,
+                    >>>    **kwargs: Any
+                    >>> ) -> Tensor [2D n_samples x num_interp_features]
+
+                    All kwargs passed to the attribute method are
+                    provided as keyword arguments (kwargs) to this callable.
+                    Default: None
+            batch_from_interp_rep_transform (Callable, optional): Batched
+                    counterpart of from_interp_rep_transform used together with
+                    batch_perturb_func. It takes a block of interpretable samples
+                    (tensor of shape batch_size x num_interp_features) and returns
+                    the whole batch of model inputs, concatenated along the first
+                    dimension. The callable receives an `out` keyword argument
+                    holding the tensor (or tuple of tensors) returned by its first
+                    call, narrowed to the size of the current block, and should
+                    write the perturbed inputs into it, so a single buffer is
+                    allocated for the whole attribution. `out` is None on the
+                    first call. If not provided, from_interp_rep_transform is
+                    applied to each sample of the block separately.
+
+                    The expected signature of this callable is:
+
+                    >>> batch_from_interp_rep_transform(
+                    >>>    curr_samples: Tensor [2D batch_size x num_interp_features],
+                    >>>    original_input: Tensor or Tuple of Tensors,
+                    >>>    out: None or Tensor or Tuple of Tensors,
+                    >>>    **kwargs: Any
+                    >>> ) -> Tensor or tuple[Tensor, ...]
+
+                    All kwargs passed to the attribute method are
+                    provided as keyword arguments (kwargs) to this callable.
+                    Default: None
+            batch_similarity_func (Callable, optional): Batched counterpart of
+                    similarity_func used together with batch_perturb_func. It
+                    takes the whole block of perturbed inputs, concatenated along
+                    the first dimension, with the corresponding block of
+                    interpretable samples and returns the weights of all the
+                    samples at once. A function applying an exponential kernel
+                    can be constructed using get_exp_kernel_batch_similarity_function.
+                    If not provided, similarity_func is applied to each sample
+                    of the block separately.
+
+                    The expected signature of this callable is:
+
+                    >>> batch_similarity_func(
+                    >>>    original_input: Tensor or tuple[Tensor, ...],
+                    >>>    perturbed_inputs: Tensor or tuple[Tensor, ...],
+                    >>>    perturbed_interpretable_inputs:
+                    >>>        Tensor [2D batch_size x num_interp_features],
+                    >>>    **kwargs: Any
+                    >>> ) -> Tensor [1D batch_size]
+
+                    All kwargs passed to the attribute method are
+                    provided as keyword arguments (kwargs) to this callable.
+                    Default: None
+            forward_pool (ProcessPoolForward, optional): Pool of worker
+                    processes evaluating the forward function of the batched
+                    sampling in the interpretable space. The blocks of samples
+                    are split into one shard per worker and each worker builds
+                    the perturbed inputs of its shard with
+                    batch_from_interp_rep_transform from the input shared once
+                    per attribution, so only the binary samples are sent per
+                    block. The pool should wrap the same forward function.
+                    Default: None
         """
         super().__init__(forward_func)
         self.interpretable_model = interpretable_model
@@ -232,6 +531,12 @@ class LimeBase(PerturbationAttribution):
         self.perturb_interpretable_space = perturb_interpretable_space
         self.from_interp_rep_transform = from_interp_rep_transform
         self.to_interp_rep_transform = to_interp_rep_transform
+        self.batch_perturb_func = batch_perturb_func
+        self.batch_from_interp_rep_transform = batch_from_interp_rep_transform
+        self.batch_similarity_func = batch_similarity_func
+        self.forward_pool = forward_pool
+        # Whether the forward function takes any arguments, inspected once on the first evaluation
+        self._forward_takes_inputs: Optional[bool] = None
 
         if self.perturb_interpretable_space:
             assert (
@@ -252,8 +557,22 @@ class LimeBase(PerturbationAttribution):
         perturbations_per_eval: int = 1,
         model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
         show_progress: bool = False,
+        streaming_fit: bool = False,
+        max_samples: Optional[int] = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: str = "values",
+        return_sampling_info: bool = False,
+        time_budget: Optional[float] = None,
+        max_forward_calls: Optional[int] = None,
+        deduplicate_samples: bool = False,
+        exhaustive: bool = False,
+        targets: Union[None, List[int], str] = None,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
         **kwargs,
-    ) -> tuple[Tensor, Tensor]:
+    ) -> Union[Tuple[Tensor, Tensor], Tuple[Tensor, Tensor, LimeSamplingInfo]]:
         """This method attributes the output of the model with given target index (in case it is provided, otherwise it
         assumes that output is a scalar) to the inputs of the model using the approach described above. It trains an
         interpretable model and returns a representation of the interpretable model.
@@ -270,6 +589,13 @@ class LimeBase(PerturbationAttribution):
         representation for the full batch, and perturbations_per_eval
         must be set to 1.
 
+        The options deduplicate_samples, exhaustive, targets, pipeline_depth
+        and futures_in_flight require the batched sampling, i.e. a
+        `batch_perturb_func` sampling in the interpretable space.
+        deduplicate_samples cannot be combined with pipeline_depth or
+        futures_in_flight, streaming_fit with targets or keep_training_set,
+        and exhaustive with max_samples. A ValueError is raised otherwise.
+
         Args:
             inputs (Tensor or tuple[Tensor, ...]): Input for which LIME
                         is computed. If forward_func takes a single
@@ -351,6 +677,104 @@ class LimeBase(PerturbationAttribution):
                         (e.g. time estimation). Otherwise, it will fallback to
                         a simple output of progress.
                         Default: False
+            streaming_fit (bool, optional): If True, the samples are not stored.
+                        After every evaluated batch they are reduced to the
+                        sufficient statistics of a weighted linear least-squares
+                        problem (the weighted Gram matrix and cross products),
+                        so the memory needed to fit the interpretable model is
+                        O(num_interp_features^2) regardless of n_samples. The
+                        interpretable model must provide a `fit_statistics`
+                        method taking these statistics, such as TorchRidge or
+                        TorchLasso. The R^2 score is computed from unweighted
+                        statistics accumulated in the same way.
+                        Default: False
+            max_samples (int, optional): If provided, the sampling is adaptive:
+                        n_samples is the minimum number of samples, after which
+                        the interpretable model is refitted every refit_every
+                        evaluated batches, and the sampling stops as soon as its
+                        coefficients stabilise between two consecutive refits, or
+                        once max_samples samples were evaluated. If None, exactly
+                        n_samples samples are used.
+                        Default: None
+            refit_every (int, optional): The number of evaluated batches of
+                        perturbations_per_eval samples between the refits of
+                        adaptive sampling.
+                        Default: 1
+            convergence_tol (float, optional): The tolerance of the convergence
+                        check of adaptive sampling. With the "values" criterion,
+                        the coefficients converged if none of them changed by
+                        more than convergence_tol times the largest absolute
+                        coefficient. With the "ranking" criterion, they converged
+                        if the Spearman correlation of the coefficients of
+                        two consecutive refits is at least 1 - convergence_tol.
+                        Default: 0.01
+            convergence_criterion (str, optional): Either "values" or "ranking",
+                        see convergence_tol.
+                        Default: "values"
+            return_sampling_info (bool, optional): If True, a LimeSamplingInfo
+                        with the number of samples actually used is returned as
+                        the third element of the output.
+                        Default: False
+            time_budget (float, optional): The wall-clock budget of the
+                        sampling in seconds. Once it is exhausted, no further
+                        batch is evaluated and the interpretable model is fitted
+                        on the samples collected so far. At least one batch is
+                        always evaluated. n_samples (or max_samples) remains the
+                        upper bound of the number of samples, so it should be set
+                        to the most samples worth spending when the budget is the
+                        intended limit.
+                        Default: None
+            max_forward_calls (int, optional): The maximum number of calls of
+                        the forward function, each evaluating one batch of at most
+                        perturbations_per_eval samples. Once reached, the sampling
+                        stops as with time_budget.
+                        Default: None
+            deduplicate_samples (bool, optional): If True, the model outputs of
+                        the binary interpretable samples are memoized for the
+                        attribution, so a repeated sample reuses the cached output
+                        instead of being evaluated again, while it still counts
+                        in the fit of the interpretable model. Batches with only
+                        repeated samples skip the forward call.
+                        Default: False
+            exhaustive (bool, optional): If True, instead of sampling at
+                        random, every one of the 2^num_interp_features binary
+                        samples is evaluated exactly once, in batches of
+                        perturbations_per_eval, and weighted with the similarity
+                        function, so n_samples is ignored. It is exact and cheaper
+                        than random sampling whenever 2^num_interp_features does
+                        not exceed n_samples. Requires `num_interp_features` in
+                        kwargs.
+                        Default: False
+            targets (list[int] or str, optional): The output indices attributed
+                        together from the same samples, or "all" for every output
+                        of the model. Each perturbed batch is evaluated once and
+                        the selected columns of the output are kept, then one
+                        interpretable model is fitted per target on the shared
+                        samples. The representation and the R^2 score get a
+                        leading target dimension. Requires target to be None.
+                        Default: None
+            pipeline_depth (int, optional): If positive, the perturbed inputs
+                        and the similarities of the next blocks are built by a
+                        producer thread while the model evaluates the current
+                        block, with at most pipeline_depth blocks built ahead,
+                        each into its own buffer. 0 builds and evaluates the
+                        blocks one after another.
+                        Default: 0
+            futures_in_flight (int, optional): The maximum number of forward
+                        calls whose output is awaited at the same time, if
+                        the forward function returns a `torch.futures.Future`,
+                        e.g. a remote model or one run with `torch.jit.fork`.
+                        The next blocks are dispatched before the outputs of
+                        the previous ones are collected, in the order of
+                        dispatch. Each dispatched block holds its own buffer.
+                        Default: 1
+            keep_training_set (bool, optional): If True, the binary
+                        interpretable samples, bit-packed, the model outputs and
+                        the similarities are kept as a LimeTrainingData in the
+                        sampling info, so the interpretable model can be refitted,
+                        e.g. with another regularization or kernel width, without
+                        evaluating the model again.
+                        Default: False
             **kwargs (Any, optional): Any additional arguments necessary for
                         sampling and transformation functions (provided to
                         constructor).
@@ -363,7 +787,12 @@ class LimeBase(PerturbationAttribution):
                     type matches the return type of train_interpretable_model_func.
                     For example, this could contain coefficients of a
                     linear surrogate model.
-            - R^2 (*Tensor*): R^2 score of the interpretable model on the training data.
+            - R^2 (*Tensor*): R^2 score of the interpretable model on the training data,
+                    one per target if targets is provided.
+            - **sampling info** (*LimeSamplingInfo*, optional):
+                    The number of samples used, whether adaptive sampling
+                    converged and whether the sampling was truncated by the
+                    budget. Returned only if return_sampling_info is True.
 
         Examples::
 
@@ -429,117 +858,441 @@ class LimeBase(PerturbationAttribution):
             >>> # model.
             >>> attr_coefs, r2 = lime_attr.attribute(input, target=1, kernel_width=1.1)
         """
+        options = _SamplingOptions(
+            n_samples=n_samples,
+            perturbations_per_eval=perturbations_per_eval,
+            streaming_fit=streaming_fit,
+            max_samples=max_samples,
+            refit_every=refit_every,
+            convergence_tol=convergence_tol,
+            convergence_criterion=convergence_criterion,
+            time_budget=time_budget,
+            max_forward_calls=max_forward_calls,
+            deduplicate_samples=deduplicate_samples,
+            exhaustive=exhaustive,
+            targets=targets,
+            pipeline_depth=pipeline_depth,
+            futures_in_flight=futures_in_flight,
+            keep_training_set=keep_training_set,
+        ).validate(self, target, kwargs)
+        # Fitted per call on a copy, so concurrent attributions of the same instance do not share the surrogate
+        interpretable_model = _clone_interpretable_model(self.interpretable_model)
+
         with torch.no_grad():
             inp_tensor = cast(Tensor, inputs) if isinstance(inputs, Tensor) else inputs[0]
             device = inp_tensor.device
 
-            mask_inps = []
-            interpretable_inps = []
-            similarities = []
-            outputs = []
-
-            curr_model_inputs = []
-            expanded_additional_args = None
-            expanded_target = None
-            perturb_generator = None
-            if inspect.isgeneratorfunction(self.perturb_func):
-                perturb_generator = self.perturb_func(inputs, **kwargs)
-
-            if show_progress:
-                attr_progress = progress(
-                    total=math.ceil(n_samples / perturbations_per_eval),
-                    desc=f"{self.get_name()} attribution",
-                )
-                attr_progress.update(0)
-
-            batch_count = 0
-            for _ in range(n_samples):
-                if perturb_generator:
-                    try:
-                        curr_sample = next(perturb_generator)
-                    except StopIteration:
-                        warnings.warn("Generator completed prior to given n_samples iterations!")
-                        break
-                else:
-                    curr_sample = self.perturb_func(inputs, **kwargs)
-                batch_count += 1
-                mask_inps.append(get_mask_from_interp_rep_transform(curr_sample, **kwargs))
-                if self.perturb_interpretable_space and self.from_interp_rep_transform is not None:
-                    interpretable_inps.append(curr_sample)
-                    curr_model_inputs.append(self.from_interp_rep_transform(curr_sample, inputs, **kwargs))
-                elif self.to_interp_rep_transform is not None:
-                    curr_model_inputs.append(curr_sample)
-                    interpretable_inps.append(self.to_interp_rep_transform(curr_sample, inputs, **kwargs))
-                else:
-                    raise ValueError("Must provide either `to_interp_rep_transform` or `from_interp_rep_transform`")
-                curr_sim = self.similarity_func(inputs, curr_model_inputs[-1], interpretable_inps[-1], **kwargs)
+            run = _SamplingRun(
+                options,
+                device,
+                lambda training_set: self._fit_interpretable_model(training_set, device, interpretable_model),
+                f"{self.get_name()} attribution" if show_progress else None,
+            )
+            sample = self._sample_batched if self._batched_sampling else self._sample_sequential
+            sample(run, inputs, target, additional_forward_args, model_postprocessing, device, **kwargs)
+            coefs, r2 = run.finish()
 
-                similarities.append(
-                    curr_sim.flatten() if isinstance(curr_sim, Tensor) else torch.tensor([curr_sim], device=device)
+            if return_sampling_info:
+                training_data = (
+                    self._training_data(run.training_set, kwargs.get("feature_mask")) if keep_training_set else None
                 )
-                if len(curr_model_inputs) == perturbations_per_eval:
-                    if expanded_additional_args is None:
-                        expanded_additional_args = _expand_additional_forward_args(
-                            additional_forward_args, len(curr_model_inputs)
-                        )
-                    if expanded_target is None:
-                        expanded_target = _expand_target(target, len(curr_model_inputs))
-
-                    model_out = self._evaluate_batch(
-                        curr_model_inputs,
-                        expanded_target,
-                        expanded_additional_args,
-                        device,
-                        model_postprocessing,
-                        mask_inps if len(mask_inps) > 0 else None,
-                    )
+                return coefs, r2, run.sampling_info(training_data)
+            return coefs, r2
 
-                    if show_progress:
-                        attr_progress.update()
+    @property
+    def _batched_sampling(self) -> bool:
+        """Whether the samples are drawn in blocks by `batch_perturb_func` in the interpretable space."""
+        return self.batch_perturb_func is not None and self.perturb_interpretable_space
 
-                    outputs.append(model_out)
+    def _sample_batched(
+        self,
+        run: "_SamplingRun",
+        inputs: TensorOrTupleOfTensorsGeneric,
+        target: TargetType,
+        additional_forward_args: Any,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]],
+        device: torch.device,
+        **kwargs,
+    ) -> None:
+        """Fills the training set of an attribution with blocks of samples drawn by `batch_perturb_func`.
 
-                    curr_model_inputs = []
-                    mask_inps = []
+        The design matrix of a chunk of samples is drawn at once, directly on the input device, and evaluated block by
+        block. Adaptive sampling draws a further chunk of refit_every blocks until the interpretable model converges.
+        With streaming_fit, the design is drawn block by block, so the memory does not grow with the number of samples.
 
-            if len(curr_model_inputs) > 0:
-                expanded_additional_args = _expand_additional_forward_args(
-                    additional_forward_args, len(curr_model_inputs)
-                )
-                expanded_target = _expand_target(target, len(curr_model_inputs))
-                model_out = self._evaluate_batch(
-                    curr_model_inputs,
-                    expanded_target,
-                    expanded_additional_args,
-                    device,
-                    model_postprocessing,
-                    mask_inps,
-                )
-                if show_progress:
-                    attr_progress.update()
-                outputs.append(model_out)
-            if show_progress:
-                attr_progress.close()
-
-            combined_interp_inps = torch.cat(interpretable_inps).float()
-            combined_outputs = (torch.cat(outputs) if len(outputs[0].shape) > 0 else torch.stack(outputs)).float()
-            combined_sim = (
-                torch.cat(similarities) if len(similarities[0].shape) > 0 else torch.stack(similarities)
-            ).float()
-            dataset = TensorDataset(combined_interp_inps, combined_outputs, combined_sim)
-            self.interpretable_model.fit(DataLoader(dataset, batch_size=batch_count))
-            if hasattr(self.interpretable_model, "to"):
-                self.interpretable_model.to(device)
+        Args:
+            run (_SamplingRun): The sampling of the attribution.
+            inputs (Tensor or tuple[Tensor, ...]): The original input.
+            target (TargetType): The target of the attribution.
+            additional_forward_args (Any): The additional forward arguments.
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+            device (torch.device): The device of the inputs.
+            **kwargs: The keyword arguments passed to the sampling, transformation and similarity functions.
+        """
+        options = run.options
+        evaluator = _BlockEvaluator(
+            self, inputs, target, additional_forward_args, model_postprocessing, device, options, kwargs
+        )
+        chunk_size = options.n_samples
+        while run.training_set.size < options.sample_budget:
+            n_collected = run.training_set.size
+            blocks = self._design_blocks(
+                inputs, min(chunk_size, options.sample_budget - n_collected), device, options, kwargs
+            )
+            for curr_block, model_out, curr_similarities in evaluator.evaluate(blocks, run):
+                run.add(curr_block, model_out, curr_similarities)
+            if run.training_set.size == n_collected:
+                break
+            if run.monitor is None or run.budget.truncated or run.refit_converged():
+                break
+            chunk_size = options.refit_samples
+
+    def _design_blocks(
+        self,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        n_samples: int,
+        device: torch.device,
+        options: "_SamplingOptions",
+        kwargs: dict,
+    ) -> Iterator[Tensor]:
+        """Yields the blocks of perturbations_per_eval interpretable samples of a chunk of the design.
 
-            with torch.no_grad():
-                r2 = r2_score(
-                    combined_outputs.cpu().numpy(),
-                    self.interpretable_model(combined_interp_inps).cpu().numpy(),
-                )
+        The design of a chunk is drawn at once, so the variance reduced designs cover the whole chunk, except with
+        streaming_fit, which draws every block on its own.
+
+        Args:
+            inputs (Tensor or tuple[Tensor, ...]): The original input.
+            n_samples (int): The number of samples of the chunk.
+            device (torch.device): The device of the inputs.
+            options (_SamplingOptions): The sampling options of the attribution.
+            kwargs (dict): The keyword arguments passed to the sampling function.
+
+        Returns:
+            Iterator[Tensor]: The blocks of interpretable samples, shape at most perturbations_per_eval x
+            num_interp_features.
+        """
+        assert self.batch_perturb_func is not None, "The batched sampling requires a batch_perturb_func"
+        if options.exhaustive:
+            for start in range(0, n_samples, options.perturbations_per_eval):
+                stop = min(start + options.perturbations_per_eval, n_samples)
+                yield enumerate_binary_samples(kwargs["num_interp_features"], device=device, start=start, stop=stop)
+        elif options.streaming_fit:
+            for start in range(0, n_samples, options.perturbations_per_eval):
+                n_block = min(options.perturbations_per_eval, n_samples - start)
+                yield self.batch_perturb_func(inputs, n_samples=n_block, **kwargs).to(device)
+        else:
+            design = self.batch_perturb_func(inputs, n_samples=n_samples, **kwargs).to(device)
+            yield from design.split(options.perturbations_per_eval)
+
+    def _sample_sequential(
+        self,
+        run: "_SamplingRun",
+        inputs: TensorOrTupleOfTensorsGeneric,
+        target: TargetType,
+        additional_forward_args: Any,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]],
+        device: torch.device,
+        **kwargs,
+    ) -> None:
+        """Fills the training set of an attribution with samples drawn one at a time by `perturb_func`, evaluated in
+        batches of perturbations_per_eval samples.
+
+        Args:
+            run (_SamplingRun): The sampling of the attribution.
+            inputs (Tensor or tuple[Tensor, ...]): The original input.
+            target (TargetType): The target of the attribution.
+            additional_forward_args (Any): The additional forward arguments.
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+            device (torch.device): The device of the inputs.
+            **kwargs: The keyword arguments passed to the sampling, transformation and similarity functions.
+        """
+        options = run.options
+        state = _BatchEvaluationState(target, additional_forward_args)
+        perturb_generator = (
+            self.perturb_func(inputs, **kwargs) if inspect.isgeneratorfunction(self.perturb_func) else None
+        )
+        batch: List[_PerturbedSample] = []
+        for sample_idx in range(options.sample_budget):
+            if not batch and run.exhausted():
+                break
+            if perturb_generator:
+                try:
+                    curr_sample = next(perturb_generator)
+                except StopIteration:
+                    warnings.warn("Generator completed prior to given n_samples iterations!")
+                    break
+            else:
+                curr_sample = self.perturb_func(inputs, **kwargs)
+            batch.append(self._perturbed_sample(curr_sample, inputs, device, **kwargs))
+            if len(batch) == options.perturbations_per_eval or sample_idx + 1 == options.n_samples:
+                self._evaluate_sequential_batch(batch, run, state, device, model_postprocessing)
+                batch = []
+                size = run.training_set.size
+                if (
+                    run.monitor is not None
+                    and size >= options.n_samples
+                    and (size - options.n_samples) % options.refit_samples == 0
+                    and run.refit_converged()
+                ):
+                    break
+        if batch:
+            self._evaluate_sequential_batch(batch, run, state, device, model_postprocessing)
+
+    def _perturbed_sample(
+        self, curr_sample: Any, inputs: TensorOrTupleOfTensorsGeneric, device: torch.device, **kwargs
+    ) -> "_PerturbedSample":
+        """Builds the model input, the interpretable representation, the mask and the similarity of a sample.
+
+        Args:
+            curr_sample (Any): The sample drawn by `perturb_func`, in the interpretable or the input space.
+            inputs (Tensor or tuple[Tensor, ...]): The original input.
+            device (torch.device): The device of the inputs.
+            **kwargs: The keyword arguments passed to the transformation and similarity functions.
+
+        Returns:
+            _PerturbedSample: The model input, the interpretable representation, the mask and the similarity of the sample.
+
+        Raises:
+            ValueError: If neither transformation between the spaces is provided.
+        """
+        mask_inp = get_mask_from_interp_rep_transform(curr_sample, **kwargs)
+        if self.perturb_interpretable_space and self.from_interp_rep_transform is not None:
+            interpretable_inp = curr_sample
+            model_input = self.from_interp_rep_transform(curr_sample, inputs, **kwargs)
+        elif self.to_interp_rep_transform is not None:
+            model_input = curr_sample
+            interpretable_inp = self.to_interp_rep_transform(curr_sample, inputs, **kwargs)
+        else:
+            raise ValueError("Must provide either `to_interp_rep_transform` or `from_interp_rep_transform`")
+        similarity = self.similarity_func(inputs, model_input, interpretable_inp, **kwargs)
+        return _PerturbedSample(model_input, interpretable_inp, mask_inp, _format_similarity(similarity, device))
+
+    def _evaluate_sequential_batch(
+        self,
+        batch: List["_PerturbedSample"],
+        run: "_SamplingRun",
+        state: "_BatchEvaluationState",
+        device: torch.device,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]],
+    ) -> None:
+        """Evaluates the model on a batch of samples built by `_perturbed_sample` and adds them to the training set.
+
+        Args:
+            batch (List[_PerturbedSample]): The samples of the batch.
+            run (_SamplingRun): The sampling of the attribution.
+            state (_BatchEvaluationState): The state holding the expanded target and additional forward arguments.
+            device (torch.device): The device of the inputs.
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+        """
+        model_inputs, interpretable_inps, mask_inps, similarities = zip(*batch)
+        expanded_target, expanded_additional_args = state.expanded(len(batch))
+        model_out = self._evaluate_batch(
+            list(model_inputs), expanded_target, expanded_additional_args, device, model_postprocessing, list(mask_inps)
+        )
+        run.budget.forward_calls += 1
+        run.add(torch.cat(interpretable_inps), model_out, torch.cat(similarities))
+
+    def _training_data(
+        self, training_set: Union["_LimeTrainingSet", "_LimeStreamingStatistics"], feature_mask: Any
+    ) -> "LimeTrainingData":
+        """Packs the training set of an attribution to be kept in its sampling info, with an unfitted copy of the
+        interpretable model and the feature mask needed to refit it.
+
+        Args:
+            training_set (_LimeTrainingSet or _LimeStreamingStatistics): The training set, not streamed.
+            feature_mask (Any): The feature mask of the attribution, kept only if it is a single tensor.
+
+        Returns:
+            LimeTrainingData: The packed training set.
+        """
+        assert isinstance(training_set, _LimeTrainingSet), "The streamed training set cannot be kept"
+        similarity_func = (
+            self.batch_similarity_func
+            if self._batched_sampling and self.batch_similarity_func is not None
+            else self.similarity_func
+        )
+        samples, outputs, similarities = training_set.tensors()
+        return LimeTrainingData.from_samples(
+            samples,
+            outputs,
+            similarities,
+            kernel_width=(
+                similarity_func.kernel_width
+                if isinstance(similarity_func, (_ExpKernelSimilarity, _ExpKernelBatchSimilarity))
+                else None
+            ),
+            interpretable_model=_clone_interpretable_model(self.interpretable_model),
+            feature_mask=feature_mask if isinstance(feature_mask, Tensor) else None,
+        )
+
+    def _prepare_interpretable_block(
+        self,
+        curr_block: Tensor,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        state: "_BatchEvaluationState",
+        device: torch.device,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        **kwargs,
+    ) -> "_PreparedBlock":
+        """Transforms a block of interpretable samples into model inputs and computes the similarities of the samples,
+        everything but the forward call of the model.
+
+        Args:
+            curr_block (Tensor): The interpretable samples, shape batch_size x num_interp_features.
+            inputs (Tensor or tuple[Tensor, ...]): The original input.
+            state (_BatchEvaluationState): The state whose buffer the perturbed inputs are written into.
+            device (torch.device): The device of the inputs.
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+            **kwargs: The keyword arguments passed to the transformation and similarity functions.
+
+        Returns:
+            _PreparedBlock: The perturbed inputs, their masks and the similarities of the samples.
+        """
+        # Perturbed inputs are written into a single buffer reused across all the batches
+        curr_model_inputs, curr_mask_inps = self._block_model_inputs(
+            curr_block, inputs, state.narrow_buffer(len(curr_block)), model_postprocessing, **kwargs
+        )
+        state.keep_buffer(curr_model_inputs, len(curr_block))
+        similarities = self._block_similarities(inputs, curr_model_inputs, curr_block, device, **kwargs)
+        return _PreparedBlock(curr_model_inputs, curr_mask_inps, similarities, len(curr_block))
+
+    def _forward_prepared_block(
+        self,
+        prepared: "_PreparedBlock",
+        state: "_BatchEvaluationState",
+        device: torch.device,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        forward_func: Optional[Callable] = None,
+    ) -> Union[Tensor, Future[Tensor]]:
+        """Calls the model on a prepared block of perturbed inputs, without waiting for a future output.
+
+        Args:
+            prepared (_PreparedBlock): The prepared block.
+            state (_BatchEvaluationState): The state holding the expanded target and additional forward arguments.
+            device (torch.device): The device of the inputs.
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+            forward_func (Callable, optional): The forward function evaluating the block, see `_dispatch_model_inputs`.
+
+        Returns:
+            Tensor or Future[Tensor]: The raw model output of the samples, see `_collect_model_output`.
+        """
+        expanded_target, expanded_additional_args = state.expanded(prepared.n_perturbations)
+        return self._dispatch_model_inputs(
+            prepared.model_inputs,
+            expanded_target,
+            expanded_additional_args,
+            model_postprocessing,
+            prepared.mask_inps,
+            forward_func,
+        )
+
+    def _block_model_inputs(
+        self,
+        curr_block: Tensor,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        out: Optional[TensorOrTupleOfTensorsGeneric] = None,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        **kwargs,
+    ) -> Tuple[TensorOrTupleOfTensorsGeneric, Optional[TensorOrTupleOfTensorsGeneric]]:
+        """Transforms a block of interpretable samples into the perturbed model inputs.
+
+        Args:
+            curr_block (Tensor): The interpretable samples, shape batch_size x num_interp_features.
+            inputs (Tensor or tuple[Tensor, ...]): The original input.
+            out (Tensor or tuple[Tensor, ...], optional): The buffer the batched transformation writes into.
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+            **kwargs: The keyword arguments passed to the transformation functions.
 
-            return self.interpretable_model.get_representation(), torch.tensor(r2) if isinstance(
-                r2, float
-            ) else torch.from_numpy(r2)
+        Returns:
+            Tuple: The perturbed inputs concatenated along the first dimension and their binary masks, None if the
+            batched transformation is used without postprocessing.
+        """
+        if self.batch_from_interp_rep_transform is not None:
+            curr_model_inputs = self.batch_from_interp_rep_transform(curr_block, inputs, out=out, **kwargs)
+            curr_mask_inps = (
+                get_batch_mask_from_interp_rep_transform(curr_block, **kwargs)
+                if model_postprocessing is not None
+                else None
+            )
+            return curr_model_inputs, curr_mask_inps
+        curr_samples = [sample.unsqueeze(0) for sample in curr_block]
+        curr_model_inputs = _reduce_list(
+            [
+                self.from_interp_rep_transform(curr_sample, inputs, **kwargs)  # type: ignore
+                for curr_sample in curr_samples
+            ]
+        )
+        curr_mask_inps = _reduce_list(
+            [get_mask_from_interp_rep_transform(curr_sample, **kwargs) for curr_sample in curr_samples]
+        )
+        return curr_model_inputs, curr_mask_inps
+
+    def _block_similarities(
+        self,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        curr_model_inputs: TensorOrTupleOfTensorsGeneric,
+        curr_block: Tensor,
+        device: torch.device,
+        **kwargs,
+    ) -> Tensor:
+        """Computes the similarities of a block of interpretable samples to the original input.
+
+        Args:
+            inputs (Tensor or tuple[Tensor, ...]): The original input.
+            curr_model_inputs (Tensor or tuple[Tensor, ...]): The perturbed inputs of the samples.
+            curr_block (Tensor): The interpretable samples, shape batch_size x num_interp_features.
+            device (torch.device): The device of the inputs.
+            **kwargs: The keyword arguments passed to the similarity functions.
+
+        Returns:
+            Tensor: The similarities of the samples, shape batch_size.
+        """
+        return _block_similarities(
+            self.similarity_func, self.batch_similarity_func, inputs, curr_model_inputs, curr_block, device, **kwargs
+        )
+
+    def _fit_interpretable_model(
+        self,
+        training_set: Union["_LimeTrainingSet", "_LimeStreamingStatistics"],
+        device: torch.device,
+        interpretable_model: InterpretableModel,
+    ) -> Tuple[Tensor, Tensor, int]:
+        """Fits the interpretable model to the training set collected so far.
+
+        Args:
+            training_set (_LimeTrainingSet or _LimeStreamingStatistics): The samples or their sufficient statistics.
+            device (torch.device): The device of the inputs.
+            interpretable_model (InterpretableModel): The copy of the interpretable model owned by the attribution.
+
+        Returns:
+            Tuple[Tensor, Tensor, int]: The representation of the interpretable model, its R^2 score and the number
+            of samples it was fitted to.
+        """
+        if isinstance(training_set, _LimeStreamingStatistics):
+            interpretable_model.fit_statistics(training_set.weighted)  # type: ignore
+            if hasattr(interpretable_model, "to"):
+                interpretable_model.to(device)
+            r2 = training_set.unweighted.r2_score(
+                interpretable_model.get_representation(),
+                interpretable_model.bias(),  # type: ignore
+            )
+        else:
+            combined_interp_inps, combined_outputs, combined_sim = training_set.tensors()
+            if combined_outputs.dim() > 1:
+                # Multiple targets share the samples, one interpretable model is fitted per column of the outputs
+                fits = [
+                    _fit_surrogate(interpretable_model, combined_interp_inps, target_outputs, combined_sim, device)
+                    for target_outputs in combined_outputs.T
+                ]
+                representations = torch.stack([representation for representation, _ in fits])
+                r2s = torch.stack([torch.as_tensor(r2) for _, r2 in fits])
+                return representations.reshape(len(fits), -1), r2s, training_set.size
+            return (
+                *_fit_surrogate(interpretable_model, combined_interp_inps, combined_outputs, combined_sim, device),
+                training_set.size,
+            )
+
+        return interpretable_model.get_representation(), r2, training_set.size
 
     def _evaluate_batch(
         self,
@@ -564,37 +1317,132 @@ class LimeBase(PerturbationAttribution):
         Returns:
             Tensor: The output of the model evaluated on the batch of perturbed inputs.
         """
-        model_out = _run_forward(
-            self.forward_func,
+        return self._evaluate_model_inputs(
             _reduce_list(curr_model_inputs),
+            len(curr_model_inputs),
             expanded_target,
             expanded_additional_args,
+            device,
             model_postprocessing,
             _reduce_list(mask_inps) if mask_inps is not None else None,
         )
-        if not isinstance(model_out, Tensor):
-            model_out = torch.tensor([model_out], device=device)
 
-        if isinstance(model_out, Tensor) and model_out.numel() == len(curr_model_inputs):
-            return model_out.flatten()
-
-        raise ValueError(
-            "Model output must be a tensor with the same number of elements as the number of perturbations."
-        )
+    def _evaluate_model_inputs(
+        self,
+        model_inputs: TensorOrTupleOfTensorsGeneric,
+        n_perturbations: int,
+        expanded_target: TargetType,
+        expanded_additional_args: Any,
+        device: torch.device,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        mask_inps: Optional[TensorOrTupleOfTensorsGeneric] = None,
+        output_columns: Union[None, List[int], slice] = None,
+    ) -> Tensor:
+        """This method evaluates the model on perturbed inputs already concatenated into a single batch.
 
-    def has_convergence_delta(self) -> bool:
-        """Check if the object has a convergence delta.
+        Args:
+            model_inputs (TensorOrTupleOfTensorsGeneric): The batch of perturbed inputs.
+            n_perturbations (int): The number of perturbations contained in the batch.
+            expanded_target (TargetType): Target index or indices for which the model is evaluated.
+            expanded_additional_args (Any): additional arguments to be passed to the forward function.
+            device (torch.device): The device on which the model is evaluated.
+            model_postprocessing (Optional[Callable[[Tensor, Tensor], Tensor]]):
+                Postprocessing to be applied to the model output.
+            mask_inps (TensorOrTupleOfTensorsGeneric, optional): The batch of binary masks used to perturb the inputs.
+            output_columns (list[int] or slice, optional): The columns of the model output kept for the attribution
+                of multiple targets, in which case the output has shape n_perturbations x num_targets.
 
         Returns:
-            bool: True if the object has a convergence delta, False otherwise.
+            Tensor: The output of the model evaluated on the batch of perturbed inputs.
         """
-        return False
-
-    @property
-    def multiplies_by_inputs(self):
-        """Returns False.
+        model_out = self._dispatch_model_inputs(
+            model_inputs, expanded_target, expanded_additional_args, model_postprocessing, mask_inps
+        )
+        return self._collect_model_output(model_out, n_perturbations, device, output_columns)
 
-        This method multiplies the inputs by a factor and returns the result.
+    def _dispatch_model_inputs(
+        self,
+        model_inputs: TensorOrTupleOfTensorsGeneric,
+        expanded_target: TargetType,
+        expanded_additional_args: Any,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        mask_inps: Optional[TensorOrTupleOfTensorsGeneric] = None,
+        forward_func: Optional[Callable] = None,
+    ) -> Union[Tensor, Future[Tensor]]:
+        """This method calls the model on a batch of perturbed inputs, returning a future output as it is.
+
+        Args:
+            model_inputs (TensorOrTupleOfTensorsGeneric): The batch of perturbed inputs.
+            expanded_target (TargetType): Target index or indices for which the model is evaluated.
+            expanded_additional_args (Any): additional arguments to be passed to the forward function.
+            model_postprocessing (Optional[Callable[[Tensor, Tensor], Tensor]]):
+                Postprocessing to be applied to the model output.
+            mask_inps (TensorOrTupleOfTensorsGeneric, optional): The batch of binary masks used to perturb the inputs.
+            forward_func (Callable, optional): The forward function called instead of the one of the explainer, taking
+                the same arguments, e.g. the one returned by `ForwardCache.keyed` for the samples of the batch.
+
+        Returns:
+            Tensor or Future[Tensor]: The output of the model, a future if the forward function returns one.
+        """
+        if self._forward_takes_inputs is None:
+            self._forward_takes_inputs = len(signature(self.forward_func).parameters) > 0
+        return _run_forward(
+            forward_func if forward_func is not None else self.forward_func,
+            model_inputs,
+            expanded_target,
+            expanded_additional_args,
+            model_postprocessing,
+            mask_inps,
+            self._forward_takes_inputs,
+        )
+
+    def _collect_model_output(
+        self,
+        model_out: Union[Tensor, Future[Tensor]],
+        n_perturbations: int,
+        device: torch.device,
+        output_columns: Union[None, List[int], slice] = None,
+    ) -> Tensor:
+        """This method waits for the output of a dispatched batch and reshapes it to one value per perturbation.
+
+        Args:
+            model_out (Tensor or Future[Tensor]): The output returned by `_dispatch_model_inputs`.
+            n_perturbations (int): The number of perturbations contained in the batch.
+            device (torch.device): The device on which the model is evaluated.
+            output_columns (list[int] or slice, optional): The columns of the model output kept for the attribution
+                of multiple targets, in which case the output has shape n_perturbations x num_targets.
+
+        Returns:
+            Tensor: The output of the model evaluated on the batch of perturbed inputs.
+        """
+        if isinstance(model_out, torch._C.Future):
+            model_out = model_out.wait()
+        if not isinstance(model_out, Tensor):
+            model_out = torch.tensor([model_out], device=device)
+
+        if output_columns is not None and model_out.numel() % n_perturbations == 0:
+            return model_out.reshape(n_perturbations, -1)[:, output_columns]
+
+        if isinstance(model_out, Tensor) and model_out.numel() == n_perturbations:
+            return model_out.flatten()
+
+        raise ValueError(
+            "Model output must be a tensor with the same number of elements as the number of perturbations."
+        )
+
+    def has_convergence_delta(self) -> bool:
+        """Check if the object has a convergence delta.
+
+        Returns:
+            bool: True if the object has a convergence delta, False otherwise.
+        """
+        return False
+
+    @property
+    def multiplies_by_inputs(self):
+        """Returns False.
+
+        This method multiplies the inputs by a factor and returns the result.
 
         Returns:
             bool: False.
@@ -602,8 +1450,953 @@ class LimeBase(PerturbationAttribution):
         return False
 
 
+class _LimeTrainingSet:
+    """Training set of the interpretable model, written in place into tensors preallocated for all the samples.
+
+    Since the number of samples is known before sampling starts, the interpretable inputs, model outputs and
+    similarities of every evaluated batch are copied straight into their final place, instead of being collected in
+    lists and concatenated at the end, which would hold two copies of the training set at once.
+
+    Args:
+        capacity (int): The maximum number of samples in the training set.
+        device (torch.device): The device the training set is stored on.
+    """
+
+    def __init__(self, capacity: int, device: torch.device) -> None:
+        self.capacity = capacity
+        self.device = device
+        self.size = 0
+        self.interpretable_inps: Optional[Tensor] = None
+        self.outputs: Optional[Tensor] = None
+        self.similarities: Optional[Tensor] = None
+
+    def add(self, interpretable_inps: Tensor, outputs: Tensor, similarities: Tensor) -> None:
+        """Writes a batch of samples into the training set.
+
+        Args:
+            interpretable_inps (Tensor): Interpretable representation of the samples, shape batch_size x num_interp_features.
+            outputs (Tensor): Model outputs for the samples, shape batch_size.
+            similarities (Tensor): Similarities of the samples to the original input, shape batch_size.
+        """
+        if self.interpretable_inps is None or self.outputs is None or self.similarities is None:
+            self.interpretable_inps = torch.empty(
+                (self.capacity, *interpretable_inps.shape[1:]), dtype=torch.float, device=self.device
+            )
+            self.outputs = torch.empty((self.capacity, *outputs.shape[1:]), dtype=torch.float, device=self.device)
+            self.similarities = torch.empty(self.capacity, dtype=torch.float, device=self.device)
+        end = self.size + len(interpretable_inps)
+        if end > self.capacity:
+            self._grow(max(end, 2 * self.capacity))
+        self.interpretable_inps[self.size : end] = interpretable_inps
+        self.outputs[self.size : end] = outputs
+        self.similarities[self.size : end] = similarities.flatten()
+        self.size = end
+
+    def _grow(self, capacity: int) -> None:
+        """Reallocates the training set for a larger number of samples, used when adaptive sampling exceeds the
+        minimum number of samples the training set was allocated for.
+
+        Args:
+            capacity (int): The new maximum number of samples in the training set.
+        """
+        assert self.interpretable_inps is not None and self.outputs is not None and self.similarities is not None
+        grown = []
+        for tensor in (self.interpretable_inps, self.outputs, self.similarities):
+            grown_tensor = torch.empty((capacity, *tensor.shape[1:]), dtype=tensor.dtype, device=tensor.device)
+            grown_tensor[: self.size] = tensor[: self.size]
+            grown.append(grown_tensor)
+        self.interpretable_inps, self.outputs, self.similarities = grown
+        self.capacity = capacity
+
+    def tensors(self) -> Tuple[Tensor, Tensor, Tensor]:
+        """Returns the interpretable inputs, model outputs and similarities written so far, without copying them.
+
+        Returns:
+            Tuple[Tensor, Tensor, Tensor]: The interpretable inputs, model outputs and similarities.
+        """
+        assert (
+            self.interpretable_inps is not None and self.outputs is not None and self.similarities is not None
+        ), "No samples were collected to train the interpretable model"
+        return (
+            self.interpretable_inps[: self.size],
+            self.outputs[: self.size],
+            self.similarities[: self.size],
+        )
+
+
+class _LimeStreamingStatistics:
+    """Sufficient statistics of the training set of a linear interpretable model, updated batch by batch.
+
+    The samples of every evaluated batch are reduced to the weighted statistics used to fit the model and the
+    unweighted statistics used to compute its R^2 score, and then discarded, so the memory is O(num_interp_features^2)
+    regardless of the number of samples.
+
+    Args:
+        device (torch.device): The device the statistics are stored on.
+    """
+
+    def __init__(self, device: torch.device) -> None:
+        self.weighted = LinearModelStatistics(device)
+        self.unweighted = LinearModelStatistics(device)
+
+    @property
+    def size(self) -> int:
+        """The number of samples added to the statistics."""
+        return self.weighted.n_samples
+
+    def add(self, interpretable_inps: Tensor, outputs: Tensor, similarities: Tensor) -> None:
+        """Adds a batch of samples to the statistics.
+
+        Args:
+            interpretable_inps (Tensor): Interpretable representation of the samples, shape batch_size x num_interp_features.
+            outputs (Tensor): Model outputs for the samples, shape batch_size.
+            similarities (Tensor): Similarities of the samples to the original input, shape batch_size.
+        """
+        self.weighted.update(interpretable_inps, outputs, similarities.flatten())
+        self.unweighted.update(interpretable_inps, outputs)
+
+
+class _BatchEvaluationState:
+    """State reused across the batches evaluated by one attribution.
+
+    It holds the buffer the perturbed inputs are written into, allocated once for the largest batch, and the target and
+    additional forward arguments expanded to the size of the last batch.
+
+    Args:
+        target (TargetType): The target of the attribution.
+        additional_forward_args (Any): The additional forward arguments of the attribution.
+        output_columns (list[int] or slice, optional): The columns of the model output kept for the attribution of
+            multiple targets. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        target: TargetType,
+        additional_forward_args: Any,
+        output_columns: Union[None, List[int], slice] = None,
+    ) -> None:
+        self.target = target
+        self.additional_forward_args = additional_forward_args
+        self.output_columns = output_columns
+        self.buffer: Optional[TensorOrTupleOfTensorsGeneric] = None
+        self.buffer_capacity = 0
+        self.expanded_size: Optional[int] = None
+        self.expanded_target: TargetType = None
+        self.expanded_additional_args: Any = None
+
+    def narrow_buffer(self, n_perturbations: int) -> Optional[TensorOrTupleOfTensorsGeneric]:
+        """Returns the buffer narrowed to `n_perturbations` perturbations, see `_narrow_perturbation_buffer`."""
+        return _narrow_perturbation_buffer(self.buffer, n_perturbations, self.buffer_capacity)
+
+    def keep_buffer(self, model_inputs: TensorOrTupleOfTensorsGeneric, n_perturbations: int) -> None:
+        """Keeps the perturbed inputs of a batch as the buffer if they hold more perturbations than the current one."""
+        if n_perturbations > self.buffer_capacity:
+            self.buffer, self.buffer_capacity = model_inputs, n_perturbations
+
+    def expanded(self, n_perturbations: int) -> Tuple[TargetType, Any]:
+        """Returns the target and additional forward arguments expanded to a batch of `n_perturbations` perturbations."""
+        if n_perturbations != self.expanded_size:
+            self.expanded_target = _expand_target(self.target, n_perturbations)
+            self.expanded_additional_args = _expand_additional_forward_args(
+                self.additional_forward_args, n_perturbations
+            )
+            self.expanded_size = n_perturbations
+        return self.expanded_target, self.expanded_additional_args
+
+
+def _pack_binary_samples(samples: Tensor) -> List[Tuple[int, ...]]:
+    """Packs binary interpretable samples into hashable keys, 63 features per integer.
+
+    Args:
+        samples (Tensor): The binary samples, shape batch_size x num_interp_features.
+
+    Returns:
+        List[Tuple[int, ...]]: The key of every sample.
+
+    Raises:
+        ValueError: If the samples are not binary.
+    """
+    if not bool(((samples == 0) | (samples == 1)).all()):
+        raise ValueError("Deduplication of samples requires binary interpretable samples.")
+    n_words = math.ceil(samples.shape[1] / 63)
+    padded = torch.zeros((samples.shape[0], n_words * 63), dtype=torch.long, device=samples.device)
+    padded[:, : samples.shape[1]] = samples
+    powers = 2 ** torch.arange(63, dtype=torch.long, device=samples.device)
+    words = (padded.view(samples.shape[0], n_words, 63) * powers).sum(dim=2)
+    return [tuple(row) for row in words.tolist()]
+
+
+class _PreparedBlock(NamedTuple):
+    """A block of perturbed inputs ready for the forward call of the model.
+
+    Attributes:
+        model_inputs (Tensor or tuple[Tensor, ...]): The perturbed inputs concatenated along the first dimension.
+        mask_inps (Tensor or tuple[Tensor, ...], optional): The binary masks of the perturbed inputs.
+        similarities (Tensor): The similarities of the samples to the original input.
+        n_perturbations (int): The number of samples of the block.
+    """
+
+    model_inputs: Any
+    mask_inps: Any
+    similarities: Tensor
+    n_perturbations: int
+
+
+class _BlockPipeline:
+    """Producer thread building the blocks of a design ahead of their evaluation by the model.
+
+    The producer takes a free state from the pool, builds the perturbed inputs and similarities of the next block into
+    its buffer and queues the prepared block. The consumer iterating the pipeline evaluates the block and then releases
+    the state, so the pool size bounds the number of blocks built ahead. Leaving the iteration early stops the producer.
+
+    Args:
+        prepare_block (Callable[[Tensor, _BatchEvaluationState], _PreparedBlock]): Builds a block into a state.
+        blocks (Iterable[Tensor]): The blocks of interpretable samples.
+        states (List[_BatchEvaluationState]): The pool of states, one more than the number of blocks built ahead.
+    """
+
+    def __init__(
+        self,
+        prepare_block: Callable[[Tensor, "_BatchEvaluationState"], _PreparedBlock],
+        blocks: Iterable[Tensor],
+        states: List["_BatchEvaluationState"],
+    ) -> None:
+        self.prepare_block = prepare_block
+        self.blocks = blocks
+        self.free: queue.Queue = queue.Queue()
+        for state in states:
+            self.free.put(state)
+        self.ready: queue.Queue = queue.Queue()
+        self.stopped = threading.Event()
+
+    def _produce(self) -> None:
+        """Builds the blocks in the producer thread, the last item queued is None or the raised exception."""
+        try:
+            # Gradient mode is thread local
+            with torch.no_grad():
+                for block in self.blocks:
+                    state = self.free.get()
+                    if state is None or self.stopped.is_set():
+                        return
+                    self.ready.put((block, state, self.prepare_block(block, state)))
+        except BaseException as error:  # noqa: B036
+            self.ready.put(error)
+            return
+        self.ready.put(None)
+
+    def __iter__(self) -> Iterator[Tuple[Tensor, "_BatchEvaluationState", _PreparedBlock]]:
+        producer = threading.Thread(target=self._produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = self.ready.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.stopped.set()
+            self.free.put(None)
+            producer.join()
+
+    def release(self, state: "_BatchEvaluationState") -> None:
+        """Returns the state of an evaluated block to the pool."""
+        self.free.put(state)
+
+
+class _PerturbationMemo:
+    """Memo of the model outputs and similarities of the binary interpretable samples of one attribution.
+
+    Repeated samples are looked up by their packed bits instead of being evaluated again. They are still added to the
+    training set, so they keep their weight in the fit of the interpretable model.
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict = {}
+
+    def evaluate(
+        self, curr_block: Tensor, evaluate_block: Callable[[Tensor], Tuple[Tensor, Tensor]]
+    ) -> Tuple[Tensor, Tensor, int]:
+        """Returns the model outputs and similarities of a block of samples, evaluating only the ones not seen yet.
+
+        Args:
+            curr_block (Tensor): The binary samples, shape batch_size x num_interp_features.
+            evaluate_block (Callable[[Tensor], Tuple[Tensor, Tensor]]): Evaluates the model outputs and similarities of
+                a block of samples.
+
+        Returns:
+            Tuple[Tensor, Tensor, int]: The model outputs and similarities of all the samples and the number of samples
+            that were evaluated.
+        """
+        keys = _pack_binary_samples(curr_block)
+        new_rows = []
+        new_keys = set()
+        for row, key in enumerate(keys):
+            if key not in self.entries and key not in new_keys:
+                new_rows.append(row)
+                new_keys.add(key)
+        if new_rows:
+            outputs, similarities = evaluate_block(curr_block[new_rows])
+            for row, output, similarity in zip(new_rows, outputs, similarities):
+                self.entries[keys[row]] = (output, similarity)
+        outputs = torch.stack([self.entries[key][0] for key in keys])
+        similarities = torch.stack([self.entries[key][1] for key in keys])
+        return outputs, similarities, len(new_rows)
+
+
+class _SamplingBudget:
+    """Wall-clock and forward-pass budget of the sampling loop.
+
+    Args:
+        time_budget (float, optional): The time budget in seconds, counted from the creation of the budget.
+        max_forward_calls (int, optional): The maximum number of forward calls.
+
+    Raises:
+        ValueError: If the time budget is not positive or the maximum number of forward calls is smaller than 1.
+    """
+
+    def __init__(self, time_budget: Optional[float], max_forward_calls: Optional[int]) -> None:
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError("time_budget must be positive")
+        if max_forward_calls is not None and max_forward_calls < 1:
+            raise ValueError("max_forward_calls must be a positive integer")
+        self.deadline = time.monotonic() + time_budget if time_budget is not None else None
+        self.max_forward_calls = max_forward_calls
+        self.forward_calls = 0
+        self.truncated = False
+
+    def exhausted(self) -> bool:
+        """Checks whether the budget is exhausted, in which case the sampling is marked as truncated.
+
+        Returns:
+            bool: Whether no further batch should be evaluated.
+        """
+        if (self.max_forward_calls is not None and self.forward_calls >= self.max_forward_calls) or (
+            self.deadline is not None and time.monotonic() >= self.deadline
+        ):
+            self.truncated = True
+        return self.truncated
+
+
+class _ConvergenceMonitor:
+    """Convergence check of adaptive sampling, comparing the coefficients of consecutive refits of the interpretable
+    model.
+
+    Args:
+        tolerance (float): The tolerance of the check.
+        criterion (str): Either "values", the coefficients converged if none of them changed by more than `tolerance`
+            times the largest absolute coefficient, or "ranking", the coefficients converged if their Spearman
+            correlation with the previous ones is at least 1 - `tolerance`.
+
+    Raises:
+        ValueError: If the criterion is neither "values" nor "ranking".
+    """
+
+    def __init__(self, tolerance: float, criterion: str) -> None:
+        if criterion not in ("values", "ranking"):
+            raise ValueError("convergence_criterion must be either values or ranking.")
+        self.tolerance = tolerance
+        self.criterion = criterion
+        self.previous: Optional[Tensor] = None
+        self.converged = False
+
+    def update(self, coefs: Tensor) -> bool:
+        """Compares the coefficients of a refit with the previous ones.
+
+        Args:
+            coefs (Tensor): The coefficients of the interpretable model.
+
+        Returns:
+            bool: Whether the coefficients converged.
+        """
+        coefs = coefs.detach().flatten().double()
+        if self.previous is not None:
+            if self.criterion == "values":
+                change = (coefs - self.previous).abs().max()
+                self.converged = bool(change <= self.tolerance * coefs.abs().max())
+            else:
+                self.converged = bool(_spearman_correlation(coefs, self.previous) >= 1 - self.tolerance)
+        self.previous = coefs
+        return self.converged
+
+
+class _SamplingOptions(NamedTuple):
+    """The sampling options of one call of `LimeBase.attribute`, see its arguments."""
+
+    n_samples: int = 50
+    perturbations_per_eval: int = 1
+    streaming_fit: bool = False
+    max_samples: Optional[int] = None
+    refit_every: int = 1
+    convergence_tol: float = 0.01
+    convergence_criterion: str = "values"
+    time_budget: Optional[float] = None
+    max_forward_calls: Optional[int] = None
+    deduplicate_samples: bool = False
+    exhaustive: bool = False
+    targets: Union[None, List[int], str] = None
+    pipeline_depth: int = 0
+    futures_in_flight: int = 1
+    keep_training_set: bool = False
+
+    @property
+    def sample_budget(self) -> int:
+        """The maximum number of samples of the attribution."""
+        return self.n_samples if self.max_samples is None else self.max_samples
+
+    @property
+    def refit_samples(self) -> int:
+        """The number of samples between the convergence checks of adaptive sampling, the first one is at n_samples."""
+        return self.refit_every * self.perturbations_per_eval
+
+    @property
+    def output_columns(self) -> Union[None, List[int], slice]:
+        """The columns of the model output kept for the attribution of multiple targets."""
+        return slice(None) if isinstance(self.targets, str) else self.targets
+
+    def enabled(self, name: str) -> bool:
+        """Whether the option `name` differs from its default."""
+        return getattr(self, name) != self._field_defaults[name]
+
+    def validate(self, lime: "LimeBase", target: TargetType, kwargs: dict) -> "_SamplingOptions":
+        """Checks the options against each other and the explainer.
+
+        Args:
+            lime (LimeBase): The explainer the options are passed to.
+            target (TargetType): The target of the attribution.
+            kwargs (dict): The keyword arguments of the attribution.
+
+        Returns:
+            _SamplingOptions: The options, with n_samples set to the number of binary samples for exhaustive sampling.
+
+        Raises:
+            ValueError: If the options are invalid or incompatible with each other or the explainer.
+        """
+        if self.streaming_fit and not hasattr(lime.interpretable_model, "fit_statistics"):
+            raise ValueError(
+                "Streaming fit requires an interpretable model with a `fit_statistics` method, e.g. TorchRidge or TorchLasso"
+            )
+        if self.max_samples is not None and self.max_samples < self.n_samples:
+            raise ValueError("max_samples must be greater than or equal to n_samples")
+        if self.refit_every < 1:
+            raise ValueError("refit_every must be a positive integer")
+        if self.pipeline_depth < 0:
+            raise ValueError("pipeline_depth must be a non-negative integer")
+        if self.futures_in_flight < 1:
+            raise ValueError("futures_in_flight must be a positive integer")
+        if not lime._batched_sampling:
+            for name in _BATCHED_OPTIONS:
+                if self.enabled(name):
+                    raise ValueError(
+                        f"{name} requires the batched sampling in the interpretable space, i.e. a `batch_perturb_func`"
+                    )
+        for first, second in _INCOMPATIBLE_OPTIONS:
+            if self.enabled(first) and self.enabled(second):
+                raise ValueError(f"{first} is incompatible with {second}")
+        if lime.forward_pool is not None and (
+            not lime._batched_sampling or lime.batch_from_interp_rep_transform is None
+        ):
+            raise ValueError(
+                "Evaluation in a forward pool requires the batched sampling and transformation in the interpretable space"
+            )
+        if lime.forward_pool is not None and self.pipeline_depth > 0:
+            raise ValueError(
+                "pipeline_depth is incompatible with a forward pool, whose workers build the perturbed inputs"
+            )
+        if self.targets is not None:
+            if target is not None:
+                raise ValueError("Only one of target and targets can be provided")
+            if isinstance(self.targets, str) and self.targets != "all":
+                raise ValueError(f"targets must be a list of output indices or 'all', got {self.targets}")
+        if not self.exhaustive:
+            return self
+        if "num_interp_features" not in kwargs:
+            raise ValueError("Exhaustive sampling requires `num_interp_features` in kwargs")
+        if kwargs["num_interp_features"] > MAX_EXHAUSTIVE_FEATURES:
+            raise ValueError(
+                f"Exhaustive sampling supports at most {MAX_EXHAUSTIVE_FEATURES} interpretable features, "
+                f"got {kwargs['num_interp_features']}"
+            )
+        return self._replace(n_samples=2 ** kwargs["num_interp_features"])
+
+
+class _SamplingRun:
+    """The state of the sampling of one attribution: the training set, the budget, the convergence check of adaptive
+    sampling and the last fit of the interpretable model.
+
+    Args:
+        options (_SamplingOptions): The validated sampling options.
+        device (torch.device): The device the training set is stored on.
+        fit (Callable): Fits the interpretable model to a training set, see `LimeBase._fit_interpretable_model`.
+        progress_desc (str, optional): The description of the progress bar, None to show no progress.
+    """
+
+    def __init__(
+        self,
+        options: _SamplingOptions,
+        device: torch.device,
+        fit: Callable[[Union["_LimeTrainingSet", "_LimeStreamingStatistics"]], Tuple[Tensor, Tensor, int]],
+        progress_desc: Optional[str] = None,
+    ) -> None:
+        self.options = options
+        self.training_set: Union[_LimeTrainingSet, _LimeStreamingStatistics] = (
+            _LimeStreamingStatistics(device) if options.streaming_fit else _LimeTrainingSet(options.n_samples, device)
+        )
+        self.budget = _SamplingBudget(options.time_budget, options.max_forward_calls)
+        self.monitor = (
+            _ConvergenceMonitor(options.convergence_tol, options.convergence_criterion)
+            if options.max_samples is not None
+            else None
+        )
+        self.fit = fit
+        self.surrogate: Optional[Tuple[Tensor, Tensor, int]] = None
+        self.progress = None
+        if progress_desc is not None:
+            self.progress = progress(
+                total=math.ceil(options.sample_budget / options.perturbations_per_eval), desc=progress_desc
+            )
+            self.progress.update(0)
+
+    def add(self, interpretable_inps: Tensor, outputs: Tensor, similarities: Tensor) -> None:
+        """Adds an evaluated batch of samples to the training set, see `_LimeTrainingSet.add`."""
+        self.training_set.add(interpretable_inps, outputs, similarities)
+        if self.progress is not None:
+            self.progress.update()
+
+    def exhausted(self, pending: bool = False) -> bool:
+        """Checks whether the budget stops the sampling, always allowing a first batch to be evaluated.
+
+        Args:
+            pending (bool, optional): Whether some batches were dispatched and not added yet. Defaults to False.
+
+        Returns:
+            bool: Whether no further batch should be evaluated.
+        """
+        return (self.training_set.size > 0 or pending) and self.budget.exhausted()
+
+    def refit_converged(self) -> bool:
+        """Refits the interpretable model to the samples collected so far and checks the convergence of adaptive
+        sampling.
+
+        Returns:
+            bool: Whether the coefficients converged.
+        """
+        assert self.monitor is not None, "Only adaptive sampling checks the convergence"
+        self.surrogate = self.fit(self.training_set)
+        return self.monitor.update(self.surrogate[0])
+
+    def finish(self) -> Tuple[Tensor, Tensor]:
+        """Closes the progress bar and fits the interpretable model to all the samples, unless the last refit did.
+
+        Returns:
+            Tuple[Tensor, Tensor]: The representation of the interpretable model and its R^2 score.
+        """
+        if self.progress is not None:
+            self.progress.close()
+        if self.surrogate is None or self.surrogate[2] != self.training_set.size:
+            self.surrogate = self.fit(self.training_set)
+        return self.surrogate[0], self.surrogate[1]
+
+    def sampling_info(self, training_data: Optional[LimeTrainingData] = None) -> LimeSamplingInfo:
+        """Returns the information about the sampling.
+
+        Args:
+            training_data (LimeTrainingData, optional): The training set kept for the sampling info. Defaults to None.
+
+        Returns:
+            LimeSamplingInfo: The information about the sampling.
+        """
+        return LimeSamplingInfo(
+            self.training_set.size,
+            self.monitor is not None and self.monitor.converged,
+            self.budget.truncated,
+            training_data,
+        )
+
+
+class _PerturbedSample(NamedTuple):
+    """A sample of the sequential sampling, ready to be batched.
+
+    Attributes:
+        model_input (Tensor or tuple[Tensor, ...]): The perturbed input.
+        interpretable_inp (Tensor): The interpretable representation of the sample.
+        mask_inp (Tensor or tuple[Tensor, ...]): The binary mask of the perturbed input.
+        similarity (Tensor): The similarity of the sample to the original input.
+    """
+
+    model_input: Any
+    interpretable_inp: Tensor
+    mask_inp: Any
+    similarity: Tensor
+
+
+class _DispatchedBlock(NamedTuple):
+    """A block of interpretable samples whose forward call was dispatched.
+
+    Attributes:
+        block (Tensor): The interpretable samples.
+        state (_BatchEvaluationState): The state holding the buffer of the block.
+        similarities (Tensor, optional): The similarities of the samples to the original input, None if they are
+            computed by the forward pool along with the outputs.
+        model_out (Tensor or Future): The raw model output of the samples, see `_collect_model_output`, or the future
+            outputs and similarities returned by `ProcessPoolForward.submit`.
+    """
+
+    block: Tensor
+    state: "_BatchEvaluationState"
+    similarities: Optional[Tensor]
+    model_out: Union[Tensor, Future]
+
+
+class _BlockEvaluator:
+    """Evaluation of the blocks of interpretable samples of the batched sampling of one attribution.
+
+    The blocks are looked up in a memo of the samples evaluated so far with deduplicate_samples. Otherwise they are
+    built ahead by a producer thread with pipeline_depth, and dispatched before the outputs of the previous blocks are
+    collected with futures_in_flight or a forward pool. Each block built ahead or waiting for its output holds its own
+    state and buffer. With a forward pool only the interpretable samples are sent, the workers build the perturbed
+    inputs and compute the similarities.
+
+    Args:
+        lime (LimeBase): The explainer.
+        inputs (Tensor or tuple[Tensor, ...]): The original input.
+        target (TargetType): The target of the attribution.
+        additional_forward_args (Any): The additional forward arguments.
+        model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+        device (torch.device): The device of the inputs.
+        options (_SamplingOptions): The validated sampling options.
+        kwargs (dict): The keyword arguments passed to the transformation and similarity functions.
+    """
+
+    def __init__(
+        self,
+        lime: "LimeBase",
+        inputs: TensorOrTupleOfTensorsGeneric,
+        target: TargetType,
+        additional_forward_args: Any,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]],
+        device: torch.device,
+        options: _SamplingOptions,
+        kwargs: dict,
+    ) -> None:
+        self.lime = lime
+        self.inputs = inputs
+        self.model_postprocessing = model_postprocessing
+        self.device = device
+        self.options = options
+        self.kwargs = kwargs
+        self.states = [
+            _BatchEvaluationState(target, additional_forward_args, options.output_columns)
+            for _ in range(options.pipeline_depth + options.futures_in_flight)
+        ]
+        self.memo = _PerturbationMemo() if options.deduplicate_samples else None
+        # The outputs of a forward cache are keyed by the explanation, hashed once, and the interpretable samples
+        self.cache_scope = (
+            lime.forward_func.scope(
+                _qualified_name(lime.batch_from_interp_rep_transform or lime.from_interp_rep_transform),
+                inputs,
+                additional_forward_args,
+                kwargs,
+            )
+            if isinstance(lime.forward_func, ForwardCache) and lime.forward_pool is None
+            else None
+        )
+        # The input is shared with the workers of the pool once, the blocks then only send the samples
+        self.pool_context = (
+            lime.forward_pool.share(
+                lime.batch_from_interp_rep_transform,  # type: ignore
+                inputs,
+                target,
+                additional_forward_args,
+                model_postprocessing,
+                lime.similarity_func,
+                lime.batch_similarity_func,
+                **kwargs,
+            )
+            if lime.forward_pool is not None
+            else None
+        )
+
+    def evaluate(self, blocks: Iterable[Tensor], run: _SamplingRun) -> Iterator[Tuple[Tensor, Tensor, Tensor]]:
+        """Yields the blocks of a design with their model outputs and similarities, counting the forward calls, until
+        the budget is exhausted.
+
+        Args:
+            blocks (Iterable[Tensor]): The blocks of interpretable samples, shape at most perturbations_per_eval x
+                num_interp_features, see `LimeBase._design_blocks`.
+            run (_SamplingRun): The sampling of the attribution.
+
+        Returns:
+            Iterator[Tuple[Tensor, Tensor, Tensor]]: The blocks, their model outputs and similarities.
+        """
+        if self.memo is not None:
+            return self._deduplicated(self.memo, blocks, run)
+        return self._dispatched(blocks, run)
+
+    def _deduplicated(
+        self, memo: _PerturbationMemo, blocks: Iterable[Tensor], run: _SamplingRun
+    ) -> Iterator[Tuple[Tensor, Tensor, Tensor]]:
+        """Evaluates the blocks one after another, only the samples missing from the memo."""
+        for curr_block in blocks:
+            if run.exhausted():
+                return
+            model_out, curr_similarities, n_evaluated = memo.evaluate(curr_block, self._evaluate)
+            if n_evaluated > 0:
+                run.budget.forward_calls += 1
+            yield curr_block, model_out, curr_similarities
+
+    def _dispatched(self, blocks: Iterable[Tensor], run: _SamplingRun) -> Iterator[Tuple[Tensor, Tensor, Tensor]]:
+        """Dispatches the blocks, keeping at most futures_in_flight of them waiting for their outputs."""
+        pipeline = _BlockPipeline(self._prepare, blocks, self.states) if self.options.pipeline_depth > 0 else None
+        dispatches = self._dispatches(blocks, pipeline)
+        pending: Deque[_DispatchedBlock] = deque()
+        try:
+            while True:
+                yield from self._collect(pending, self.options.futures_in_flight - 1, pipeline)
+                if run.exhausted(bool(pending)):
+                    break
+                dispatched = next(dispatches, None)
+                if dispatched is None:
+                    break
+                pending.append(dispatched)
+                run.budget.forward_calls += 1
+            yield from self._collect(pending, 0, pipeline)
+        finally:
+            dispatches.close()
+
+    def _dispatches(
+        self, blocks: Iterable[Tensor], pipeline: Optional["_BlockPipeline"]
+    ) -> typing.Generator[_DispatchedBlock, None, None]:
+        """Prepares and dispatches the blocks lazily, one per iteration."""
+        if self.pool_context is not None:
+            for curr_block in blocks:
+                model_out = self.lime.forward_pool.submit(self.pool_context, curr_block)  # type: ignore
+                yield _DispatchedBlock(curr_block, self.states[0], None, model_out)
+            return
+        prepared_blocks: Iterator[Tuple[Tensor, _BatchEvaluationState, _PreparedBlock]] = (
+            iter(pipeline)
+            if pipeline is not None
+            else (
+                (block, state, self._prepare(block, state))
+                for block, state in zip(blocks, itertools.cycle(self.states))
+            )
+        )
+        try:
+            for curr_block, state, prepared in prepared_blocks:
+                model_out = self.lime._forward_prepared_block(
+                    prepared, state, self.device, self.model_postprocessing, self._forward_func(curr_block)
+                )
+                yield _DispatchedBlock(curr_block, state, prepared.similarities, model_out)
+        finally:
+            # Stops the producer thread also when the sampling ends before the last block
+            if pipeline is not None:
+                cast(typing.Generator, prepared_blocks).close()
+
+    def _collect(
+        self, pending: Deque[_DispatchedBlock], max_pending: int, pipeline: Optional["_BlockPipeline"]
+    ) -> Iterator[Tuple[Tensor, Tensor, Tensor]]:
+        """Waits for the outputs of the oldest dispatched blocks until at most `max_pending` of them are left."""
+        while len(pending) > max_pending:
+            dispatched = pending.popleft()
+            model_out, similarities = dispatched.model_out, dispatched.similarities
+            if similarities is None:
+                model_out, similarities = cast(Future, model_out).wait()
+            yield (
+                dispatched.block,
+                self.lime._collect_model_output(
+                    model_out, len(dispatched.block), self.device, dispatched.state.output_columns
+                ),
+                similarities,
+            )
+            # The buffer of the block is reused only once its outputs were added to the training set
+            if pipeline is not None:
+                pipeline.release(dispatched.state)
+
+    def _evaluate(self, curr_block: Tensor) -> Tuple[Tensor, Tensor]:
+        """Evaluates the model outputs and similarities of a block at once, in the forward pool if there is one."""
+        if self.pool_context is not None:
+            model_out, similarities = self.lime.forward_pool.submit(self.pool_context, curr_block).wait()  # type: ignore
+            # The context of the evaluator always holds the similarity function, so the workers compute them
+            assert similarities is not None
+            return (
+                self.lime._collect_model_output(model_out, len(curr_block), self.device, self.options.output_columns),
+                similarities,
+            )
+        state = self.states[0]
+        prepared = self._prepare(curr_block, state)
+        model_out = self.lime._forward_prepared_block(
+            prepared, state, self.device, self.model_postprocessing, self._forward_func(curr_block)
+        )
+        return (
+            self.lime._collect_model_output(model_out, len(curr_block), self.device, state.output_columns),
+            prepared.similarities,
+        )
+
+    def _forward_func(self, curr_block: Tensor) -> Optional[Callable]:
+        """The forward function of a block keyed by its interpretable samples in the forward cache, if there is one."""
+        if self.cache_scope is None:
+            return None
+        return cast(ForwardCache, self.lime.forward_func).keyed(self.cache_scope, curr_block)
+
+    def _prepare(self, curr_block: Tensor, state: "_BatchEvaluationState") -> _PreparedBlock:
+        """Builds a block into the buffer of a state, see `LimeBase._prepare_interpretable_block`."""
+        return self.lime._prepare_interpretable_block(
+            curr_block, self.inputs, state, self.device, self.model_postprocessing, **self.kwargs
+        )
+
+
+def _qualified_name(func: Any) -> str:
+    """The module and qualified name of a function, stable across processes unlike its representation."""
+    return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__qualname__)}"
+
+
+def _clone_interpretable_model(interpretable_model: InterpretableModel) -> InterpretableModel:
+    """Copies an interpretable model, so each attribution fits its own surrogate.
+
+    Args:
+        interpretable_model (InterpretableModel): The interpretable model given to the explainer.
+
+    Returns:
+        InterpretableModel: An independent copy of the interpretable model.
+    """
+    return copy.deepcopy(interpretable_model)
+
+
+def _fit_surrogate(
+    interpretable_model: InterpretableModel,
+    interp_inps: Tensor,
+    outputs: Tensor,
+    weights: Tensor,
+    device: torch.device,
+) -> Tuple[Tensor, Tensor]:
+    """Fits an interpretable model to the samples of a single target, for an attribution or a refit of its training set.
+
+    Args:
+        interpretable_model (InterpretableModel): The interpretable model, fitted in place.
+        interp_inps (Tensor): Interpretable representation of the samples, shape n_samples x num_interp_features.
+        outputs (Tensor): Model outputs for the samples, shape n_samples.
+        weights (Tensor): Weights of the samples, shape n_samples.
+        device (torch.device): The device the interpretable model is moved to.
+
+    Returns:
+        Tuple[Tensor, Tensor]: The representation of the interpretable model and its R^2 score.
+    """
+    # A single batch holding the whole training set, sliced at once instead of collated sample by sample
+    interpretable_model.fit(
+        DataLoader(TensorDataset(interp_inps, outputs, weights), batch_size=None, sampler=[slice(None)])
+    )
+    if hasattr(interpretable_model, "to"):
+        interpretable_model.to(device)
+
+    with torch.no_grad():
+        r2 = _r2_score(outputs, interpretable_model(interp_inps))
+    # Cloned, as the next fit of the same interpretable model may update its parameters in place
+    return interpretable_model.get_representation().clone(), r2
+
+
+def _spearman_correlation(x: Tensor, y: Tensor) -> Tensor:
+    """Computes the Spearman rank correlation of two 1D tensors, ties are ranked in the order of appearance.
+
+    Args:
+        x (Tensor): The first tensor.
+        y (Tensor): The second tensor.
+
+    Returns:
+        Tensor: The correlation, 1.0 for tensors with a single element.
+    """
+    n = x.numel()
+    if n < 2:
+        return torch.tensor(1.0, dtype=torch.float64)
+    x_ranks = x.argsort(stable=True).argsort().double()
+    y_ranks = y.argsort(stable=True).argsort().double()
+    return 1 - 6 * ((x_ranks - y_ranks) ** 2).sum() / (n * (n**2 - 1))
+
+
+def _r2_score(y_true: Tensor, y_pred: Tensor) -> Tensor:
+    """Computes the coefficient of determination of the predictions, following `sklearn.metrics.r2_score`.
+
+    Multiple outputs are averaged uniformly. An output with constant targets scores 1.0 if it is predicted perfectly
+    and 0.0 otherwise.
+
+    Args:
+        y_true (Tensor): The targets of shape num_samples or num_samples x num_outputs.
+        y_pred (Tensor): The predictions of the same number of elements as the targets.
+
+    Returns:
+        Tensor: The R^2 score as a scalar tensor, on the device of the targets.
+    """
+    y_true = y_true.reshape(y_true.shape[0], -1).float()
+    y_pred = y_pred.reshape(y_true.shape).to(y_true)
+    residual_sum = ((y_true - y_pred) ** 2).sum(dim=0)
+    total_sum = ((y_true - y_true.mean(dim=0)) ** 2).sum(dim=0)
+    score = torch.where(
+        total_sum > 0,
+        1 - residual_sum / total_sum.clamp_min(torch.finfo(total_sum.dtype).tiny),
+        (residual_sum == 0).to(total_sum),
+    )
+    return score.mean()
+
+
+def _format_similarity(similarity: Union[float, Tensor], device: torch.device) -> Tensor:
+    """Formats the output of the similarity function as a flat tensor.
+
+    Args:
+        similarity (float or Tensor): The similarity returned by the similarity function.
+        device (torch.device): The device the similarity is placed on.
+
+    Returns:
+        Tensor: The flattened similarity.
+    """
+    return similarity.flatten() if isinstance(similarity, Tensor) else torch.tensor([similarity], device=device)
+
+
 # Default transformations and methods
 # for Lime child implementation.
+def _block_similarities(
+    similarity_func: Optional[Callable],
+    batch_similarity_func: Optional[Callable],
+    inputs: TensorOrTupleOfTensorsGeneric,
+    curr_model_inputs: TensorOrTupleOfTensorsGeneric,
+    curr_block: Tensor,
+    device: torch.device,
+    **kwargs,
+) -> Tensor:
+    """Computes the similarities of a block of interpretable samples with the batched similarity function if there is
+    one, otherwise sample by sample. Shared by `LimeBase` and the workers of a `ProcessPoolForward`.
+
+    Args:
+        similarity_func (Callable, optional): The similarity function of a single sample, required without the batched
+            similarity function.
+        batch_similarity_func (Callable, optional): The batched similarity function.
+        inputs (Tensor or tuple[Tensor, ...]): The original input.
+        curr_model_inputs (Tensor or tuple[Tensor, ...]): The perturbed inputs of the samples.
+        curr_block (Tensor): The interpretable samples, shape batch_size x num_interp_features.
+        device (torch.device): The device of the similarities.
+        **kwargs: The keyword arguments passed to the similarity functions.
+
+    Returns:
+        Tensor: The similarities of the samples, shape batch_size.
+    """
+    if batch_similarity_func is not None:
+        return batch_similarity_func(inputs, curr_model_inputs, curr_block, **kwargs).flatten().to(device)
+    assert similarity_func is not None, "A similarity function is required to weight the samples"
+    return torch.cat(
+        [
+            _format_similarity(
+                similarity_func(
+                    inputs,
+                    _select_perturbation(curr_model_inputs, sample_idx, len(curr_block)),
+                    curr_sample.unsqueeze(0),
+                    **kwargs,
+                ),
+                device,
+            )
+            for sample_idx, curr_sample in enumerate(curr_block)
+        ]
+    )
+
+
 def get_mask_from_interp_rep_transform(
     curr_sample: TensorOrTupleOfTensorsGeneric, **kwargs
 ) -> TensorOrTupleOfTensorsGeneric:
@@ -657,6 +2450,201 @@ def default_from_interp_rep_transform(
         )
 
 
+def get_batch_mask_from_interp_rep_transform(curr_samples: Tensor, **kwargs) -> TensorOrTupleOfTensorsGeneric:
+    """Batched counterpart of `get_mask_from_interp_rep_transform`. It takes a block of sampled interpretable
+    representations (tensor of shape batch_size x num_interp_features) and returns the binary masks of all the
+    samples, concatenated along the first dimension, using a single indexed gather.
+
+    Args:
+        curr_samples (Tensor): A block of sampled interpretable representations
+            (tensor of shape batch_size x num_interp_features)
+
+    Returns:
+        Tensor or tuple[Tensor, ...]: The binary masks used to make representation of input space, concatenated along
+            the first dimension.
+    """
+    assert "feature_mask" in kwargs, "Must provide feature_mask to use default interpretable representation transform"
+    feature_mask = kwargs["feature_mask"]
+    binary_samples = curr_samples.bool()
+    if isinstance(feature_mask, Tensor):
+        return binary_samples[:, feature_mask].flatten(0, 1)
+    return tuple(binary_samples[:, single_mask].flatten(0, 1) for single_mask in feature_mask)
+
+
+def _blend_with_baselines(
+    binary_samples: Tensor, original_input: Tensor, feature_mask: Tensor, baselines: Any, out: Optional[Tensor]
+) -> Tensor:
+    """Builds the perturbed inputs for a block of binary samples with a single gather and a single `torch.where`.
+
+    Args:
+        binary_samples (Tensor): Boolean tensor of shape batch_size x num_interp_features.
+        original_input (Tensor): The original input tensor.
+        feature_mask (Tensor): The feature mask, broadcastable to the original input.
+        baselines (Any): The baseline, either a scalar or a tensor broadcastable to the original input.
+        out (Tensor, optional): The buffer of shape (batch_size * original_input.shape[0], ...) the perturbed inputs
+            are written into. If None, a new tensor is allocated.
+
+    Returns:
+        Tensor: The perturbed inputs concatenated along the first dimension.
+    """
+    binary_mask = binary_samples[:, feature_mask]
+    baselines = torch.as_tensor(baselines, device=original_input.device)
+    blended_shape = (binary_samples.shape[0], *original_input.shape)
+    if out is None:
+        out = torch.empty(
+            (blended_shape[0] * blended_shape[1], *blended_shape[2:]),
+            dtype=torch.result_type(original_input, baselines),
+            device=original_input.device,
+        )
+    torch.where(binary_mask, original_input, baselines, out=out.view(blended_shape))
+    return out
+
+
+def default_batch_from_interp_rep_transform(
+    curr_samples: Tensor,
+    original_inputs: TensorOrTupleOfTensorsGeneric,
+    out: Optional[TensorOrTupleOfTensorsGeneric] = None,
+    **kwargs,
+) -> TensorOrTupleOfTensorsGeneric:
+    """Batched counterpart of `default_from_interp_rep_transform`. It takes a block of sampled interpretable
+    representations (tensor of shape batch_size x num_interp_features) and returns the corresponding representations
+    in the input space, concatenated along the first dimension. For every input tensor the binary mask is obtained
+    with a single indexed gather on the feature mask and blended with the baselines with a single `torch.where`.
+
+    Args:
+        curr_samples (Tensor): A block of sampled interpretable representations
+            (tensor of shape batch_size x num_interp_features)
+        original_inputs (Tensor or tuple[Tensor, ...]): Original input for which LIME is computed.
+        out (Tensor or tuple[Tensor, ...], optional): Preallocated buffer matching the shape of the returned batch
+            the perturbed inputs are written into. If None, a new buffer is allocated and returned.
+
+    Returns:
+        Tensor or tuple[Tensor, ...]: The corresponding representations in the input space, concatenated along the
+            first dimension.
+    """
+    assert "feature_mask" in kwargs, "Must provide feature_mask to use default interpretable representation transform"
+    assert "baselines" in kwargs, "Must provide baselines to use default interpretable representation transform"
+    feature_mask = kwargs["feature_mask"]
+    binary_samples = curr_samples.bool()
+    if isinstance(feature_mask, Tensor):
+        return _blend_with_baselines(
+            binary_samples,
+            original_inputs,  # type: ignore
+            feature_mask,
+            kwargs["baselines"],
+            out,  # type: ignore
+        )
+    return tuple(
+        _blend_with_baselines(
+            binary_samples,
+            original_inputs[j],
+            feature_mask[j],
+            kwargs["baselines"][j],
+            out[j] if out is not None else None,
+        )
+        for j in range(len(feature_mask))
+    )
+
+
+def _narrow_perturbation_buffer(
+    buffer: Optional[TensorOrTupleOfTensorsGeneric], n_perturbations: int, capacity: int
+) -> Optional[TensorOrTupleOfTensorsGeneric]:
+    """Narrows the perturbation buffer, allocated for `capacity` perturbations, to the first `n_perturbations`.
+
+    Args:
+        buffer (Tensor or tuple[Tensor, ...], optional): The buffer to narrow.
+        n_perturbations (int): The number of perturbations to keep.
+        capacity (int): The number of perturbations the buffer was allocated for.
+
+    Returns:
+        Tensor or tuple[Tensor, ...] or None: The narrowed buffer, or None if no buffer was allocated yet or it is
+        too small for `n_perturbations` perturbations.
+    """
+    if buffer is None or n_perturbations > capacity:
+        return None
+    if n_perturbations == capacity:
+        return buffer
+    if isinstance(buffer, Tensor):
+        return buffer[: buffer.shape[0] // capacity * n_perturbations]
+    return tuple(single_buffer[: single_buffer.shape[0] // capacity * n_perturbations] for single_buffer in buffer)
+
+
+def _select_perturbation(
+    model_inputs: TensorOrTupleOfTensorsGeneric, index: int, n_perturbations: int
+) -> TensorOrTupleOfTensorsGeneric:
+    """Selects a single perturbation from a batch of perturbed inputs concatenated along the first dimension.
+
+    Args:
+        model_inputs (Tensor or tuple[Tensor, ...]): The batch of perturbed inputs.
+        index (int): The index of the perturbation to select.
+        n_perturbations (int): The number of perturbations contained in the batch.
+
+    Returns:
+        Tensor or tuple[Tensor, ...]: The selected perturbation.
+    """
+    if isinstance(model_inputs, Tensor):
+        return model_inputs.chunk(n_perturbations)[index]
+    return tuple(single_input.chunk(n_perturbations)[index] for single_input in model_inputs)
+
+
+class _ExpKernelSimilarity:
+    """Exponential kernel of the distance of a perturbed input to the original input, see
+    `get_exp_kernel_similarity_function`. A class rather than a closure, so it can be pickled for the workers of a
+    `ProcessPoolForward`.
+
+    Args:
+        distance_mode (str): Either "cosine" or "euclidean".
+        kernel_width (float): The width of the kernel.
+    """
+
+    def __init__(self, distance_mode: str, kernel_width: float) -> None:
+        self.distance_mode = distance_mode
+        self.kernel_width = kernel_width
+
+    def __call__(self, original_inp, perturbed_inp, __, **kwargs) -> float:
+        flattened_original_inp = _flatten_tensor_or_tuple(original_inp).float()
+        flattened_perturbed_inp = _flatten_tensor_or_tuple(perturbed_inp).float()
+        if self.distance_mode == "cosine":
+            cos_sim = CosineSimilarity(dim=0)
+            distance = 1 - cos_sim(flattened_original_inp, flattened_perturbed_inp)
+        elif self.distance_mode == "euclidean":
+            distance = torch.norm(flattened_original_inp - flattened_perturbed_inp)
+        else:
+            raise ValueError("distance_mode must be either cosine or euclidean.")
+        return math.exp(-1 * (distance**2) / (2 * (self.kernel_width**2)))
+
+
+class _ExpKernelBatchSimilarity:
+    """Exponential kernel of the distances of a batch of perturbed samples to the original input, see
+    `get_exp_kernel_batch_similarity_function`.
+
+    Args:
+        distance_mode (str): Either "cosine" or "euclidean".
+        kernel_width (float): The width of the kernel.
+        interpretable_space (bool): Whether to measure the distance in the interpretable space.
+    """
+
+    def __init__(self, distance_mode: str, kernel_width: float, interpretable_space: bool) -> None:
+        self.distance_mode = distance_mode
+        self.kernel_width = kernel_width
+        self.interpretable_space = interpretable_space
+
+    def __call__(self, original_inp, perturbed_inps, perturbed_interp_inps, **kwargs) -> Tensor:
+        n_perturbations = perturbed_interp_inps.shape[0]
+        if self.interpretable_space:
+            samples = perturbed_interp_inps.float()
+            original = torch.ones(samples.shape[1], dtype=samples.dtype, device=samples.device)
+        else:
+            samples = _flatten_perturbation_batch(perturbed_inps, n_perturbations).float()
+            original = _flatten_tensor_or_tuple(original_inp).float().to(samples.device)
+
+        if self.distance_mode == "cosine":
+            distance = 1 - torch.nn.functional.cosine_similarity(samples, original.unsqueeze(0), dim=1)
+        else:
+            distance = torch.linalg.vector_norm(samples - original, dim=1)
+        return torch.exp(-1 * (distance**2) / (2 * (self.kernel_width**2)))
+
+
 def get_exp_kernel_similarity_function(distance_mode: str = "cosine", kernel_width: float = 1.0) -> Callable:
     """This method constructs an appropriate similarity function to compute weights for perturbed sample in LIME.
     Distance between the original and perturbed inputs is computed based on the provided distance mode, and the distance
@@ -685,45 +2673,241 @@ def get_exp_kernel_similarity_function(distance_mode: str = "cosine", kernel_wid
             similarity_fn for Lime or LimeBase.
     """
 
-    def default_exp_kernel(original_inp, perturbed_inp, __, **kwargs):
-        flattened_original_inp = _flatten_tensor_or_tuple(original_inp).float()
-        flattened_perturbed_inp = _flatten_tensor_or_tuple(perturbed_inp).float()
-        if distance_mode == "cosine":
-            cos_sim = CosineSimilarity(dim=0)
-            distance = 1 - cos_sim(flattened_original_inp, flattened_perturbed_inp)
-        elif distance_mode == "euclidean":
-            distance = torch.norm(flattened_original_inp - flattened_perturbed_inp)
-        else:
-            raise ValueError("distance_mode must be either cosine or euclidean.")
-        return math.exp(-1 * (distance**2) / (2 * (kernel_width**2)))
+    return _ExpKernelSimilarity(distance_mode, kernel_width)
+
+
+def _flatten_perturbation_batch(perturbed_inps: TensorOrTupleOfTensorsGeneric, n_perturbations: int) -> Tensor:
+    """Flattens a batch of perturbed inputs, concatenated along the first dimension, into a 2D tensor.
+
+    Args:
+        perturbed_inps (Tensor or Tuple of Tensors): The perturbed inputs of the whole batch.
+        n_perturbations (int): The number of perturbations in the batch.
+
+    Returns:
+        Tensor: The tensor of shape n_perturbations x num_input_elements, one flattened perturbation per row.
+    """
+    if isinstance(perturbed_inps, Tensor):
+        return perturbed_inps.reshape(n_perturbations, -1)
+    return torch.cat([single_inp.reshape(n_perturbations, -1) for single_inp in perturbed_inps], dim=1)
+
+
+def get_exp_kernel_batch_similarity_function(
+    distance_mode: str = "cosine", kernel_width: float = 1.0, interpretable_space: bool = False
+) -> Callable:
+    """This method constructs a similarity function computing the LIME weights of a whole batch of perturbed samples.
+
+    The distances are computed in the same way as in `get_exp_kernel_similarity_function`, but for all the samples of
+    a batch in a single tensor operation, and the weights are returned as a tensor, without any host synchronization.
+    If `interpretable_space` is True, the distance is measured between the binary interpretable samples and the
+    interpretable representation of the original input, the vector of ones. For binary samples with k kept features out
+    of num_interp_features the cosine distance is then equal to 1 - sqrt(k / num_interp_features) and the euclidean
+    distance to sqrt(num_interp_features - k), so the weights cost O(num_interp_features) per sample instead of the
+    size of the input.
+
+    The callable returned can be provided as the `batch_similarity_func` for
+    Lime or LimeBase.
+
+    Args:
+        distance_mode (str, optional): Distance mode can be either "cosine" or
+                    "euclidean" corresponding to either cosine distance
+                    or Euclidean distance respectively.
+                    Default: "cosine"
+        kernel_width (float, optional):
+                    Kernel width for exponential kernel applied to distance.
+                    Default: 1.0
+        interpretable_space (bool, optional): Whether to measure the distance in the
+                    interpretable space instead of the input space.
+                    Default: False
+
+    Returns:
+
+        *Callable*:
+        - **batch_similarity_fn** (*Callable*):
+            Batched similarity function. This callable can be provided as the
+            batch_similarity_func for Lime or LimeBase.
+
+    Raises:
+        ValueError: If the distance mode is neither "cosine" nor "euclidean".
+    """
+    if distance_mode not in ("cosine", "euclidean"):
+        raise ValueError("distance_mode must be either cosine or euclidean.")
+
+    return _ExpKernelBatchSimilarity(distance_mode, kernel_width, interpretable_space)
+
+
+def default_perturb_func(original_inp, **kwargs):
+    """Default interpretable sampling function for perturbing input.
+
+    Args:
+        original_inp (Tensor or list): The original input to be perturbed.
+        **kwargs: Additional keyword arguments.
+            - num_interp_features (int): The number of interpretable features.
+
+    Returns:
+        Tensor: The perturbed input with interpretable features.
+
+    Raises:
+        AssertionError: If `num_interp_features` is not provided in `kwargs`.
+    """
+    assert (
+        "num_interp_features" in kwargs
+    ), "Must provide num_interp_features to use default interpretable sampling function"
+    if isinstance(original_inp, Tensor):
+        device = original_inp.device
+    else:
+        device = original_inp[0].device
+
+    probs = torch.ones(1, kwargs["num_interp_features"]) * 0.5
+    return torch.bernoulli(probs).to(device=device).long()
+
+
+def default_batch_perturb_func(original_inp, n_samples, **kwargs):
+    """Default interpretable sampling function drawing the whole design matrix at once.
+
+    Each element is selected independently and uniformly at random, exactly as in `default_perturb_func`, but all the
+    samples are drawn in a single tensor operation directly on the device of the input.
+
+    Args:
+        original_inp (Tensor or list): The original input to be perturbed.
+        n_samples (int): The number of samples to draw.
+        **kwargs: Additional keyword arguments.
+            - num_interp_features (int): The number of interpretable features.
+
+    Returns:
+        Tensor: The binary design matrix of shape n_samples x num_interp_features.
+
+    Raises:
+        AssertionError: If `num_interp_features` is not provided in `kwargs`.
+    """
+    assert (
+        "num_interp_features" in kwargs
+    ), "Must provide num_interp_features to use default interpretable sampling function"
+    if isinstance(original_inp, Tensor):
+        device = original_inp.device
+    else:
+        device = original_inp[0].device
+
+    probs = torch.full((n_samples, kwargs["num_interp_features"]), 0.5, device=device)
+    return torch.bernoulli(probs).long()
+
+
+def _design_device_and_features(original_inp, kwargs) -> Tuple[torch.device, int]:
+    """Returns the device of the input and the number of interpretable features of a sampling design.
+
+    Raises:
+        AssertionError: If `num_interp_features` is not provided in `kwargs`.
+    """
+    assert "num_interp_features" in kwargs, "Must provide num_interp_features to use interpretable sampling designs"
+    device = original_inp.device if isinstance(original_inp, Tensor) else original_inp[0].device
+    return device, kwargs["num_interp_features"]
+
+
+def antithetic_batch_perturb_func(original_inp, n_samples, **kwargs):
+    """Antithetic interpretable sampling design.
+
+    Every uniformly drawn sample is followed by its complement, so each feature is kept in exactly half of every pair of
+    samples, which removes the imbalance of the features between the samples and lowers the variance of the
+    coefficients of the interpretable model. If n_samples is odd, the complement of the last sample is dropped.
+
+    Args:
+        original_inp (Tensor or list): The original input to be perturbed.
+        n_samples (int): The number of samples to draw.
+        **kwargs: Additional keyword arguments.
+            - num_interp_features (int): The number of interpretable features.
+
+    Returns:
+        Tensor: The binary design matrix of shape n_samples x num_interp_features.
+
+    Raises:
+        AssertionError: If `num_interp_features` is not provided in `kwargs`.
+    """
+    device, num_interp_features = _design_device_and_features(original_inp, kwargs)
+    probs = torch.full((math.ceil(n_samples / 2), num_interp_features), 0.5, device=device)
+    samples = torch.bernoulli(probs).long()
+    return torch.stack([samples, 1 - samples], dim=1).reshape(-1, num_interp_features)[:n_samples]
+
+
+def stratified_batch_perturb_func(original_inp, n_samples, **kwargs):
+    """Interpretable sampling design stratified by the number of kept features.
+
+    The samples are spread evenly over the possible numbers of kept features, from none to all of them, and the kept
+    features of each sample are chosen uniformly at random. Unlike uniform sampling, which concentrates the samples
+    around half of the features kept, it covers both small and large coalitions.
+
+    Args:
+        original_inp (Tensor or list): The original input to be perturbed.
+        n_samples (int): The number of samples to draw.
+        **kwargs: Additional keyword arguments.
+            - num_interp_features (int): The number of interpretable features.
+
+    Returns:
+        Tensor: The binary design matrix of shape n_samples x num_interp_features.
+
+    Raises:
+        AssertionError: If `num_interp_features` is not provided in `kwargs`.
+    """
+    device, num_interp_features = _design_device_and_features(original_inp, kwargs)
+    # A random offset spreads the remainder of the samples over different strata in every call
+    offset = int(torch.randint(num_interp_features + 1, (1,)))
+    sizes = (torch.arange(n_samples, device=device) + offset) % (num_interp_features + 1)
+    sizes = sizes[torch.randperm(n_samples, device=device)]
+    ranks = torch.rand((n_samples, num_interp_features), device=device).argsort(dim=1).argsort(dim=1)
+    return (ranks < sizes.unsqueeze(1)).long()
 
-    return default_exp_kernel
 
+def sobol_batch_perturb_func(original_inp, n_samples, **kwargs):
+    """Low-discrepancy interpretable sampling design based on a scrambled Sobol sequence.
 
-def default_perturb_func(original_inp, **kwargs):
-    """Default interpretable sampling function for perturbing input.
+    The points of a scrambled Sobol sequence are thresholded at 0.5, so each feature is kept with probability 0.5 as in
+    uniform sampling, but the samples cover the combinations of the features more evenly. With n_samples a power of two,
+    every feature is kept in exactly half of the samples.
 
     Args:
         original_inp (Tensor or list): The original input to be perturbed.
+        n_samples (int): The number of samples to draw.
         **kwargs: Additional keyword arguments.
             - num_interp_features (int): The number of interpretable features.
 
     Returns:
-        Tensor: The perturbed input with interpretable features.
+        Tensor: The binary design matrix of shape n_samples x num_interp_features.
 
     Raises:
         AssertionError: If `num_interp_features` is not provided in `kwargs`.
     """
-    assert (
-        "num_interp_features" in kwargs
-    ), "Must provide num_interp_features to use default interpretable sampling function"
-    if isinstance(original_inp, Tensor):
-        device = original_inp.device
-    else:
-        device = original_inp[0].device
+    device, num_interp_features = _design_device_and_features(original_inp, kwargs)
+    # The scrambling is seeded from the torch generator, so the design is reproducible with `torch.manual_seed`
+    engine = torch.quasirandom.SobolEngine(
+        dimension=num_interp_features, scramble=True, seed=int(torch.randint(2**31, (1,)))
+    )
+    return (engine.draw(n_samples) >= 0.5).long().to(device)
 
-    probs = torch.ones(1, kwargs["num_interp_features"]) * 0.5
-    return torch.bernoulli(probs).to(device=device).long()
+
+def enumerate_binary_samples(
+    num_interp_features: int, device: Optional[torch.device] = None, start: int = 0, stop: Optional[int] = None
+) -> Tensor:
+    """Enumerates the binary interpretable samples, used by the exhaustive sampling of `LimeBase.attribute`.
+
+    The i-th sample is the binary representation of i, with the first interpretable feature as its least significant
+    bit, so the samples go from all the features removed to all of them kept. The exhaustive sampling enumerates them
+    block by block, with `start` and `stop`, so only one block of samples is held at a time.
+
+    Args:
+        num_interp_features (int): The number of interpretable features.
+        device (torch.device, optional): The device of the samples. Defaults to None.
+        start (int, optional): The index of the first sample. Defaults to 0.
+        stop (int, optional): The index after the last sample, None for all the samples. Defaults to None.
+
+    Returns:
+        Tensor: The binary design matrix of shape (stop - start) x num_interp_features.
+
+    Raises:
+        ValueError: If the number of interpretable features is negative or greater than `MAX_EXHAUSTIVE_FEATURES`.
+    """
+    if num_interp_features < 0 or num_interp_features > MAX_EXHAUSTIVE_FEATURES:
+        raise ValueError(f"The number of interpretable features must be between 0 and {MAX_EXHAUSTIVE_FEATURES}")
+    codes = torch.arange(start, 2**num_interp_features if stop is None else stop, dtype=torch.long, device=device)
+    bits = torch.arange(num_interp_features, dtype=torch.long, device=device)
+    return (codes.unsqueeze(1) >> bits) & 1
 
 
 def construct_feature_mask(feature_mask, formatted_inputs):
@@ -749,9 +2933,12 @@ def _run_forward(
     additional_forward_args: Any = None,
     model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
     mask_inps: Any = None,
+    forward_takes_inputs: Optional[bool] = None,
 ) -> Union[Tensor, Future[Tensor]]:
-    forward_func_args = signature(forward_func).parameters
-    if len(forward_func_args) == 0:
+    # The signature of the forward function may be inspected once by the caller and passed as forward_takes_inputs
+    if forward_takes_inputs is None:
+        forward_takes_inputs = len(signature(forward_func).parameters) > 0
+    if not forward_takes_inputs:
         output = forward_func()
         return output if target is None else _select_targets(output, target)
 
@@ -771,15 +2958,272 @@ def _run_forward(
     if model_postprocessing and mask_inps is None:
         mask_inps = torch.ones_like(inputs)
 
-    if isinstance(output, torch.futures.Future):
+    # Futures of torch.jit.fork are not instances of torch.futures.Future, both derive from torch._C.Future
+    if isinstance(output, torch._C.Future):
         if model_postprocessing is not None:
             output = output.then(lambda x: model_postprocessing(x.value(), mask_inps))
-        return output.then(lambda x: _select_targets(x.value(), target))
+        return cast(Future[Tensor], output.then(lambda x: _select_targets(x.value(), target)))
     if model_postprocessing is not None:
         output = model_postprocessing(output, mask_inps)
     return _select_targets(output, target)
 
 
+def _share_tensors(value: Any) -> Any:
+    """Copies the tensors of a value, possibly nested in tuples, lists or dicts, into shared memory."""
+    if isinstance(value, Tensor):
+        return value.detach().cpu().clone().share_memory_()
+    if isinstance(value, (tuple, list)):
+        return type(value)(_share_tensors(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _share_tensors(item) for key, item in value.items()}
+    return value
+
+
+class _ForwardContext(NamedTuple):
+    """The part of an attribution sent once to each worker of a `ProcessPoolForward`."""
+
+    context_id: int
+    transform: Callable
+    inputs: Any
+    target: TargetType
+    additional_forward_args: Any
+    model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]]
+    similarity_func: Optional[Callable]
+    batch_similarity_func: Optional[Callable]
+    kwargs: dict
+
+
+# The state of a worker process of a `ProcessPoolForward`
+_worker_forward_func: Optional[Callable] = None
+_worker_context: Optional[_ForwardContext] = None
+
+
+def _init_forward_worker(forward_func: Callable) -> None:
+    """Installs the forward function in a worker process, with a single thread as the workers run concurrently."""
+    global _worker_forward_func
+    _worker_forward_func = forward_func
+    torch.set_num_threads(1)
+
+
+def _evaluate_forward_shard(
+    context_id: int, context: Optional[_ForwardContext], samples: Tensor
+) -> Tuple[Tensor, Optional[Tensor]]:
+    """Builds the perturbed inputs of a shard of interpretable samples, evaluates the model on them and computes their
+    similarities in a worker.
+
+    Args:
+        context_id (int): The identifier of the attribution the samples belong to.
+        context (_ForwardContext, optional): The context of the attribution, only sent with the first shard of the
+            attribution evaluated by the worker.
+        samples (Tensor): The binary interpretable samples of the shard.
+
+    Returns:
+        Tuple[Tensor, Tensor]: The model outputs of the samples and their similarities, None if the context holds no
+        similarity function.
+    """
+    global _worker_context
+    if context is not None:
+        _worker_context = context
+    if _worker_context is None or _worker_context.context_id != context_id:
+        raise RuntimeError("The worker has not received the context of the attribution")
+    n_perturbations = samples.shape[0]
+    with torch.no_grad():
+        model_inputs = _worker_context.transform(samples, _worker_context.inputs, **_worker_context.kwargs)
+        mask_inps = (
+            get_batch_mask_from_interp_rep_transform(samples, **_worker_context.kwargs)
+            if _worker_context.model_postprocessing is not None
+            else None
+        )
+        output = _run_forward(
+            _worker_forward_func,  # type: ignore
+            model_inputs,
+            _expand_target(_worker_context.target, n_perturbations),
+            _expand_additional_forward_args(_worker_context.additional_forward_args, n_perturbations),
+            _worker_context.model_postprocessing,
+            mask_inps,
+        )
+        if isinstance(output, torch._C.Future):
+            output = output.wait()
+        similarities = (
+            _block_similarities(
+                _worker_context.similarity_func,
+                _worker_context.batch_similarity_func,
+                _worker_context.inputs,
+                model_inputs,
+                samples,
+                samples.device,
+                **_worker_context.kwargs,
+            )
+            if _worker_context.similarity_func is not None or _worker_context.batch_similarity_func is not None
+            else None
+        )
+    return torch.as_tensor(output), similarities
+
+
+class ProcessPoolForward:
+    """Evaluates the forward function of the batched LIME sampling in a pool of worker processes.
+
+    It is meant for forward functions holding the GIL, e.g. wrappers of scikit-learn or xgboost pixel classifiers,
+    which do not run concurrently in threads. Each block of interpretable samples is split into one shard per worker.
+    The input, the baselines and the feature mask of an attribution are copied into shared memory and sent to each
+    worker once, with its first shard, after that only the binary samples of the shards are sent. Each worker runs the
+    batched transformation of its shard, the forward function and the similarity function, so the perturbed inputs are
+    never built in the caller, and the outputs are concatenated in the order of the samples. The dispatched blocks are returned as futures, so `futures_in_flight` of `LimeBase.attribute` keeps
+    several blocks in the pool at once.
+
+    The forward function is sent to every worker once, when the pool starts, and runs with a single torch thread. With
+    the `spawn` or `forkserver` start methods it must be picklable. The transformation, the similarity functions, the
+    postprocessing and the keyword arguments of an attribution are always pickled, as they are sent with the shards.
+    The blocks of an attribution may be submitted from several threads.
+
+    Args:
+        forward_func (Callable): The forward function evaluated by the workers.
+        max_workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        mp_context (multiprocessing.context.BaseContext, optional): The multiprocessing context starting the workers.
+            Defaults to the default context of the platform.
+
+    Raises:
+        ValueError: If max_workers is smaller than 1.
+
+    Examples:
+        >>> with ProcessPoolForward(classifier_forward, max_workers=8) as pool:
+        >>>     lime = Lime(classifier_forward, forward_pool=pool)
+        >>>     attributions = lime.attribute(inputs, perturbations_per_eval=64, futures_in_flight=2)
+    """
+
+    def __init__(self, forward_func: Callable, max_workers: Optional[int] = None, mp_context: Any = None) -> None:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        self.forward_func = forward_func
+        # One single-process executor per worker, so the context is sent to each worker exactly once
+        self._executors = [
+            concurrent.futures.ProcessPoolExecutor(
+                1, mp_context=mp_context, initializer=_init_forward_worker, initargs=(forward_func,)
+            )
+            for _ in range(max_workers)
+        ]
+        # The context last sent to each worker, read and updated together with the submission of a shard
+        self._worker_context_ids: List[Optional[int]] = [None] * max_workers
+        self._worker_context_lock = threading.Lock()
+        self._context_ids = itertools.count()
+
+    @property
+    def max_workers(self) -> int:
+        """The number of worker processes."""
+        return len(self._executors)
+
+    def share(
+        self,
+        transform: Callable,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        target: TargetType = None,
+        additional_forward_args: Any = None,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        similarity_func: Optional[Callable] = None,
+        batch_similarity_func: Optional[Callable] = None,
+        **kwargs,
+    ) -> _ForwardContext:
+        """Copies the input of an attribution into shared memory, to be sent with the first shard to each worker.
+
+        Args:
+            transform (Callable): The batched transformation from the interpretable space, see
+                `default_batch_from_interp_rep_transform`.
+            inputs (Tensor or tuple[Tensor, ...]): The input of the attribution.
+            target (TargetType, optional): The target of the attribution. Defaults to None.
+            additional_forward_args (Any, optional): The additional forward arguments. Defaults to None.
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+                Defaults to None.
+            similarity_func (Callable, optional): The similarity function of a single sample, see `LimeBase`. Defaults
+                to None.
+            batch_similarity_func (Callable, optional): The batched similarity function, used instead of
+                similarity_func if provided. If neither is provided, no similarities are computed. Defaults to None.
+            **kwargs: The keyword arguments of the transformation, e.g. the feature mask and the baselines.
+
+        Returns:
+            _ForwardContext: The context passed to `submit`.
+        """
+        return _ForwardContext(
+            next(self._context_ids),
+            transform,
+            _share_tensors(inputs),
+            _share_tensors(target),
+            _share_tensors(additional_forward_args),
+            model_postprocessing,
+            similarity_func,
+            batch_similarity_func,
+            _share_tensors(kwargs),
+        )
+
+    def submit(self, context: _ForwardContext, samples: Tensor) -> Future[Tuple[Tensor, Optional[Tensor]]]:
+        """Evaluates a block of interpretable samples, sharded across the workers.
+
+        Args:
+            context (_ForwardContext): The context of the attribution returned by `share`.
+            samples (Tensor): The binary interpretable samples, shape batch_size x num_interp_features.
+
+        Returns:
+            Future[Tuple[Tensor, Tensor]]: The model outputs of the samples and their similarities, None if the context
+            holds no similarity function, both concatenated in the order of the samples.
+        """
+        shards = [shard for shard in samples.cpu().tensor_split(self.max_workers) if shard.shape[0] > 0]
+        # Untyped, as torch annotates set_exception with the type of the result
+        result: Future[Any] = Future()
+        shard_results: List[Optional[Tuple[Tensor, Optional[Tensor]]]] = [None] * len(shards)
+        lock = threading.Lock()
+        remaining = [len(shards)]
+
+        def on_done(shard_idx: int, shard_future: concurrent.futures.Future) -> None:
+            error = shard_future.exception()
+            with lock:
+                if remaining[0] == 0:
+                    return
+                if error is not None:
+                    remaining[0] = 0
+                else:
+                    shard_results[shard_idx] = shard_future.result()
+                    remaining[0] -= 1
+                done = remaining[0] == 0
+            if error is not None:
+                result.set_exception(error)
+            elif done:
+                outputs, similarities = zip(*cast(List[Tuple[Tensor, Optional[Tensor]]], shard_results))
+                result.set_result(
+                    (
+                        torch.cat(outputs).to(samples.device),
+                        torch.cat(similarities).to(samples.device) if similarities[0] is not None else None,
+                    )
+                )
+
+        # A worker receives the context only with its first shard of the attribution, so the check of the context it
+        # holds and the submission of the shard are atomic with respect to the submissions of other threads
+        with self._worker_context_lock:
+            for worker_idx, shard in enumerate(shards):
+                send_context = self._worker_context_ids[worker_idx] != context.context_id
+                shard_future = self._executors[worker_idx].submit(
+                    _evaluate_forward_shard, context.context_id, context if send_context else None, shard
+                )
+                self._worker_context_ids[worker_idx] = context.context_id
+                shard_future.add_done_callback(functools.partial(on_done, worker_idx))
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the worker processes.
+
+        Args:
+            wait (bool, optional): Whether to wait for the pending shards. Defaults to True.
+        """
+        for executor in self._executors:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "ProcessPoolForward":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+
 class Lime(LimeBase):
     """Lime is an interpretability method that trains an interpretable surrogate model by sampling points around a
     specified input example and using model evaluations at these points to train a simpler interpretable 'surrogate'
@@ -820,6 +3264,9 @@ class Lime(LimeBase):
         interpretable_model: Optional[InterpretableModel] = None,
         similarity_func: Optional[Callable] = None,
         perturb_func: Optional[Callable] = None,
+        batch_perturb_func: Optional[Callable] = None,
+        batch_similarity_func: Optional[Callable] = None,
+        forward_pool: Optional["ProcessPoolForward"] = None,
     ) -> None:
         """Initializes an instance of the Lime class.
 
@@ -837,8 +3284,8 @@ class Lime(LimeBase):
                     captum._utils.models.linear_model.
 
                     Alternatively, a custom model object must provide a `fit` method to
-                    train the model, given a dataloader, with batches containing
-                    three tensors:
+                    train the model, given an iterable of batches (e.g. a dataloader),
+                    with batches containing three tensors:
 
                     - interpretable_inputs: Tensor
                       [2D num_samples x num_interp_features],
@@ -850,8 +3297,10 @@ class Lime(LimeBase):
                     interpretable model after fitting.
 
                     Note that calling fit multiple times should retrain the
-                    interpretable model, each attribution call reuses
-                    the same given interpretable model object.
+                    interpretable model. Each attribution call fits its own
+                    deep copy of the given interpretable model object, which
+                    itself is never fitted, so concurrent attribution calls
+                    of the same instance are independent.
             similarity_func (Callable, optional): Function which takes a single sample
                     along with its corresponding interpretable representation
                     and returns the weight of the interpretable sample for
@@ -904,15 +3353,66 @@ class Lime(LimeBase):
 
                     kwargs includes baselines, feature_mask, num_interp_features
                     (integer, determined from feature mask).
+            batch_perturb_func (Callable, optional): Function which returns
+                    the whole binary design matrix of shape
+                    n_samples x num_interp_features at once. If neither
+                    perturb_func nor batch_perturb_func is provided, the
+                    default batched sampler is used, which draws the same
+                    distribution as the default perturb_func in a single
+                    tensor operation.
+
+                    The expected signature of this callable is:
+
+                    >>> batch_perturb_func(
+                    >>>    original_input: Tensor or tuple[Tensor, ...],
+                    >>>    n_samples: int,
+                    >>>    **kwargs: Any
+                    >>> ) -> Tensor [Binary 2D Tensor n_samples x num_interp_features]
+
+                    kwargs includes baselines, feature_mask, num_interp_features
+                    (integer, determined from feature mask).
+
+                    Variance-reduced designs are provided as
+                    antithetic_batch_perturb_func, stratified_batch_perturb_func
+                    and sobol_batch_perturb_func.
+            batch_similarity_func (Callable, optional): Function which returns
+                    the weights of a whole block of perturbed samples at once.
+                    If neither similarity_func nor batch_similarity_func is
+                    provided, the default batched kernel is used, which computes
+                    the same weights as the default similarity_func for all the
+                    samples of a block in a single tensor operation. A kernel
+                    measuring the distance in the interpretable space can be
+                    constructed with get_exp_kernel_batch_similarity_function.
+
+                    The expected signature of this callable is:
+
+                    >>> batch_similarity_func(
+                    >>>    original_input: Tensor or tuple[Tensor, ...],
+                    >>>    perturbed_inputs: Tensor or tuple[Tensor, ...],
+                    >>>    perturbed_interpretable_inputs:
+                    >>>        Tensor [2D batch_size x num_interp_features],
+                    >>>    **kwargs: Any
+                    >>> ) -> Tensor [1D batch_size]
+
+                    kwargs includes baselines, feature_mask, num_interp_features
+                    (integer, determined from feature mask).
+            forward_pool (ProcessPoolForward, optional): Pool of worker
+                    processes the forward calls of the batched sampling are
+                    sharded across, see `ProcessPoolForward`.
+                    Default: None
         """
         if interpretable_model is None:
             interpretable_model = SkLearnLasso(alpha=0.01)
 
         if similarity_func is None:
             similarity_func = get_exp_kernel_similarity_function()
+            if batch_similarity_func is None:
+                batch_similarity_func = get_exp_kernel_batch_similarity_function()
 
         if perturb_func is None:
             perturb_func = default_perturb_func
+            if batch_perturb_func is None:
+                batch_perturb_func = default_batch_perturb_func
 
         LimeBase.__init__(
             self,
@@ -923,6 +3423,10 @@ class Lime(LimeBase):
             True,
             default_from_interp_rep_transform,
             None,
+            batch_perturb_func,
+            default_batch_from_interp_rep_transform,
+            batch_similarity_func,
+            forward_pool,
         )
 
     @log_usage()
@@ -938,7 +3442,23 @@ class Lime(LimeBase):
         model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
         return_input_shape: bool = True,
         show_progress: bool = False,
-    ) -> tuple[TensorOrTupleOfTensorsGeneric, Tensor]:
+        streaming_fit: bool = False,
+        max_samples: Optional[int] = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: str = "values",
+        return_sampling_info: bool = False,
+        time_budget: Optional[float] = None,
+        max_forward_calls: Optional[int] = None,
+        deduplicate_samples: bool = False,
+        exhaustive: bool = False,
+        targets: Union[None, List[int], str] = None,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
+    ) -> Union[
+        Tuple[TensorOrTupleOfTensorsGeneric, Tensor], Tuple[TensorOrTupleOfTensorsGeneric, Tensor, LimeSamplingInfo]
+    ]:
         """This method attributes the output of the model with given target index (in case it is provided, otherwise it
         assumes that output is a scalar) to the inputs of the model using the approach described above, training an
         interpretable model and returning a representation of the interpretable model.
@@ -1110,6 +3630,70 @@ class Lime(LimeBase):
                         (e.g. time estimation). Otherwise, it will fallback to
                         a simple output of progress.
                         Default: False
+            streaming_fit (bool, optional): If True, the samples are reduced to
+                        the sufficient statistics of a weighted least-squares
+                        problem after every evaluated batch instead of being
+                        stored, see `LimeBase.attribute`. Requires an
+                        interpretable model with a `fit_statistics` method,
+                        such as TorchRidge or TorchLasso.
+                        Default: False
+            max_samples (int, optional): If provided, the sampling is adaptive,
+                        n_samples is the minimum number of samples and sampling
+                        stops once the coefficients of the interpretable model
+                        stabilise or max_samples samples were evaluated, see
+                        `LimeBase.attribute`.
+                        Default: None
+            refit_every (int, optional): The number of evaluated batches between
+                        the refits of adaptive sampling.
+                        Default: 1
+            convergence_tol (float, optional): The tolerance of the convergence
+                        check of adaptive sampling.
+                        Default: 0.01
+            convergence_criterion (str, optional): Either "values" or "ranking",
+                        the convergence criterion of adaptive sampling.
+                        Default: "values"
+            return_sampling_info (bool, optional): If True, a LimeSamplingInfo
+                        with the number of samples used is returned as the third
+                        element of the output. For multiple examples trained
+                        separately, the numbers of samples are summed.
+                        Default: False
+            time_budget (float, optional): The wall-clock budget of the
+                        sampling in seconds, after which the interpretable model
+                        is fitted on the samples collected so far, see
+                        `LimeBase.attribute`. For multiple examples trained
+                        separately, the budget applies to each example.
+                        Default: None
+            max_forward_calls (int, optional): The maximum number of calls of
+                        the forward function, applied in the same way as
+                        time_budget.
+                        Default: None
+            deduplicate_samples (bool, optional): If True, repeated binary
+                        samples of an example reuse the memoized model output
+                        instead of being evaluated again, see `LimeBase.attribute`.
+                        Default: False
+            exhaustive (bool, optional): If True, every binary sample of the
+                        interpretable features is evaluated exactly once instead
+                        of n_samples random ones, see `LimeBase.attribute`.
+                        Default: False
+            targets (list[int] or str, optional): The output indices, or "all"
+                        for every output of the model, attributed together from
+                        the same samples instead of a single target, see
+                        `LimeBase.attribute`. The attributions and R^2 scores get
+                        a leading target dimension.
+                        Default: None
+            pipeline_depth (int, optional): The number of blocks of perturbed
+                        inputs built by a producer thread ahead of their
+                        evaluation by the model, see `LimeBase.attribute`.
+                        Default: 0
+            futures_in_flight (int, optional): The maximum number of future
+                        outputs of the forward function awaited at the same
+                        time, see `LimeBase.attribute`.
+                        Default: 1
+            keep_training_set (bool, optional): Whether to keep the training
+                        set of the interpretable model in the sampling info, to
+                        refit it later, see `LimeBase.attribute`. Kept only for
+                        a single example.
+                        Default: False
 
         Returns:
             *Tensor* or *tuple[Tensor, ...]* of **attributions**:
@@ -1123,7 +3707,11 @@ class Lime(LimeBase):
                         tensor is returned, containing only the coefficients
                         of the trained interpreatable models, with length
                         num_interp_features.
-            - **R^2** (*Tensor*): R^2 score of the interpretable model on the training data.
+            - **R^2** (*Tensor*): R^2 score of the interpretable model on the training data,
+                        one per target if targets is provided.
+            - **sampling info** (*LimeSamplingInfo*, optional): The number of
+                        samples used and whether adaptive sampling converged.
+                        Returned only if return_sampling_info is True.
         Examples::
 
             >>> # SimpleClassifier takes a single input tensor of size Nx4x4,
@@ -1175,6 +3763,202 @@ class Lime(LimeBase):
             model_postprocessing=model_postprocessing,
             return_input_shape=return_input_shape,
             show_progress=show_progress,
+            streaming_fit=streaming_fit,
+            max_samples=max_samples,
+            refit_every=refit_every,
+            convergence_tol=convergence_tol,
+            convergence_criterion=convergence_criterion,
+            return_sampling_info=return_sampling_info,
+            time_budget=time_budget,
+            max_forward_calls=max_forward_calls,
+            deduplicate_samples=deduplicate_samples,
+            exhaustive=exhaustive,
+            targets=targets,
+            pipeline_depth=pipeline_depth,
+            futures_in_flight=futures_in_flight,
+            keep_training_set=keep_training_set,
+        )
+
+    @log_usage()
+    def attribute_batch(
+        self,
+        inputs: List[Tensor],
+        feature_masks: List[Tensor],
+        target: TargetType = None,
+        n_samples: int = 25,
+        perturbations_per_eval: int = 1,
+        baselines: BaselineType = None,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        return_input_shape: bool = True,
+        show_progress: bool = False,
+        **kwargs,
+    ) -> List[Tuple[Tensor, Tensor]]:
+        """Attributes several inputs at once, sharing the forward calls of the model between them.
+
+        Unlike `attribute` with a batch of examples, which samples and evaluates the examples one after another, the
+        perturbations of all the inputs are interleaved, so every forward call evaluates a block of
+        perturbations_per_eval samples of each input, i.e. len(inputs) * perturbations_per_eval perturbed inputs.
+        The interpretable models of the inputs are still trained independently, each on its own samples.
+
+        Args:
+            inputs (list[Tensor]): The inputs to attribute, each of shape 1 x ... and all of the same shape, so they can
+                be concatenated into a single batch of the model.
+            feature_masks (list[Tensor]): The feature mask of each input, defining its interpretable features.
+            target (int, tuple, Tensor or list, optional): The output index of the model attributed for all the
+                inputs, see `attribute`.
+                Default: None
+            n_samples (int, optional): The number of samples of each input.
+                Default: 25
+            perturbations_per_eval (int, optional): The number of samples of each input evaluated in a single forward
+                call.
+                Default: 1
+            baselines (scalar or Tensor, optional): The baselines shared by all the inputs, see `attribute`.
+                Default: None
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output,
+                see `attribute`.
+                Default: None
+            return_input_shape (bool, optional): Whether to return the attributions in the shape of the inputs or the
+                coefficients of the interpretable models.
+                Default: True
+            show_progress (bool, optional): Whether to show the progress of the forward calls.
+                Default: False
+            **kwargs (Any, optional): Additional arguments of the sampling, transformation and similarity functions.
+
+        Returns:
+            list[tuple[Tensor, Tensor]]: The attributions and the R^2 score of the interpretable model of each input.
+
+        Raises:
+            ValueError: If the number of inputs and feature masks differ, the inputs do not share a single shape with a
+                batch size of 1 or the batched sampling in the interpretable space is not available.
+        """
+        if len(inputs) != len(feature_masks):
+            raise ValueError("Every input must have its own feature mask")
+        if len(inputs) == 0:
+            return []
+        if any(inp.shape != inputs[0].shape for inp in inputs) or inputs[0].shape[0] != 1:
+            raise ValueError("All the inputs must have the same shape with a batch size of 1")
+        if self.batch_perturb_func is None or not self.perturb_interpretable_space:
+            raise ValueError(
+                "Attribution of a batch of inputs requires the batched sampling in the interpretable space"
+            )
+
+        device = inputs[0].device
+        examples = []
+        for inp, feature_mask in zip(inputs, feature_masks):
+            formatted_inputs, formatted_baselines = _format_input_baseline(inp, baselines)
+            formatted_mask, num_interp_features = construct_feature_mask(feature_mask, formatted_inputs)
+            example_kwargs = {
+                **kwargs,
+                "baselines": formatted_baselines[0],
+                "feature_mask": formatted_mask[0],
+                "num_interp_features": num_interp_features,
+            }
+            design = self.batch_perturb_func(inp, n_samples=n_samples, **example_kwargs).to(device)
+            examples.append(
+                (formatted_inputs, formatted_mask, example_kwargs, design, _LimeTrainingSet(n_samples, device))
+            )
+
+        if show_progress:
+            attr_progress = progress(
+                total=math.ceil(n_samples / perturbations_per_eval), desc=f"{self.get_name()} batch attribution"
+            )
+            attr_progress.update(0)
+
+        with torch.no_grad():
+            for start in range(0, n_samples, perturbations_per_eval):
+                blocks = [design[start : start + perturbations_per_eval] for _, _, _, design, _ in examples]
+                block_inputs = [
+                    self._block_model_inputs(block, inp, None, model_postprocessing, **example_kwargs)
+                    for block, inp, (_, _, example_kwargs, _, _) in zip(blocks, inputs, examples)
+                ]
+                n_perturbations = sum(len(block) for block in blocks)
+                # A single forward call evaluates the current block of samples of all the inputs
+                model_out = self._evaluate_model_inputs(
+                    torch.cat([model_inputs for model_inputs, _ in block_inputs]),
+                    n_perturbations,
+                    _expand_target(target, n_perturbations),
+                    None,
+                    device,
+                    model_postprocessing,
+                    torch.cat([mask_inps for _, mask_inps in block_inputs])  # type: ignore
+                    if model_postprocessing is not None
+                    else None,
+                )
+                outputs = model_out.split([len(block) for block in blocks])
+                for block, inp, (model_inputs, _), output, (_, _, example_kwargs, _, training_set) in zip(
+                    blocks, inputs, block_inputs, outputs, examples
+                ):
+                    similarities = self._block_similarities(inp, model_inputs, block, device, **example_kwargs)
+                    training_set.add(block, output, similarities)
+                if show_progress:
+                    attr_progress.update()
+        if show_progress:
+            attr_progress.close()
+
+        results = []
+        interpretable_model = _clone_interpretable_model(self.interpretable_model)
+        for formatted_inputs, formatted_mask, example_kwargs, _, training_set in examples:
+            coefs, r2, _ = self._fit_interpretable_model(training_set, device, interpretable_model)
+            if return_input_shape:
+                results.append(
+                    (
+                        self._convert_output_shape(
+                            formatted_inputs, formatted_mask, coefs, example_kwargs["num_interp_features"], False
+                        ),
+                        r2,
+                    )
+                )
+            else:
+                results.append((coefs, r2))
+        return results
+
+    def plan(
+        self,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        feature_mask: Union[None, Tensor, Tuple[Tensor, ...]] = None,
+        baselines: BaselineType = None,
+        target: TargetType = None,
+        n_samples: int = 25,
+        perturbations_per_eval: int = 1,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
+        **attribute_kwargs,
+    ) -> "AttributionPlan":
+        """Precomputes an attribution plan for repeated attributions of inputs sharing a shape and a feature mask.
+
+        Args:
+            inputs (Tensor or tuple[Tensor, ...]): An example input of the attributions, with a batch size of 1. Only
+                its shape and device are used.
+            feature_mask (Tensor or tuple[Tensor, ...], optional): The feature mask shared by the attributions, see
+                `attribute`.
+                Default: None
+            baselines (scalar, Tensor, tuple of scalar, or Tensor, optional): The baselines shared by the attributions,
+                see `attribute`.
+                Default: None
+            target (int, tuple, Tensor or list, optional): The target of the attributions, see `attribute`.
+                Default: None
+            n_samples (int, optional): The number of samples of each attribution.
+                Default: 25
+            perturbations_per_eval (int, optional): The number of samples evaluated in a single forward call.
+                Default: 1
+            model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+                Default: None
+            **attribute_kwargs (Any, optional): The other arguments of `LimeBase.attribute` shared by the attributions,
+                e.g. max_samples or exhaustive, and the arguments of the sampling, transformation and similarity
+                functions.
+
+        Returns:
+            AttributionPlan: The plan, attributing an input with `AttributionPlan.attribute`.
+        """
+        return AttributionPlan(
+            self,
+            inputs,
+            feature_mask,
+            baselines,
+            target,
+            n_samples,
+            perturbations_per_eval,
+            model_postprocessing,
+            **attribute_kwargs,
         )
 
     def _attribute_kwargs(  # type: ignore
@@ -1189,8 +3973,24 @@ class Lime(LimeBase):
         model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]] = None,
         return_input_shape: bool = True,
         show_progress: bool = False,
+        streaming_fit: bool = False,
+        max_samples: Optional[int] = None,
+        refit_every: int = 1,
+        convergence_tol: float = 0.01,
+        convergence_criterion: str = "values",
+        return_sampling_info: bool = False,
+        time_budget: Optional[float] = None,
+        max_forward_calls: Optional[int] = None,
+        deduplicate_samples: bool = False,
+        exhaustive: bool = False,
+        targets: Union[None, List[int], str] = None,
+        pipeline_depth: int = 0,
+        futures_in_flight: int = 1,
+        keep_training_set: bool = False,
         **kwargs,
-    ) -> tuple[TensorOrTupleOfTensorsGeneric, Tensor]:
+    ) -> Union[
+        Tuple[TensorOrTupleOfTensorsGeneric, Tensor], Tuple[TensorOrTupleOfTensorsGeneric, Tensor, LimeSamplingInfo]
+    ]:
         """Compute the attribute values and R^2 scores for the given inputs.
 
         Args:
@@ -1205,16 +4005,31 @@ class Lime(LimeBase):
             model_postprocessing: The postprocessing function to apply to the model output.
             return_input_shape: Whether to return the output shape in the same format as the input.
             show_progress: Whether to show the progress of the computation.
+            streaming_fit: Whether to fit the interpretable model from statistics updated batch by batch.
+            max_samples: The maximum number of samples of adaptive sampling, None to use exactly n_samples samples.
+            refit_every: The number of evaluated batches between the refits of adaptive sampling.
+            convergence_tol: The tolerance of the convergence check of adaptive sampling.
+            convergence_criterion: The convergence criterion of adaptive sampling, "values" or "ranking".
+            return_sampling_info: Whether to return the sampling information as the third element.
+            time_budget: The wall-clock budget of the sampling of each example in seconds.
+            max_forward_calls: The maximum number of forward calls of each example.
+            deduplicate_samples: Whether to reuse the model outputs of repeated binary samples of each example.
+            exhaustive: Whether to enumerate all the binary samples instead of sampling at random.
+            targets: The output indices attributed together from the same samples, or "all".
+            pipeline_depth: The number of blocks of perturbed inputs built ahead of the model evaluation by a thread.
+            futures_in_flight: The maximum number of future model outputs awaited at the same time.
+            keep_training_set: Whether to keep the training set of a single example in the sampling information.
             **kwargs: Additional keyword arguments.
 
         Returns:
-            A tuple containing the attribute values and the average R^2 score.
+            A tuple containing the attribute values and the average R^2 score, and optionally the sampling information.
         """
         is_inputs_tuple = _is_tuple(inputs)
         formatted_inputs, baselines = _format_input_baseline(inputs, baselines)
         bsz = formatted_inputs[0].shape[0]
 
         feature_mask, num_interp_features = construct_feature_mask(feature_mask, formatted_inputs)
+        assert isinstance(feature_mask, tuple)
 
         if num_interp_features > 10000:
             warnings.warn(
@@ -1229,7 +4044,7 @@ class Lime(LimeBase):
         if bsz > 1:
             test_output = _run_forward(self.forward_func, inputs, target, additional_forward_args, model_postprocessing)
             if isinstance(test_output, Tensor) and torch.numel(test_output) > 1:
-                if torch.numel(test_output) == bsz:
+                if torch.numel(test_output) == bsz or (targets is not None and torch.numel(test_output) % bsz == 0):
                     warnings.warn(
                         "You are providing multiple inputs for Lime / Kernel SHAP "
                         "attributions. This trains a separate interpretable model "
@@ -1238,6 +4053,7 @@ class Lime(LimeBase):
                     )
                     output_list = []
                     output_r2s = []
+                    output_infos = []
                     for (
                         curr_inps,
                         curr_target,
@@ -1252,7 +4068,7 @@ class Lime(LimeBase):
                         baselines,
                         feature_mask,
                     ):
-                        coefs, r2s = super().attribute.__wrapped__(
+                        coefs, r2s, info = super().attribute.__wrapped__(
                             self,
                             inputs=curr_inps if is_inputs_tuple else curr_inps[0],
                             target=curr_target,
@@ -1264,9 +4080,32 @@ class Lime(LimeBase):
                             num_interp_features=num_interp_features,
                             model_postprocessing=model_postprocessing,
                             show_progress=show_progress,
+                            streaming_fit=streaming_fit,
+                            max_samples=max_samples,
+                            refit_every=refit_every,
+                            convergence_tol=convergence_tol,
+                            convergence_criterion=convergence_criterion,
+                            return_sampling_info=True,
+                            time_budget=time_budget,
+                            max_forward_calls=max_forward_calls,
+                            deduplicate_samples=deduplicate_samples,
+                            exhaustive=exhaustive,
+                            targets=targets,
+                            pipeline_depth=pipeline_depth,
+                            futures_in_flight=futures_in_flight,
                             **kwargs,
                         )
-                        if return_input_shape:
+                        if return_input_shape and targets is not None:
+                            output_list.append(
+                                self._convert_targets_output_shape(
+                                    curr_inps,
+                                    curr_feature_mask,
+                                    coefs,
+                                    num_interp_features,
+                                    is_inputs_tuple,
+                                )
+                            )
+                        elif return_input_shape:
                             output_list.append(
                                 self._convert_output_shape(
                                     curr_inps,
@@ -1276,11 +4115,27 @@ class Lime(LimeBase):
                                     is_inputs_tuple,
                                 )
                             )
+                        elif targets is not None:
+                            output_list.append(coefs.unsqueeze(1))
                         else:
                             output_list.append(coefs.reshape(1, -1))
                         output_r2s.append(r2s)
+                        output_infos.append(info)
 
-                    return _reduce_list(output_list), sum(output_r2s) / len(output_r2s)
+                    # With multiple targets the examples follow the leading target dimension
+                    output = (
+                        _reduce_list(output_list)
+                        if targets is None
+                        else _reduce_list(output_list, lambda tensors: torch.cat(tensors, dim=1))
+                    )
+                    if return_sampling_info:
+                        sampling_info = LimeSamplingInfo(
+                            sum(info.n_samples for info in output_infos),
+                            all(info.converged for info in output_infos),
+                            any(info.truncated for info in output_infos),
+                        )
+                        return output, torch.stack(output_r2s).mean(dim=0), sampling_info
+                    return output, torch.stack(output_r2s).mean(dim=0)
                 else:
                     raise AssertionError(
                         "Invalid number of outputs, forward function should return a"
@@ -1291,7 +4146,7 @@ class Lime(LimeBase):
                     "Perturbations per eval must be 1 when forward function" "returns single value per batch!"
                 )
 
-        coefs, r2s = super().attribute.__wrapped__(
+        coefs, r2s, sampling_info = super().attribute.__wrapped__(
             self,
             inputs=inputs,
             target=target,
@@ -1303,18 +4158,70 @@ class Lime(LimeBase):
             model_postprocessing=model_postprocessing,
             num_interp_features=num_interp_features,
             show_progress=show_progress,
+            streaming_fit=streaming_fit,
+            max_samples=max_samples,
+            refit_every=refit_every,
+            convergence_tol=convergence_tol,
+            convergence_criterion=convergence_criterion,
+            return_sampling_info=True,
+            time_budget=time_budget,
+            max_forward_calls=max_forward_calls,
+            deduplicate_samples=deduplicate_samples,
+            exhaustive=exhaustive,
+            targets=targets,
+            pipeline_depth=pipeline_depth,
+            futures_in_flight=futures_in_flight,
+            keep_training_set=keep_training_set,
             **kwargs,
         )
-        if return_input_shape:
-            return self._convert_output_shape(
+        attributions: TensorOrTupleOfTensorsGeneric = coefs
+        if return_input_shape and targets is not None:
+            attributions = self._convert_targets_output_shape(
                 formatted_inputs,
                 feature_mask,
                 coefs,
                 num_interp_features,
                 is_inputs_tuple,
-            ), r2s
-        else:
-            return coefs, r2s
+            )
+        elif return_input_shape:
+            attributions = self._convert_output_shape(
+                formatted_inputs,
+                feature_mask,
+                coefs,
+                num_interp_features,
+                is_inputs_tuple,
+            )
+        if return_sampling_info:
+            return attributions, r2s, sampling_info
+        return attributions, r2s
+
+    def _convert_targets_output_shape(
+        self,
+        formatted_inp: Tuple[Tensor, ...],
+        feature_mask: Tuple[Tensor, ...],
+        coefs: Tensor,
+        num_interp_features: int,
+        is_inputs_tuple: bool,
+    ) -> Union[Tensor, Tuple[Tensor, ...]]:
+        """This method converts the outputs of the interpretable models of multiple targets to match the input shape,
+        with a leading target dimension.
+
+        Args:
+            formatted_inp (Tuple[Tensor, ...]): Formatted input tensors.
+            feature_mask (Tuple[Tensor, ...]): Tuple of feature masks.
+            coefs (Tensor): Coefficients of the interpretable models, shape num_targets x num_interp_features.
+            num_interp_features (int): Number of interpretable features.
+            is_inputs_tuple (bool): Whether inputs are a tuple.
+
+        Returns:
+            Union[Tensor, Tuple[Tensor, ...]]: The coefficients of the interpretable models reshaped to
+            num_targets x input shape.
+        """
+        per_target = [
+            self._convert_output_shape(formatted_inp, feature_mask, target_coefs, num_interp_features, True)
+            for target_coefs in coefs
+        ]
+        return _format_output(is_inputs_tuple, tuple(torch.stack(attr) for attr in zip(*per_target)))
 
     @typing.overload
     def _convert_output_shape(  # type: ignore
@@ -1381,9 +4288,144 @@ class Lime(LimeBase):
             Union[Tensor, Tuple[Tensor, ...]]: The coefficients of the interpretable model
             reshaped to match the input shape.
         """
-        coefs = coefs.flatten()
-        attr = [torch.zeros_like(single_inp, dtype=torch.float) for single_inp in formatted_inp]
-        for tensor_ind in range(len(formatted_inp)):
-            for single_feature in range(num_interp_features):
-                attr[tensor_ind] += coefs[single_feature].item() * (feature_mask[tensor_ind] == single_feature).float()
-        return _format_output(is_inputs_tuple, tuple(attr))
+        coefs = coefs.flatten()[:num_interp_features]
+        # The attributions take the floating point dtype of their input, integer inputs get float attributions
+        attr = tuple(
+            expand_values_by_mask(
+                coefs.to(
+                    device=single_inp.device,
+                    dtype=single_inp.dtype if single_inp.is_floating_point() else torch.float,
+                ),
+                single_mask,
+            )
+            .expand_as(single_inp)
+            .contiguous()
+            for single_inp, single_mask in zip(formatted_inp, feature_mask)
+        )
+        return _format_output(is_inputs_tuple, attr)
+
+
+class AttributionPlan:
+    """Attribution plan of repeated LIME attributions of inputs sharing a shape and a feature mask.
+
+    Everything that depends only on the shape of the inputs, the feature mask and the model is computed once, when the
+    plan is created: the formatted and shifted feature mask, the number of interpretable features, the formatted
+    baselines and the conversion of the coefficients to the input shape, with a leading target dimension if multiple
+    targets are attributed. Each attribution then only samples, evaluates the model and fits the interpretable model.
+    Create it with `Lime.plan`.
+
+    Args:
+        lime (Lime): The Lime attribution method.
+        inputs (Tensor or tuple[Tensor, ...]): An example input of the attributions, with a batch size of 1.
+        feature_mask (Tensor or tuple[Tensor, ...], optional): The feature mask shared by the attributions.
+        baselines (scalar, Tensor, tuple of scalar, or Tensor, optional): The baselines shared by the attributions.
+        target (int, tuple, Tensor or list, optional): The target of the attributions.
+        n_samples (int): The number of samples of each attribution.
+        perturbations_per_eval (int): The number of samples evaluated in a single forward call.
+        model_postprocessing (Callable[[Tensor, Tensor], Tensor], optional): The postprocessing of the model output.
+        **attribute_kwargs (Any): The other arguments of `LimeBase.attribute` shared by the attributions.
+
+    Raises:
+        ValueError: If the example input has a batch size other than 1.
+    """
+
+    def __init__(
+        self,
+        lime: Lime,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        feature_mask: Union[None, Tensor, Tuple[Tensor, ...]],
+        baselines: BaselineType,
+        target: TargetType,
+        n_samples: int,
+        perturbations_per_eval: int,
+        model_postprocessing: Optional[Callable[[Tensor, Tensor], Tensor]],
+        **attribute_kwargs,
+    ) -> None:
+        self.lime = lime
+        self.is_inputs_tuple = _is_tuple(inputs)
+        formatted_inputs, formatted_baselines = _format_input_baseline(inputs, baselines)
+        if formatted_inputs[0].shape[0] != 1:
+            raise ValueError("An attribution plan attributes a single example, the batch size of inputs must be 1")
+        self.input_shapes = tuple(inp.shape for inp in formatted_inputs)
+        self.feature_mask, self.num_interp_features = construct_feature_mask(feature_mask, formatted_inputs)
+        self.baselines = formatted_baselines
+        self.target = target
+        self.n_samples = n_samples
+        self.perturbations_per_eval = perturbations_per_eval
+        self.model_postprocessing = model_postprocessing
+        self.attribute_kwargs = attribute_kwargs
+        # The coefficients of multiple targets are reshaped per target, with a leading target dimension
+        self.convert_output_shape: Callable[..., Union[Tensor, Tuple[Tensor, ...]]] = lime._convert_output_shape
+        if attribute_kwargs.get("targets") is not None:
+            self.convert_output_shape = lime._convert_targets_output_shape
+
+    @typing.overload
+    def attribute(
+        self,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        return_input_shape: bool = True,
+        return_sampling_info: Literal[False] = False,
+    ) -> Tuple[TensorOrTupleOfTensorsGeneric, Tensor]: ...
+
+    @typing.overload
+    def attribute(
+        self,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        return_input_shape: bool = True,
+        *,
+        return_sampling_info: Literal[True],
+    ) -> Tuple[TensorOrTupleOfTensorsGeneric, Tensor, LimeSamplingInfo]: ...
+
+    def attribute(
+        self,
+        inputs: TensorOrTupleOfTensorsGeneric,
+        return_input_shape: bool = True,
+        return_sampling_info: bool = False,
+    ) -> Union[
+        Tuple[TensorOrTupleOfTensorsGeneric, Tensor], Tuple[TensorOrTupleOfTensorsGeneric, Tensor, LimeSamplingInfo]
+    ]:
+        """Attributes an input with the plan.
+
+        Args:
+            inputs (Tensor or tuple[Tensor, ...]): The input to attribute, of the same shape as the example input of
+                the plan.
+            return_input_shape (bool, optional): Whether to return the attributions in the shape of the input or the
+                coefficients of the interpretable model.
+                Default: True
+            return_sampling_info (bool, optional): Whether to return the sampling information as the third element.
+                Default: False
+
+        Returns:
+            The attributions and the R^2 score of the interpretable model, and optionally the sampling information,
+            as returned by `Lime.attribute`.
+
+        Raises:
+            ValueError: If the input does not have the shape of the example input of the plan.
+        """
+        formatted_inputs = _format_tensor_into_tuples(inputs)
+        if tuple(inp.shape for inp in formatted_inputs) != self.input_shapes:
+            raise ValueError(
+                f"The attribution plan was created for inputs of shapes {self.input_shapes}, "
+                f"got {tuple(inp.shape for inp in formatted_inputs)}"
+            )
+        coefs, r2, sampling_info = LimeBase.attribute.__wrapped__(  # type: ignore
+            self.lime,
+            inputs=inputs,
+            target=self.target,
+            n_samples=self.n_samples,
+            perturbations_per_eval=self.perturbations_per_eval,
+            model_postprocessing=self.model_postprocessing,
+            return_sampling_info=True,
+            baselines=self.baselines if self.is_inputs_tuple else self.baselines[0],
+            feature_mask=self.feature_mask if self.is_inputs_tuple else self.feature_mask[0],
+            num_interp_features=self.num_interp_features,
+            **self.attribute_kwargs,
+        )
+        attributions: TensorOrTupleOfTensorsGeneric = coefs
+        if return_input_shape:
+            attributions = self.convert_output_shape(
+                formatted_inputs, self.feature_mask, coefs, self.num_interp_features, self.is_inputs_tuple
+            )
+        if return_sampling_info:
+            return attributions, r2, sampling_info
+        return attributions, r2
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple, TextIO
+
+from loguru import logger
+from typing_extensions import Any, Iterable, Iterator, Literal
+
+import numpy as np
+import torch
+
+from meteors import HSI
+from meteors.lime import HSIAttributes, HSISpectralAttributes, Lime
+
+MANIFEST_NAME = "manifest.jsonl"
+ATTRIBUTIONS_DIR = "attributions"
+
+
+class RunSummary(NamedTuple):
+    """The outcome of an `ExplanationRunner.run`.
+
+    Attributes:
+        completed (list[str]): The keys of the images explained by the run.
+        skipped (list[str]): The keys of the images already explained by a previous run.
+        failed (list[str]): The keys of the images whose explanation raised an error.
+    """
+
+    completed: list[str]
+    skipped: list[str]
+    failed: list[str]
+
+
+class _RunnerSettings(NamedTuple):
+    """The part of the runner sent once to each worker process."""
+
+    explainer: Lime
+    method: Literal["spatial", "spectral"]
+    attribute_params: dict[str, Any]
+    wavelengths: Any
+    orientation: tuple[str, str, str]
+
+
+# The settings of a worker process of an `ExplanationRunner`
+_worker_settings: _RunnerSettings | None = None
+
+
+def _init_runner_worker(settings: _RunnerSettings) -> None:
+    """Installs the settings of the runner in a worker process."""
+    global _worker_settings
+    _worker_settings = settings
+
+
+def load_hsi(path: str | Path, wavelengths: Any = None, orientation: tuple[str, str, str] = ("C", "H", "W")) -> HSI:
+    """Loads a hyperspectral cube saved with NumPy.
+
+    A `.npy` file holds the image only, a `.npz` file holds the image under the `image` key and optionally the
+    `wavelengths` and the `binary_mask` of the image.
+
+    Args:
+        path (str | Path): The path of the `.npy` or `.npz` file.
+        wavelengths (Any, optional): The wavelengths of the image, used if the file does not provide them.
+            Defaults to None.
+        orientation (tuple[str, str, str], optional): The orientation of the image. Defaults to ("C", "H", "W").
+
+    Returns:
+        HSI: The loaded hyperspectral image.
+
+    Raises:
+        ValueError: If the file is neither a `.npy` nor a `.npz` file, or no wavelengths are available.
+    """
+    path = Path(path)
+    binary_mask = None
+    if path.suffix == ".npy":
+        image = np.load(path)
+    elif path.suffix == ".npz":
+        with np.load(path) as data:
+            image = data["image"]
+            if "wavelengths" in data:
+                wavelengths = data["wavelengths"]
+            if "binary_mask" in data:
+                binary_mask = data["binary_mask"]
+    else:
+        raise ValueError(f"Unsupported file format of {path}, expected a .npy or .npz file")
+    if wavelengths is None:
+        raise ValueError(f"The wavelengths of {path} must be provided")
+    return HSI(image=image, wavelengths=wavelengths, orientation=orientation, binary_mask=binary_mask)
+
+
+def _attributes_record(attributes: HSIAttributes) -> dict[str, Any]:
+    """Extracts the explanation of an image from the attributes, without the image itself."""
+    record: dict[str, Any] = {
+        "attributes": attributes.attributes.cpu(),
+        "mask": attributes.mask.cpu() if attributes.mask is not None else None,
+        "score": attributes.score,
+        "n_samples": attributes.n_samples,
+        "truncated": attributes.truncated,
+    }
+    if isinstance(attributes, HSISpectralAttributes):
+        record["band_names"] = attributes.band_names
+    return record
+
+
+def _explain_item(key: str, source: HSI | Path, output_path: Path, settings: _RunnerSettings) -> dict[str, Any]:
+    """Explains a single image and writes its explanation to the output path.
+
+    Args:
+        key (str): The key of the image.
+        source (HSI | Path): The image or the path of the file it is loaded from.
+        output_path (Path): The path the explanation is written to.
+        settings (_RunnerSettings): The settings of the runner.
+
+    Returns:
+        dict[str, Any]: The manifest record of the image.
+    """
+    hsi = source if isinstance(source, HSI) else load_hsi(source, settings.wavelengths, settings.orientation)
+    if settings.method == "spatial":
+        result = settings.explainer.get_spatial_attributes(hsi, **settings.attribute_params)
+    else:
+        result = settings.explainer.get_spectral_attributes(hsi, **settings.attribute_params)
+    results = result if isinstance(result, list) else [result]
+    records = [_attributes_record(attributes) for attributes in results]
+
+    # Written to a temporary file first, so an interrupted run never leaves a partial explanation behind
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    torch.save(records if isinstance(result, list) else records[0], tmp_path)
+    os.replace(tmp_path, output_path)
+    return {
+        "key": key,
+        "status": "done",
+        "output": str(output_path),
+        "score": [record["score"] for record in records],
+        "n_samples": results[0].n_samples,
+    }
+
+
+def _explain_item_in_worker(key: str, source: HSI | Path, output_path: Path) -> dict[str, Any]:
+    """Explains a single image in a worker process, see `_explain_item`."""
+    if _worker_settings is None:
+        raise RuntimeError("The worker has not received the settings of the runner")
+    return _explain_item(key, source, output_path, _worker_settings)
+
+
+class ExplanationRunner:
+    """Explains a whole dataset of hyperspectral images with LIME, one explanation per image.
+
+    The explanations are scheduled across worker processes and written to disk as soon as they are finished, each image
+    to its own file in the `attributions` directory of `output_dir`. Every finished image is recorded in the
+    `manifest.jsonl` file of `output_dir`, so a run interrupted at any point is resumed by running it again with the
+    same output directory, skipping the images already explained. Images whose explanation raises an error are recorded
+    as failed and retried by the next run.
+
+    Args:
+        explainer (Lime): The explainer, sent to each worker process once.
+        output_dir (str | Path): The directory of the manifest and the explanations.
+        method (Literal["spatial", "spectral"], optional): Whether to call `get_spatial_attributes` or
+            `get_spectral_attributes` of the explainer. Defaults to "spatial".
+        n_workers (int, optional): The number of worker processes. With 1 worker the images are explained in the
+            calling process. Defaults to 1.
+        mp_context (multiprocessing.context.BaseContext, optional): The multiprocessing context starting the workers.
+            With the `spawn` or `forkserver` start methods the explainer and the images must be picklable.
+            Defaults to the default context of the platform.
+        **attribute_params (Any): The keyword arguments passed with each image to the attribution method, e.g.
+            `segmentation_method` or `n_samples`.
+
+    Raises:
+        ValueError: If the method is neither "spatial" nor "spectral" or n_workers is smaller than 1.
+
+    Examples:
+        >>> runner = ExplanationRunner(lime, "explanations", n_workers=8, segmentation_method="slic", n_samples=50)
+        >>> summary = runner.run("tiles/", wavelengths=wavelengths)
+        >>> len(summary.completed)
+        10000
+    """
+
+    def __init__(
+        self,
+        explainer: Lime,
+        output_dir: str | Path,
+        method: Literal["spatial", "spectral"] = "spatial",
+        n_workers: int = 1,
+        mp_context: Any = None,
+        **attribute_params: Any,
+    ):
+        if method not in ("spatial", "spectral"):
+            raise ValueError(f"method must be either 'spatial' or 'spectral', got {method}")
+        if n_workers < 1:
+            raise ValueError("n_workers must be a positive integer")
+        self.explainer = explainer
+        self.output_dir = Path(output_dir)
+        self.method = method
+        self.n_workers = n_workers
+        self.mp_context = mp_context
+        self.attribute_params = attribute_params
+
+    @property
+    def manifest_path(self) -> Path:
+        """The path of the manifest of the finished images."""
+        return self.output_dir / MANIFEST_NAME
+
+    def completed(self) -> dict[str, dict[str, Any]]:
+        """Reads the manifest records of the images explained so far.
+
+        Returns:
+            dict[str, dict[str, Any]]: The last record of every successfully explained image, by key.
+        """
+        records: dict[str, dict[str, Any]] = {}
+        if not self.manifest_path.exists():
+            return records
+        with open(self.manifest_path) as manifest:
+            for line in manifest:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut by an interruption of the run
+                    logger.debug("Skipping a malformed line of the manifest")
+                    continue
+                if record.get("status") == "done":
+                    records[record["key"]] = record
+                else:
+                    records.pop(record["key"], None)
+        return records
+
+    def _output_path(self, key: str) -> Path:
+        return self.output_dir / ATTRIBUTIONS_DIR / f"{key}.pt"
+
+    @staticmethod
+    def _iter_items(items: Iterable[HSI | tuple[str, HSI]] | str | Path) -> Iterator[tuple[str, HSI | Path]]:
+        """Yields the key and the image or file of every item, keyed by the path relative to a directory or by the
+        position in an iterable of images."""
+        if isinstance(items, (str, Path)):
+            directory = Path(items)
+            if not directory.is_dir():
+                raise ValueError(f"{directory} is not a directory")
+            for path in sorted(directory.rglob("*")):
+                if path.suffix in (".npy", ".npz") and path.is_file():
+                    yield path.relative_to(directory).with_suffix("").as_posix(), path
+            return
+        for idx, item in enumerate(items):
+            if isinstance(item, HSI):
+                yield f"{idx:06d}", item
+            else:
+                yield str(item[0]), item[1]
+
+    def _write_record(self, manifest: TextIO, record: dict[str, Any]) -> None:
+        # Flushed and synced line by line, so the manifest is never behind the written explanations
+        manifest.write(json.dumps(record) + "\n")
+        manifest.flush()
+        os.fsync(manifest.fileno())
+
+    def run(
+        self,
+        items: Iterable[HSI | tuple[str, HSI]] | str | Path,
+        wavelengths: Any = None,
+        orientation: tuple[str, str, str] = ("C", "H", "W"),
+        max_pending: int | None = None,
+    ) -> RunSummary:
+        """Explains the images not explained by a previous run with the same output directory.
+
+        Args:
+            items (Iterable[HSI | tuple[str, HSI]] | str | Path): The images, either a directory searched recursively
+                for `.npy` and `.npz` cubes, keyed by their path relative to the directory, or an iterable of images,
+                keyed by their position, or of (key, image) pairs. The keys must be stable between the runs for the
+                resume to skip the right images. The iterable is consumed lazily.
+            wavelengths (Any, optional): The wavelengths of the cubes loaded from a directory that do not provide them,
+                see `load_hsi`. Defaults to None.
+            orientation (tuple[str, str, str], optional): The orientation of the cubes loaded from a directory.
+                Defaults to ("C", "H", "W").
+            max_pending (int | None, optional): The maximum number of images submitted to the workers and not
+                finished yet, which bounds the images held in memory. Defaults to twice the number of workers.
+
+        Returns:
+            RunSummary: The keys of the completed, skipped and failed images.
+
+        Raises:
+            ValueError: If the same key appears twice or `items` is a path that is not a directory.
+        """
+        settings = _RunnerSettings(self.explainer, self.method, self.attribute_params, wavelengths, orientation)
+        finished = {key for key, record in self.completed().items() if Path(record["output"]).exists()}
+        summary = RunSummary([], [], [])
+        seen: set[str] = set()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        def handle(manifest: TextIO, key: str, record: dict[str, Any] | None, error: BaseException | None) -> None:
+            if error is not None:
+                logger.warning(f"Explanation of {key} failed: {error!r}")
+                record = {"key": key, "status": "failed", "error": repr(error)}
+                summary.failed.append(key)
+            else:
+                summary.completed.append(key)
+            assert record is not None
+            self._write_record(manifest, record)
+
+        with open(self.manifest_path, "a") as manifest:
+            if self.n_workers == 1:
+                for key, source in self._iter_items(items):
+                    if self._skip(key, seen, finished, summary):
+                        continue
+                    try:
+                        record = _explain_item(key, source, self._output_path(key), settings)
+                    except Exception as error:
+                        handle(manifest, key, None, error)
+                    else:
+                        handle(manifest, key, record, None)
+                return summary
+
+            max_pending = max_pending if max_pending is not None else 2 * self.n_workers
+            with concurrent.futures.ProcessPoolExecutor(
+                self.n_workers, mp_context=self.mp_context, initializer=_init_runner_worker, initargs=(settings,)
+            ) as executor:
+                pending: dict[concurrent.futures.Future, str] = {}
+
+                def collect(return_when: str) -> None:
+                    done, _ = concurrent.futures.wait(pending, return_when=return_when)
+                    for future in done:
+                        key = pending.pop(future)
+                        error = future.exception()
+                        handle(manifest, key, None if error is not None else future.result(), error)
+
+                for key, source in self._iter_items(items):
+                    if self._skip(key, seen, finished, summary):
+                        continue
+                    if len(pending) >= max_pending:
+                        collect(concurrent.futures.FIRST_COMPLETED)
+                    future = executor.submit(_explain_item_in_worker, key, source, self._output_path(key))
+                    pending[future] = key
+                if pending:
+                    collect(concurrent.futures.ALL_COMPLETED)
+        return summary
+
+    @staticmethod
+    def _skip(key: str, seen: set[str], finished: set[str], summary: RunSummary) -> bool:
+        """Checks whether an item was already explained, recording it as skipped."""
+        if key in seen:
+            raise ValueError(f"The key {key} appears more than once")
+        seen.add(key)
+        if key in finished:
+            summary.skipped.append(key)
+            return True
+        return False
@@ -1,20 +1,28 @@
 from .models import (
     InterpretableModel,
     ExplainableModel,
+    ForwardBroker,
+    ForwardCache,
     SkLearnLasso,
     SkLearnRidge,
     SkLearnLinearRegression,
     SkLearnLogisticRegression,
     SkLearnSGDClassifier,
+    TorchLasso,
+    TorchRidge,
 )
 
 
 __all__ = [
     "InterpretableModel",
     "ExplainableModel",
+    "ForwardBroker",
+    "ForwardCache",
     "SkLearnLasso",
     "SkLearnRidge",
     "SkLearnLinearRegression",
     "SkLearnLogisticRegression",
     "SkLearnSGDClassifier",
+    "TorchLasso",
+    "TorchRidge",
 ]
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
-from typing import Callable
+from typing import Any, Callable
 from abc import ABC, abstractmethod
 
+import functools
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
 import torch
 import warnings
+import numpy as np
 import torch.nn as nn
 from captum._utils.models.linear_model.train import sklearn_train_linear_model
 
@@ -86,6 +94,450 @@ class ExplainableModel:
         return self
 
 
+class ForwardBroker:
+    """A forward function merging the batches of concurrent explanations into shared forward calls of a model.
+
+    The broker is used in place of the forward function of the model, e.g. as the `forward_func` of the
+    `ExplainableModel` of several explainers or of an explainer called from several threads. Every call queues its batch
+    and immediately returns a `torch.futures.Future` of its output. A background thread takes the queued batches,
+    concatenated along the first dimension, up to `max_batch_size` samples or until `max_delay` seconds passed since
+    the first of them, evaluates the model once and routes the slices of the output back to the futures of the
+    calls. A single batch larger than `max_batch_size` is evaluated on its own.
+
+    Args:
+        forward_func (Callable): The forward function of the model, called with the merged input tensors and returning
+            a tensor with one row per sample.
+        max_batch_size (int, optional): The maximum number of samples of a merged forward call. Defaults to 256.
+        max_delay (float, optional): The maximum time in seconds a batch waits for others to be merged with.
+            Defaults to 0.005.
+
+    Attributes:
+        n_requests (int): The number of batches evaluated so far.
+        n_forward_calls (int): The number of forward calls of the model so far.
+
+    Raises:
+        ValueError: If max_batch_size is smaller than 1 or max_delay is negative.
+
+    Examples:
+        >>> with ForwardBroker(model, max_batch_size=128) as broker:
+        >>>     explainer = Lime(ExplainableModel(broker, "classification"))
+        >>> # explanations run concurrently, e.g. in a thread pool, share the forward calls of the model
+    """
+
+    def __init__(
+        self, forward_func: Callable[..., torch.Tensor], max_batch_size: int = 256, max_delay: float = 0.005
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+        if max_delay < 0:
+            raise ValueError("max_delay must be non-negative")
+        self.forward_func = forward_func
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.n_requests = 0
+        self.n_forward_calls = 0
+        self._requests: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def __call__(self, *inputs: torch.Tensor) -> torch.futures.Future:
+        """Queues a batch of inputs.
+
+        Args:
+            *inputs (torch.Tensor): The input tensors of the batch, with the samples along the first dimension.
+
+        Returns:
+            torch.futures.Future: The future of the output of the model on the batch.
+
+        Raises:
+            RuntimeError: If the broker is closed.
+        """
+        future: torch.futures.Future = torch.futures.Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The broker is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, daemon=True)
+                self._thread.start()
+            self._requests.put((inputs, future))
+        return future
+
+    def _serve(self) -> None:
+        """Merges the queued batches and evaluates them until the broker is closed."""
+        pending = None
+        stopping = False
+        while not stopping:
+            first = pending if pending is not None else self._requests.get()
+            pending = None
+            if first is None:
+                return
+            batch = [first]
+            size = len(first[0][0])
+            deadline = time.monotonic() + self.max_delay
+            while size < self.max_batch_size:
+                try:
+                    request = self._requests.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    # The batches queued before closing are still evaluated
+                    stopping = True
+                    break
+                if size + len(request[0][0]) > self.max_batch_size:
+                    pending = request
+                    break
+                batch.append(request)
+                size += len(request[0][0])
+            self._evaluate(batch)
+
+    def _evaluate(self, batch: list[tuple[tuple[torch.Tensor, ...], torch.futures.Future]]) -> None:
+        """Evaluates the model once on merged batches and sets the futures of the batches.
+
+        Args:
+            batch (list[tuple[tuple[torch.Tensor, ...], torch.futures.Future]]): The inputs and futures of the batches.
+        """
+        sizes = [len(inputs[0]) for inputs, _ in batch]
+        try:
+            # Gradient mode is thread local
+            with torch.no_grad():
+                merged = [torch.cat(tensors) for tensors in zip(*(inputs for inputs, _ in batch))]
+                output = self.forward_func(*merged)
+                if isinstance(output, torch._C.Future):
+                    output = output.wait()
+            if output.ndim == 0 or output.shape[0] != sum(sizes):
+                raise ValueError(f"The model output of shape {tuple(output.shape)} has no row for each of the samples")
+            outputs = output.split(sizes)
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        finally:
+            self.n_requests += len(batch)
+            self.n_forward_calls += 1
+        for (_, future), batch_output in zip(batch, outputs):
+            future.set_result(batch_output)
+
+    def close(self) -> None:
+        """Evaluates the batches queued so far and stops the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._requests.put(None)
+            thread.join()
+
+    def __enter__(self) -> ForwardBroker:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ForwardCache:
+    """A forward function storing the outputs of a model in a local sqlite file, so the samples evaluated by earlier
+    explanations are not evaluated again.
+
+    The cache is used in place of the forward function of the model, like `ForwardBroker`. Called directly, it keys
+    every sample by a content hash of its input and by the version of the model. The batched LIME sampling instead
+    hashes the hsi, the feature mask and the baselines once per explanation with `scope` and keys every sample by that
+    hash and its bit-packed interpretable sample, see `keyed`, so the perturbed images are never hashed. Either way,
+    explaining the same image again with another surrogate evaluates only the samples not seen before. The file is
+    shared by all the processes opening it, and once the stored outputs exceed `max_size` bytes, the least recently used
+    ones are evicted. The times the outputs are used are written in batches, with the next stored outputs, so the
+    recency of the outputs read by other processes may lag behind.
+
+    Args:
+        forward_func (Callable): The forward function of the model, called with the input tensors of the samples not
+            found in the cache and returning a tensor with one row per sample.
+        path (str | os.PathLike): The path of the sqlite file, created if it does not exist.
+        model_version (str): The version of the model, part of every key. It must change whenever the outputs of the
+            model change, e.g. when its weights are updated.
+        max_size (int, optional): The maximum size in bytes of the stored outputs. Defaults to 2**30.
+
+    Attributes:
+        n_hits (int): The number of samples whose output was read from the cache.
+        n_misses (int): The number of samples evaluated by the model.
+
+    Raises:
+        ValueError: If max_size is not positive.
+
+    Examples:
+        >>> with ForwardCache(model, "outputs.sqlite", model_version="v3") as cache:
+        >>>     explainer = Lime(ExplainableModel(cache, "classification"))
+        >>>     attributes = explainer.get_spatial_attributes(hsi, segmentation_mask, n_samples=1000)
+    """
+
+    # The number of used outputs whose time is kept in memory before it is written without waiting for a store
+    MAX_PENDING_USES = 4096
+
+    def __init__(
+        self,
+        forward_func: Callable[..., torch.Tensor],
+        path: str | os.PathLike,
+        model_version: str,
+        max_size: int = 2**30,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self.forward_func = forward_func
+        self.path = os.fspath(path)
+        self.model_version = model_version
+        self.max_size = max_size
+        self.n_hits = 0
+        self.n_misses = 0
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._pending_uses: dict[bytes, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens the sqlite file on first use, creating the table of the outputs and the running total of their size."""
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            # Readers of other processes are not blocked by the writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                "key BLOB PRIMARY KEY, dtype TEXT, shape TEXT, value BLOB, size INTEGER, last_used REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS outputs_last_used ON outputs (last_used)")
+            # The total size is kept up to date by triggers, so a store does not sum the sizes of all the outputs
+            connection.execute("CREATE TABLE IF NOT EXISTS outputs_size (total INTEGER)")
+            connection.execute(
+                "INSERT INTO outputs_size SELECT COALESCE(SUM(size), 0) FROM outputs "
+                "WHERE NOT EXISTS (SELECT 1 FROM outputs_size)"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS outputs_insert AFTER INSERT ON outputs "
+                "BEGIN UPDATE outputs_size SET total = total + NEW.size; END"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS outputs_delete AFTER DELETE ON outputs "
+                "BEGIN UPDATE outputs_size SET total = total - OLD.size; END"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def scope(self, *values: Any) -> bytes:
+        """Hashes the parts of an explanation shared by all its samples, once per explanation.
+
+        Args:
+            *values (Any): The values the perturbed inputs are built from, e.g. the hsi, the feature mask and the
+                baselines. Tensors, possibly nested in tuples, lists or dicts, are hashed by content, other values by
+                their representation.
+
+        Returns:
+            bytes: The hash of the values and the version of the model, passed to `keyed`.
+        """
+        scope_hash = hashlib.blake2b(self.model_version.encode(), digest_size=16)
+        _update_hash(scope_hash, values)
+        return scope_hash.digest()
+
+    def keyed(self, scope: bytes, samples: torch.Tensor) -> Callable[..., torch.Tensor]:
+        """Returns the forward function of a batch of interpretable samples, storing the outputs under the scope of the
+        explanation followed by the bit-packed samples instead of the hash of their inputs.
+
+        Args:
+            scope (bytes): The hash of the explanation returned by `scope`.
+            samples (torch.Tensor): The interpretable samples, shape batch_size x num_interp_features, in the order of
+                the inputs the returned function is called with.
+
+        Returns:
+            Callable[..., torch.Tensor]: The forward function, called like the cache itself. Samples that are not
+            binary are keyed by the hash of their inputs, so the cache itself is returned.
+        """
+        rows = samples.detach().cpu().numpy()
+        if not ((rows == 0) | (rows == 1)).all():
+            return self
+        keys = [scope + row.tobytes() for row in np.packbits(rows.astype(bool), axis=1)]
+        return functools.partial(self._evaluate, keys)
+
+    def _keys(self, inputs: tuple[torch.Tensor, ...]) -> list[bytes]:
+        """Hashes the inputs of every sample together with the version of the model.
+
+        Args:
+            inputs (tuple[torch.Tensor, ...]): The input tensors, with the samples along the first dimension.
+
+        Returns:
+            list[bytes]: The key of every sample.
+        """
+        hashes = [hashlib.blake2b(self.model_version.encode(), digest_size=16) for _ in range(len(inputs[0]))]
+        for tensor in inputs:
+            header = f"{tensor.dtype}{tuple(tensor.shape[1:])}".encode()
+            # Reinterpreted as bytes, so any dtype is hashed without a conversion
+            rows = tensor.detach().cpu().contiguous().reshape(len(tensor), -1).view(torch.uint8).numpy()
+            for sample_hash, row in zip(hashes, rows):
+                sample_hash.update(header)
+                sample_hash.update(row)
+        return [sample_hash.digest() for sample_hash in hashes]
+
+    def _load(self, keys: list[bytes]) -> dict[bytes, torch.Tensor]:
+        """Reads the stored outputs of the keys, their use is written later, see `_write_uses`.
+
+        Args:
+            keys (list[bytes]): The keys of the samples.
+
+        Returns:
+            dict[bytes, torch.Tensor]: The outputs of the keys found in the cache.
+        """
+        connection = self._connect()
+        found = {}
+        # Chunked to stay below the limit of the number of parameters of a statement
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = connection.execute(
+                f"SELECT key, dtype, shape, value FROM outputs WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, dtype, shape, value in rows:
+                row_shape = [int(dim) for dim in shape.split(",") if dim]
+                found[key] = torch.frombuffer(bytearray(value), dtype=getattr(torch, dtype)).reshape(row_shape)
+        now = time.time()
+        self._pending_uses.update((key, now) for key in found)
+        if len(self._pending_uses) > self.MAX_PENDING_USES:
+            self._write_uses()
+            connection.commit()
+        return found
+
+    def _write_uses(self) -> None:
+        """Writes the times the outputs read since the last write were used, without committing."""
+        if self._pending_uses:
+            self._connect().executemany(
+                "UPDATE outputs SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._pending_uses.items()],
+            )
+            self._pending_uses.clear()
+
+    def _store(self, keys: list[bytes], outputs: torch.Tensor) -> None:
+        """Stores the outputs of the keys and evicts the least recently used outputs above the maximum size.
+
+        Args:
+            keys (list[bytes]): The keys of the samples.
+            outputs (torch.Tensor): The outputs of the samples, one row per key.
+        """
+        connection = self._connect()
+        now = time.time()
+        dtype = str(outputs.dtype).removeprefix("torch.")
+        shape = ",".join(str(dim) for dim in outputs.shape[1:])
+        rows = outputs.detach().cpu().contiguous().reshape(len(outputs), -1).view(torch.uint8).numpy()
+        self._write_uses()
+        # Another process may have stored the same output in the meantime
+        connection.executemany(
+            "INSERT OR IGNORE INTO outputs VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, dtype, shape, row.tobytes(), row.nbytes, now) for key, row in zip(keys, rows)],
+        )
+        (total,) = connection.execute("SELECT total FROM outputs_size").fetchone()
+        if total > self.max_size:
+            # Only as many of the least recently used outputs are read as needed to get below the maximum size
+            evicted = []
+            cursor = connection.execute("SELECT key, size FROM outputs ORDER BY last_used, rowid")
+            for key, size in cursor:
+                if total <= self.max_size:
+                    break
+                evicted.append((key,))
+                total -= size
+            cursor.close()
+            connection.executemany("DELETE FROM outputs WHERE key = ?", evicted)
+        connection.commit()
+
+    def __call__(self, *inputs: torch.Tensor) -> torch.Tensor:
+        """Returns the outputs of the model, evaluating it only on the samples not found in the cache.
+
+        Args:
+            *inputs (torch.Tensor): The input tensors, with the samples along the first dimension.
+
+        Returns:
+            torch.Tensor: The output of the model, one row per sample.
+
+        Raises:
+            ValueError: If the model output does not have a row for each of the evaluated samples.
+        """
+        return self._evaluate(self._keys(inputs), *inputs)
+
+    def _evaluate(self, keys: list[bytes], *inputs: torch.Tensor) -> torch.Tensor:
+        """Returns the outputs of the model for the samples of the given keys, see `__call__`."""
+        with self._lock:
+            outputs = self._load(keys)
+            # The first occurrence of every key not found, so the repeated samples of the batch are evaluated once
+            missing: dict[bytes, int] = {}
+            for idx, key in enumerate(keys):
+                if key not in outputs and key not in missing:
+                    missing[key] = idx
+            self.n_hits += sum(key in outputs for key in keys)
+            self.n_misses += len(missing)
+        if not missing:
+            return torch.stack([outputs[key].to(inputs[0].device) for key in keys])
+
+        if len(missing) == len(keys):
+            evaluated = self.forward_func(*inputs)
+        else:
+            indices = torch.tensor(list(missing.values()), device=inputs[0].device)
+            evaluated = self.forward_func(*(tensor.index_select(0, indices) for tensor in inputs))
+        if isinstance(evaluated, torch._C.Future):
+            evaluated = evaluated.wait()
+        if evaluated.ndim == 0 or evaluated.shape[0] != len(missing):
+            raise ValueError(f"The model output of shape {tuple(evaluated.shape)} has no row for each of the samples")
+        with self._lock:
+            self._store(list(missing), evaluated)
+        if len(missing) == len(keys):
+            return evaluated
+        outputs.update(zip(missing, evaluated))
+        return torch.stack([outputs[key].to(evaluated.device) for key in keys])
+
+    def close(self) -> None:
+        """Writes the pending uses of the outputs and closes the sqlite file, it is opened again by the next call."""
+        with self._lock:
+            if self._connection is not None:
+                self._write_uses()
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self) -> ForwardCache:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        # The connection and the lock are not shared with other processes, each of them opens the file on its own
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_connection"] = None
+        state["_pending_uses"] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def _update_hash(value_hash: Any, value: Any) -> None:
+    """Feeds a value to a hash, tensors by content and other values by their representation.
+
+    Args:
+        value_hash (Any): The hash object, e.g. `hashlib.blake2b`.
+        value (Any): The value, tensors may be nested in tuples, lists or dicts.
+    """
+    if isinstance(value, torch.Tensor):
+        value_hash.update(f"{value.dtype}{tuple(value.shape)}".encode())
+        # Reinterpreted as bytes, so any dtype is hashed without a conversion
+        value_hash.update(value.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy())
+    elif isinstance(value, (tuple, list)):
+        value_hash.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update_hash(value_hash, item)
+    elif isinstance(value, dict):
+        value_hash.update(f"dict{len(value)}".encode())
+        for key in sorted(value, key=str):
+            value_hash.update(str(key).encode())
+            _update_hash(value_hash, value[key])
+    else:
+        value_hash.update(repr(value).encode())
+
+
 class InterpretableModel(ABC):
     """Abstract base class for an interpretable model.
 
@@ -114,7 +566,8 @@ class InterpretableModel(ABC):
         """Fits the model to the training data.
 
         Args:
-            train_data (torch.utils.data.DataLoader): The training data.
+            train_data (torch.utils.data.DataLoader): The training data, batches of inputs, targets and sample
+                weights. LIME passes the whole training set as a single batch.
             **kwargs: Additional keyword arguments.
 
         Returns:
@@ -449,3 +902,371 @@ class SkLearnSGDClassifier(SkLearnLinearModel):
             None
         """
         return super().fit(train_data=train_data, **kwargs)
+
+
+class LinearModelStatistics:
+    """Weighted sufficient statistics of a linear least-squares problem.
+
+    The statistics are accumulated batch by batch for the design matrix augmented with a column of ones, so the
+    intercept is fitted together with the coefficients. Only the weighted Gram matrix, the weighted cross products with
+    the targets and the weighted sum of the squared targets are stored, so the memory does not depend on the number of
+    samples. The statistics are kept in double precision, apart from the `mps` device, which does not support it.
+
+    Args:
+        device (torch.device | str | None, optional): The device the statistics are kept on. If None, the device of the
+            first batch is used. Defaults to None.
+
+    Attributes:
+        gram (torch.Tensor | None): The weighted Gram matrix of the augmented design, of shape
+            (num_features + 1) x (num_features + 1). The last row and column correspond to the intercept.
+        cross (torch.Tensor | None): The weighted cross products of the augmented design and the targets, of shape
+            (num_features + 1) x num_outputs.
+        targets_sq (torch.Tensor | None): The weighted sums of the squared targets, of shape num_outputs.
+        n_samples (int): The number of accumulated samples.
+    """
+
+    def __init__(self, device: torch.device | str | None = None) -> None:
+        self.device = torch.device(device) if device is not None else None
+        self.gram: torch.Tensor | None = None
+        self.cross: torch.Tensor | None = None
+        self.targets_sq: torch.Tensor | None = None
+        self.n_samples = 0
+
+    @property
+    def dtype(self) -> torch.dtype:
+        """The dtype of the statistics."""
+        return torch.float32 if self.device is not None and self.device.type == "mps" else torch.float64
+
+    def update(self, x: torch.Tensor, y: torch.Tensor, weights: torch.Tensor | None = None) -> None:
+        """Adds a batch of samples to the statistics.
+
+        Args:
+            x (torch.Tensor): The inputs of shape batch_size x num_features.
+            y (torch.Tensor): The targets of shape batch_size or batch_size x num_outputs.
+            weights (torch.Tensor | None, optional): The sample weights of shape batch_size. If None, all the samples
+                have the weight 1. Defaults to None.
+        """
+        if self.device is None:
+            self.device = x.device
+
+        n_samples = x.shape[0]
+        x = x.to(device=self.device, dtype=self.dtype).reshape(n_samples, -1)
+        x = torch.cat([x, torch.ones((n_samples, 1), dtype=self.dtype, device=self.device)], dim=1)
+        y = y.to(device=self.device, dtype=self.dtype).reshape(n_samples, -1)
+        if weights is None:
+            weights = torch.ones((n_samples, 1), dtype=self.dtype, device=self.device)
+        else:
+            weights = weights.to(device=self.device, dtype=self.dtype).reshape(n_samples, 1)
+
+        weighted_x = x * weights
+        gram = weighted_x.T @ x
+        cross = weighted_x.T @ y
+        targets_sq = (weights * y * y).sum(dim=0)
+        if self.gram is None or self.cross is None or self.targets_sq is None:
+            self.gram, self.cross, self.targets_sq = gram, cross, targets_sq
+        else:
+            self.gram += gram
+            self.cross += cross
+            self.targets_sq += targets_sq
+        self.n_samples += n_samples
+
+    def _check_fitted(self) -> None:
+        if self.gram is None or self.cross is None or self.targets_sq is None:
+            raise ValueError("No samples were added to the statistics")
+        if self.gram[-1, -1] <= 0:
+            raise ValueError("The sum of the sample weights must be positive")
+
+    def centered(self, fit_intercept: bool = True) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Returns the statistics of the problem without the intercept column, normalized by the sum of the weights.
+
+        Args:
+            fit_intercept (bool, optional): Whether to center the inputs and targets by their weighted means, which
+                eliminates the intercept from the problem. Defaults to True.
+
+        Returns:
+            tuple[torch.Tensor, torch.Tensor, torch.Tensor]: The Gram matrix of the inputs, the cross products of the
+                inputs and the targets and the sums of the squared targets.
+        """
+        self._check_fitted()
+        assert self.gram is not None and self.cross is not None and self.targets_sq is not None
+        weights_sum = self.gram[-1, -1]
+        gram, cross, targets_sq = self.gram[:-1, :-1], self.cross[:-1], self.targets_sq
+        if fit_intercept:
+            x_sum, y_sum = self.gram[:-1, -1], self.cross[-1]
+            gram = gram - torch.outer(x_sum, x_sum) / weights_sum
+            cross = cross - torch.outer(x_sum, y_sum) / weights_sum
+            targets_sq = targets_sq - y_sum * y_sum / weights_sum
+        return gram / weights_sum, cross / weights_sum, targets_sq / weights_sum
+
+    def intercept(self, coefs: torch.Tensor, fit_intercept: bool = True) -> torch.Tensor:
+        """Returns the intercept matching the given coefficients.
+
+        Args:
+            coefs (torch.Tensor): The coefficients of shape num_features x num_outputs.
+            fit_intercept (bool, optional): Whether the intercept is fitted. If False, the intercept is zero.
+                Defaults to True.
+
+        Returns:
+            torch.Tensor: The intercept of shape num_outputs.
+        """
+        self._check_fitted()
+        assert self.gram is not None and self.cross is not None
+        if not fit_intercept:
+            return torch.zeros(coefs.shape[1], dtype=coefs.dtype, device=coefs.device)
+        weights_sum = self.gram[-1, -1]
+        return (self.cross[-1] - self.gram[:-1, -1] @ coefs) / weights_sum
+
+    def r2_score(self, weight: torch.Tensor, bias: torch.Tensor | None = None) -> torch.Tensor:
+        """Computes the R^2 score of a linear model on the accumulated samples, following `sklearn.metrics.r2_score`.
+
+        The score is weighted by the sample weights, so the statistics should be accumulated without weights to get
+        the usual, unweighted score. Multiple outputs are averaged uniformly. An output with constant targets scores
+        1.0 if it is predicted perfectly and 0.0 otherwise.
+
+        Args:
+            weight (torch.Tensor): The coefficients of the model of shape num_outputs x num_features.
+            bias (torch.Tensor | None, optional): The intercept of the model of shape num_outputs. Defaults to None.
+
+        Returns:
+            torch.Tensor: The R^2 score as a scalar tensor.
+        """
+        self._check_fitted()
+        assert self.gram is not None and self.cross is not None and self.targets_sq is not None
+        weight = weight.to(device=self.gram.device, dtype=self.gram.dtype).reshape(-1, self.gram.shape[0] - 1)
+        if bias is None:
+            bias = torch.zeros(weight.shape[0], dtype=self.gram.dtype, device=self.gram.device)
+        params = torch.cat([weight.T, bias.to(weight).reshape(1, -1)])
+
+        residual_sum = (
+            self.targets_sq - 2 * (self.cross * params).sum(dim=0) + (params * (self.gram @ params)).sum(dim=0)
+        )
+        total_sum = self.targets_sq - self.cross[-1] ** 2 / self.gram[-1, -1]
+        tolerance = torch.finfo(self.gram.dtype).eps * self.targets_sq.clamp_min(1) * self.gram.shape[0]
+        score = torch.where(
+            total_sum > tolerance,
+            1 - residual_sum / total_sum.clamp_min(torch.finfo(total_sum.dtype).tiny),
+            (residual_sum.abs() <= tolerance).to(total_sum),
+        )
+        return score.mean().float()
+
+
+# Number of iterations of the lasso solver between two checks of the duality gap, each waiting for the device
+LASSO_CHECK_EVERY = 10
+
+
+def _solve_ridge(statistics: LinearModelStatistics, alpha: float, fit_intercept: bool) -> torch.Tensor:
+    """Solves the weighted ridge problem from the sufficient statistics.
+
+    The objective matches `sklearn.linear_model.Ridge`: ||W^(1/2) (y - X b - c)||^2 + alpha * ||b||^2, with the
+    intercept c not penalized. The normal equations are solved with the Cholesky decomposition, falling back to the
+    minimum norm least squares solution only if the system is singular, which costs one check of the decomposition on
+    the host per fit instead of a second factorization.
+    """
+    gram, cross, _ = statistics.centered(fit_intercept)
+    assert statistics.gram is not None
+    weights_sum = statistics.gram[-1, -1]
+    system = gram + (alpha / weights_sum) * torch.eye(gram.shape[0], dtype=gram.dtype, device=gram.device)
+    cholesky, info = torch.linalg.cholesky_ex(system)
+    if info.item() == 0:
+        return torch.cholesky_solve(cross, cholesky)
+    return torch.linalg.pinv(system, hermitian=True) @ cross
+
+
+def _solve_lasso(
+    statistics: LinearModelStatistics, alpha: float, fit_intercept: bool, max_iter: int, tol: float
+) -> torch.Tensor:
+    """Solves the weighted lasso problem from the sufficient statistics.
+
+    The objective matches `sklearn.linear_model.Lasso`: 1 / (2 * sum(W)) * ||W^(1/2) (y - X b - c)||^2 + alpha * ||b||_1,
+    with the intercept c not penalized. All the coefficients are updated at once with the accelerated proximal gradient
+    method (FISTA) on the Gram matrix, and the iterations stop once the duality gap of every output drops below
+    `tol` times the variance of the output, the same criterion as in sklearn. The gap is checked every
+    `LASSO_CHECK_EVERY` iterations, so the host waits for the device only once per check instead of every iteration.
+    """
+    gram, cross, targets_sq = statistics.centered(fit_intercept)
+    lipschitz = torch.linalg.eigvalsh(gram)[-1].clamp_min(torch.finfo(gram.dtype).tiny)
+    coefs = torch.zeros_like(cross)
+    momentum_coefs, step = coefs, 1.0
+    for iteration in range(max_iter):
+        gradient = gram @ momentum_coefs - cross
+        shifted = momentum_coefs - gradient / lipschitz
+        new_coefs = torch.sign(shifted) * (shifted.abs() - alpha / lipschitz).clamp_min(0)
+        new_step = (1 + (1 + 4 * step**2) ** 0.5) / 2
+        momentum_coefs = new_coefs + ((step - 1) / new_step) * (new_coefs - coefs)
+        coefs, step = new_coefs, new_step
+        if (iteration + 1) % LASSO_CHECK_EVERY != 0:
+            continue
+
+        residual_corr = cross - gram @ coefs
+        residual_sq = targets_sq - 2 * (cross * coefs).sum(dim=0) + (coefs * (gram @ coefs)).sum(dim=0)
+        dual_norm = residual_corr.abs().amax(dim=0)
+        scale = torch.where(dual_norm > alpha, alpha / dual_norm, torch.ones_like(dual_norm))
+        gap = (
+            0.5 * residual_sq * (1 + scale**2)
+            + alpha * coefs.abs().sum(dim=0)
+            - scale * (targets_sq - (cross * coefs).sum(dim=0))
+        )
+        if bool((gap <= tol * targets_sq).all()):
+            break
+    return coefs
+
+
+def torch_train_linear_model(
+    model: LinearModel,
+    dataloader: torch.utils.data.DataLoader,
+    construct_kwargs: dict,
+    solver: str = "ridge",
+    statistics: LinearModelStatistics | None = None,
+    **fit_kwargs,
+) -> dict[str, float]:
+    r"""Trains a linear model with a closed-form ridge or a lasso solver implemented in torch.
+
+    Unlike `sklearn_train_linear_model`, the data never leaves the device it is on: the batches are reduced to the
+    weighted sufficient statistics of the least-squares problem (see `LinearModelStatistics`) and the coefficients are
+    solved for from them.
+
+    Args:
+        model (LinearModel): The model to train.
+        dataloader (torch.utils.data.DataLoader): The data to use, batches of inputs, targets and optionally sample
+            weights. Any iterable of batches can be used.
+        construct_kwargs (dict): The solver parameters: `alpha` (float, defaults to 1.0), `fit_intercept` (bool,
+            defaults to True) and, for lasso, `max_iter` (int, defaults to 1000) and `tol` (float, defaults to 1e-4).
+        solver (str, optional): Either "ridge" or "lasso". Defaults to "ridge".
+        statistics (LinearModelStatistics | None, optional): Already accumulated statistics to solve for. If provided,
+            the dataloader may be None. Defaults to None.
+        **fit_kwargs: Not used, accepted for compatibility with the other training functions.
+
+    Returns:
+        dict[str, float]: The training time.
+
+    Raises:
+        ValueError: If the solver is not supported.
+    """
+    if solver not in ("ridge", "lasso"):
+        raise ValueError(f"Solver {solver} not supported. Please use 'ridge' or 'lasso'")
+
+    if statistics is None:
+        statistics = LinearModelStatistics(device=getattr(model, "device", None))
+        for data in dataloader:
+            if len(data) == 3:
+                x, y, w = data
+            else:
+                assert len(data) == 2
+                x, y = data
+                w = None
+            statistics.update(x, y, w)
+
+    t1 = time.time()
+    alpha = construct_kwargs.get("alpha", 1.0)
+    fit_intercept = construct_kwargs.get("fit_intercept", True)
+    if solver == "ridge":
+        coefs = _solve_ridge(statistics, alpha, fit_intercept)
+    else:
+        coefs = _solve_lasso(
+            statistics, alpha, fit_intercept, construct_kwargs.get("max_iter", 1000), construct_kwargs.get("tol", 1e-4)
+        )
+    intercept = statistics.intercept(coefs, fit_intercept)
+    t2 = time.time()
+
+    model._construct_model_params(
+        norm_type=None,
+        weight_values=coefs.T.float(),
+        bias_value=intercept.float(),
+    )
+    return {"train_time": t2 - t1}
+
+
+class TorchLinearModel(LinearModel):
+    def __init__(self, solver: str, **kwargs) -> None:
+        r"""Factory class to construct a `LinearModel` trained with a torch solver.
+
+        The model is fitted on the device of the training data, without converting it to numpy, see
+        `torch_train_linear_model`.
+
+        Args:
+            solver
+                The solver used for training, either "ridge" or "lasso".
+
+                There are factory classes defined for you, `TorchRidge` and `TorchLasso`.
+            kwargs
+                The parameters of the solver, e.g. `alpha` or `fit_intercept`.
+        """
+        super().__init__(train_fn=torch_train_linear_model, **kwargs)
+
+        self.solver = solver
+
+    def fit(self, train_data: torch.utils.data.DataLoader, **kwargs) -> None:
+        r"""Fits the model to the given training data using the torch solver.
+
+        Args:
+            train_data
+                The training data to use for fitting the model.
+            kwargs
+                Additional arguments to pass to `torch_train_linear_model`.
+        """
+        return super().fit(train_data=train_data, solver=self.solver, **kwargs)
+
+    def fit_statistics(self, statistics: LinearModelStatistics, **kwargs) -> None:
+        r"""Fits the model to the training data summarized by its sufficient statistics.
+
+        This allows fitting on a training set which is never held in memory at once, the samples can be added to the
+        statistics batch by batch as they are generated.
+
+        Args:
+            statistics
+                The weighted statistics of the training data.
+            kwargs
+                Additional arguments to pass to `torch_train_linear_model`.
+        """
+        return self.train_fn(
+            self,
+            dataloader=None,
+            construct_kwargs=self.construct_kwargs,
+            solver=self.solver,
+            statistics=statistics,
+            **kwargs,
+        )
+
+
+class TorchRidge(TorchLinearModel):
+    def __init__(self, **kwargs) -> None:
+        r"""Factory class.
+
+        Trains a `LinearModel` model with weighted ridge regression solved in closed form, with the same objective
+        and parameters (`alpha`, `fit_intercept`) as `sklearn.linear_model.Ridge`.
+        """
+        super().__init__(solver="ridge", **kwargs)
+
+    def fit(self, train_data: torch.utils.data.DataLoader, **kwargs) -> None:
+        """Fits the `TorchRidge` model to the provided training data.
+
+        Args:
+            train_data (torch.utils.data.DataLoader): The training data.
+            **kwargs: Additional keyword arguments to be passed to the `fit` method.
+
+        Returns:
+            None
+        """
+        return super().fit(train_data=train_data, **kwargs)
+
+
+class TorchLasso(TorchLinearModel):
+    def __init__(self, **kwargs) -> None:
+        r"""Factory class.
+
+        Trains a `LinearModel` model with weighted lasso, with the same objective and parameters (`alpha`,
+        `fit_intercept`, `max_iter`, `tol`) as `sklearn.linear_model.Lasso`.
+        """
+        super().__init__(solver="lasso", **kwargs)
+
+    def fit(self, train_data: torch.utils.data.DataLoader, **kwargs) -> None:
+        """Fits the `TorchLasso` model to the provided training data.
+
+        Args:
+            train_data (torch.utils.data.DataLoader): The training data.
+            **kwargs: Additional keyword arguments to be passed to the `fit` method.
+
+        Returns:
+            None
+        """
+        return super().fit(train_data=train_data, **kwargs)
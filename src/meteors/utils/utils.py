@@ -240,3 +240,34 @@ def aggregate_by_mask(
         result[id_mask] = agg_result
 
     return result
+
+
+def expand_values_by_mask(values: torch.Tensor, mask: torch.Tensor, fill_value: float = 0.0) -> torch.Tensor:
+    """Expand per-segment values to a dense tensor by a mask.
+
+    This function assigns to each element of the mask tensor (with IDs) the value of its segment, using a single indexed
+    gather, so its cost does not depend on the number of segments. Elements with IDs outside of the range of the values
+    tensor are filled with `fill_value`.
+
+    Args:
+        values (torch.Tensor): The 1D tensor of values, with the value of the segment with ID `i` at index `i`.
+        mask (torch.Tensor): The integer mask tensor with the segment IDs.
+        fill_value (float, optional): The value assigned to elements with IDs without a corresponding value.
+            Defaults to 0.0.
+
+    Raises:
+        ValueError: If the values tensor is not one-dimensional.
+
+    Returns:
+        torch.Tensor: The dense tensor of the same shape as the mask.
+    """
+    if values.dim() != 1:
+        raise ValueError("The values tensor must be one-dimensional")
+
+    mask = mask.to(device=values.device, dtype=torch.long)
+    if values.numel() == 0:
+        return torch.full(mask.shape, fill_value, dtype=values.dtype, device=values.device)
+
+    valid = (mask >= 0) & (mask < values.numel())
+    gathered = values[mask.clamp(0, values.numel() - 1)]
+    return torch.where(valid, gathered, torch.tensor(fill_value, dtype=values.dtype, device=values.device))
@@ -0,0 +1,115 @@
+import sys
+
+import numpy as np
+import pytest
+import torch
+
+import meteors.cli as mt_cli
+
+
+MODEL_SOURCE = """
+import torch
+
+THRESHOLD = 0.5
+
+
+def predict(image):
+    return torch.stack([image.sum(dim=(1, 2, 3)), -image.sum(dim=(1, 2, 3))], dim=1)
+
+
+class Models:
+    regression = staticmethod(lambda image: image.mean(dim=(1, 2, 3)))
+"""
+
+
+@pytest.fixture
+def cubes(tmp_path, monkeypatch):
+    (tmp_path / "cli_models.py").write_text(MODEL_SOURCE)
+    monkeypatch.chdir(tmp_path)
+    # the working directory added to the import path by the command is removed after the test
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    (tmp_path / "cubes").mkdir()
+    for idx in range(3):
+        np.save(tmp_path / "cubes" / f"cube_{idx}.npy", np.random.rand(4, 8, 8).astype(np.float32))
+    return tmp_path
+
+
+def test_load_callable(cubes):
+    assert mt_cli.load_callable("cli_models:predict")(torch.ones((2, 4, 8, 8))).shape == (2, 2)
+    assert mt_cli.load_callable("cli_models:Models.regression")(torch.ones((2, 4, 8, 8))).shape == (2,)
+    with pytest.raises(ValueError):
+        mt_cli.load_callable("cli_models")
+    with pytest.raises(ValueError):
+        mt_cli.load_callable("cli_models:THRESHOLD")
+    with pytest.raises(AttributeError):
+        mt_cli.load_callable("cli_models:missing")
+
+
+def test_explain_command(cubes, capsys):
+    args = [
+        "explain",
+        "--model",
+        "cli_models:predict",
+        "--input",
+        "cubes",
+        "--output",
+        "out",
+        "--target",
+        "0",
+        "--segmentation",
+        "patch",
+        "--segmentation-param",
+        "patch_size=4",
+        "--n-samples",
+        "12",
+        "--batch-size",
+        "6",
+        "--wavelengths",
+        "400,450,500,550",
+    ]
+    assert mt_cli.main(args) == 0
+    output = capsys.readouterr().out
+    assert "Explained 3 cubes (0 skipped, 0 failed)" in output
+    assert "cubes/s" in output and "forwards/s" in output
+    record = torch.load(cubes / "out" / "attributions" / "cube_0.pt")
+    assert record["attributes"].shape == (4, 8, 8)
+    assert record["n_samples"] == 12
+
+    # the second run resumes from the manifest
+    assert mt_cli.main(args) == 0
+    assert "Explained 0 cubes (3 skipped, 0 failed)" in capsys.readouterr().out
+
+    spectral_args = [
+        "explain",
+        "--model",
+        "cli_models:Models.regression",
+        "--input",
+        "cubes",
+        "--output",
+        "spectral",
+        "--mode",
+        "spectral",
+        "--problem-type",
+        "regression",
+        "--band-names",
+        "B",
+        "G",
+        "--wavelengths",
+        "450,500,550,600",
+    ]
+    assert mt_cli.main(spectral_args) == 0
+    assert "Explained 3 cubes" in capsys.readouterr().out
+
+    # cubes without wavelengths fail and are reported in the exit code
+    assert mt_cli.main(args[:-2] + ["--output", "failing"]) == 1
+    assert "3 failed" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit):
+        mt_cli.main(["explain", "--model", "cli_models:predict"])
+    with pytest.raises(SystemExit):
+        mt_cli.main(args + ["--segmentation-param", "patch_size"])
+
+    # the spectral mode groups the bands by their names
+    with pytest.raises(SystemExit):
+        mt_cli.main(spectral_args[: spectral_args.index("--band-names")] + ["--wavelengths", "450,500,550,600"])
+    assert "--band-names is required with --mode spectral" in capsys.readouterr().err
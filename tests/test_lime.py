@@ -1,5 +1,9 @@
 import pytest
+import asyncio
+import multiprocessing
+import threading
 import warnings
+from unittest import mock
 from loguru import logger
 
 import torch
@@ -10,7 +14,7 @@ from pydantic import ValidationError
 import meteors as mt
 import meteors.lime as mt_lime
 import meteors.lime_base as mt_lime_base
-from meteors.utils.models import ExplainableModel, SkLearnLasso
+from meteors.utils.models import ExplainableModel, SkLearnLasso, SkLearnLinearRegression, TorchRidge
 from meteors.utils.utils import agg_segmentation_postprocessing
 
 # Temporary solution for wavelengths
@@ -2536,3 +2540,1391 @@ def test_get_spectral_attributes_segmentation():
             target=0,
             postprocessing_segmentation_output=None,
         )
+
+
+def _linear_lime_setup():
+    inputs = torch.ones((1, 1, 4, 4))
+    feature_mask = torch.tensor([[[[0, 0, 1, 1], [0, 0, 1, 1], [2, 2, 3, 3], [2, 2, 3, 3]]]])
+    weights = torch.arange(16, dtype=torch.float32).reshape(1, 1, 4, 4)
+    expected = torch.stack([weights[feature_mask == i].sum() for i in range(4)])
+
+    def linear_model(x: torch.Tensor) -> torch.Tensor:
+        return (x * weights).sum(dim=(1, 2, 3))
+
+    return inputs, feature_mask, linear_model, expected
+
+
+def test_default_batch_perturb_func():
+    inputs = torch.ones((1, 3, 4, 4))
+    design = mt_lime_base.default_batch_perturb_func(inputs, n_samples=7, num_interp_features=5)
+    assert design.shape == (7, 5)
+    assert design.dtype == torch.long
+    assert set(design.unique().tolist()).issubset({0, 1})
+
+    with pytest.raises(AssertionError):
+        mt_lime_base.default_batch_perturb_func(inputs, n_samples=7)
+
+
+def test_lime_base_batched_sampling():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    batched = mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression())
+    assert batched.batch_perturb_func is mt_lime_base.default_batch_perturb_func
+    coefs, _ = batched.attribute(
+        inputs, feature_mask=feature_mask, n_samples=50, perturbations_per_eval=8, return_input_shape=False
+    )
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    sequential = mt_lime_base.Lime(
+        linear_model, interpretable_model=SkLearnLinearRegression(), perturb_func=mt_lime_base.default_perturb_func
+    )
+    assert sequential.batch_perturb_func is None
+    coefs, _ = sequential.attribute(
+        inputs, feature_mask=feature_mask, n_samples=50, perturbations_per_eval=8, return_input_shape=False
+    )
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+
+def test_default_batch_from_interp_rep_transform():
+    inputs = torch.rand((1, 3, 4, 4))
+    baselines = torch.rand((1, 3, 4, 4))
+    feature_mask = torch.tensor([[[[0, 0, 1, 1], [0, 0, 1, 1], [2, 2, 3, 3], [2, 2, 3, 3]]]])
+    samples = torch.tensor([[1, 0, 1, 0], [0, 0, 0, 0], [1, 1, 1, 1]])
+    kwargs = {"feature_mask": feature_mask, "baselines": baselines}
+
+    batch = mt_lime_base.default_batch_from_interp_rep_transform(samples, inputs, **kwargs)
+    expected = torch.cat(
+        [mt_lime_base.default_from_interp_rep_transform(sample.unsqueeze(0), inputs, **kwargs) for sample in samples]
+    )
+    assert batch.shape == (3, 3, 4, 4)
+    assert torch.equal(batch, expected)
+
+    masks = mt_lime_base.get_batch_mask_from_interp_rep_transform(samples, **kwargs)
+    expected_masks = torch.cat(
+        [mt_lime_base.get_mask_from_interp_rep_transform(sample.unsqueeze(0), **kwargs) for sample in samples]
+    )
+    assert torch.equal(masks, expected_masks)
+
+    # The buffer is filled in place
+    out = torch.empty_like(batch)
+    result = mt_lime_base.default_batch_from_interp_rep_transform(samples, inputs, out=out, **kwargs)
+    assert result.data_ptr() == out.data_ptr()
+    assert torch.equal(out, expected)
+
+    # Scalar baselines and tuple inputs
+    result = mt_lime_base.default_batch_from_interp_rep_transform(
+        samples, (inputs,), feature_mask=(feature_mask,), baselines=(0,)
+    )
+    assert isinstance(result, tuple)
+    assert torch.equal(result[0], expected.where(masks.expand_as(expected), torch.zeros(1)))
+
+
+def test_lime_training_set():
+    training_set = mt_lime_base._LimeTrainingSet(capacity=5, device=torch.device("cpu"))
+    training_set.add(torch.ones((2, 3), dtype=torch.long), torch.tensor([1.0, 2.0]), torch.tensor([0.5, 0.5]))
+    training_set.add(torch.zeros((1, 3)), torch.tensor([3.0]), torch.tensor([[0.1]]))
+
+    interpretable_inps, outputs, similarities = training_set.tensors()
+    assert interpretable_inps.shape == (3, 3)
+    assert interpretable_inps.dtype == torch.float
+    assert torch.equal(outputs, torch.tensor([1.0, 2.0, 3.0]))
+    assert torch.allclose(similarities, torch.tensor([0.5, 0.5, 0.1]))
+    # returned tensors are views of the preallocated storage
+    assert interpretable_inps.data_ptr() == training_set.interpretable_inps.data_ptr()
+
+    with pytest.raises(AssertionError):
+        mt_lime_base._LimeTrainingSet(capacity=5, device=torch.device("cpu")).tensors()
+
+
+def test_lime_base_generator_perturb_func():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    def perturb_generator(original_inp, **kwargs):
+        for _ in range(20):
+            yield torch.bernoulli(torch.full((1, kwargs["num_interp_features"]), 0.5)).long()
+
+    lime = mt_lime_base.Lime(
+        linear_model, interpretable_model=SkLearnLinearRegression(), perturb_func=perturb_generator
+    )
+    with pytest.warns(UserWarning, match="Generator completed"):
+        coefs, _ = lime.attribute(
+            inputs, feature_mask=feature_mask, n_samples=30, perturbations_per_eval=3, return_input_shape=False
+        )
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+
+def test_get_exp_kernel_batch_similarity_function():
+    original_inp = torch.rand(1, 3, 4, 4)
+    feature_mask = torch.arange(16).reshape(1, 1, 4, 4).expand(1, 3, 4, 4)
+    samples = torch.bernoulli(torch.full((6, 16), 0.5)).long()
+    samples[0] = 0
+    perturbed_inps = mt_lime_base.default_batch_from_interp_rep_transform(
+        samples, original_inp, feature_mask=feature_mask, baselines=0
+    )
+
+    for distance_mode in ["cosine", "euclidean"]:
+        similarity_func = mt_lime_base.get_exp_kernel_similarity_function(distance_mode, kernel_width=2.0)
+        batch_similarity_func = mt_lime_base.get_exp_kernel_batch_similarity_function(distance_mode, kernel_width=2.0)
+        weights = batch_similarity_func(original_inp, perturbed_inps, samples)
+        expected = torch.tensor(
+            [similarity_func(original_inp, perturbed_inps[i : i + 1], samples[i : i + 1]) for i in range(len(samples))]
+        )
+        assert weights.shape == (6,)
+        assert torch.allclose(weights, expected, atol=1e-6)
+
+    # tuple inputs are flattened and concatenated like in the per sample kernel
+    similarity_func = mt_lime_base.get_exp_kernel_similarity_function("euclidean")
+    batch_similarity_func = mt_lime_base.get_exp_kernel_batch_similarity_function("euclidean")
+    weights = batch_similarity_func((original_inp, original_inp), (perturbed_inps, perturbed_inps), samples)
+    expected = torch.tensor(
+        [
+            similarity_func((original_inp, original_inp), (perturbed_inps[i : i + 1],) * 2, None)
+            for i in range(len(samples))
+        ]
+    )
+    assert torch.allclose(weights, expected, atol=1e-6)
+
+    # in the interpretable space the distance depends only on the number of kept features
+    kept = samples.sum(dim=1).float()
+    cosine_kernel = mt_lime_base.get_exp_kernel_batch_similarity_function("cosine", 0.5, interpretable_space=True)
+    expected_distance = 1 - torch.sqrt(kept / 16)
+    assert torch.allclose(cosine_kernel(original_inp, None, samples), torch.exp(-(expected_distance**2) / 0.5))
+    euclidean_kernel = mt_lime_base.get_exp_kernel_batch_similarity_function("euclidean", 4.0, interpretable_space=True)
+    assert torch.allclose(euclidean_kernel(original_inp, None, samples), torch.exp(-(16 - kept) / 32))
+
+    with pytest.raises(ValueError):
+        mt_lime_base.get_exp_kernel_batch_similarity_function("manhattan")
+
+
+def test_lime_base_batch_similarity_func():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    batch_similarity_func = mt_lime_base.get_exp_kernel_batch_similarity_function(interpretable_space=True)
+    lime = mt_lime_base.Lime(
+        linear_model, interpretable_model=SkLearnLinearRegression(), batch_similarity_func=batch_similarity_func
+    )
+    assert lime.batch_similarity_func is batch_similarity_func
+    coefs, _ = lime.attribute(
+        inputs, feature_mask=feature_mask, n_samples=40, perturbations_per_eval=8, return_input_shape=False
+    )
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    # a custom per sample similarity function is not overridden by the default batched kernel
+    similarity_func = mt_lime_base.get_exp_kernel_similarity_function(kernel_width=10.0)
+    lime = mt_lime_base.Lime(linear_model, similarity_func=similarity_func)
+    assert lime.batch_similarity_func is None
+
+
+def test_lime_convert_output_shape():
+    lime = mt_lime_base.Lime(lambda x: x.sum(dim=(1, 2, 3)))
+    inputs = (torch.rand(1, 3, 4, 4), torch.rand(1, 2))
+    feature_mask = (torch.randint(0, 5, (1, 1, 4, 4)), torch.tensor([[5, 4]]))
+    coefs = torch.arange(6, dtype=torch.float).unsqueeze(0)
+
+    attrs = lime._convert_output_shape(inputs, feature_mask, coefs, 6, True)
+    for attr, single_inp, single_mask in zip(attrs, inputs, feature_mask):
+        assert attr.shape == single_inp.shape
+        assert torch.equal(attr, single_mask.float().expand_as(single_inp))
+
+    # the attributions keep the floating point dtype of the inputs
+    double_attrs = lime._convert_output_shape(tuple(inp.double() for inp in inputs), feature_mask, coefs, 6, True)
+    assert all(attr.dtype == torch.float64 for attr in double_attrs)
+    int_attrs = lime._convert_output_shape((torch.ones((1, 2), dtype=torch.long),), (feature_mask[1],), coefs, 6, False)
+    assert int_attrs.dtype == torch.float32
+
+
+def test_lime_base_torch_surrogate():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    lime = mt_lime_base.Lime(linear_model, interpretable_model=TorchRidge(alpha=0.0))
+    coefs, score = lime.attribute(
+        inputs, feature_mask=feature_mask, n_samples=40, perturbations_per_eval=8, return_input_shape=False
+    )
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+    assert isinstance(score, torch.Tensor)
+    assert score.dim() == 0
+    assert torch.isclose(score, torch.tensor(1.0), atol=1e-4)
+
+
+def test_lime_base_streaming_fit():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    for perturb_func in [None, mt_lime_base.default_perturb_func]:
+        lime = mt_lime_base.Lime(linear_model, interpretable_model=TorchRidge(alpha=0.0), perturb_func=perturb_func)
+        coefs, score = lime.attribute(
+            inputs,
+            feature_mask=feature_mask,
+            n_samples=50,
+            perturbations_per_eval=8,
+            return_input_shape=False,
+            streaming_fit=True,
+        )
+        assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+        assert torch.isclose(score, torch.tensor(1.0), atol=1e-4)
+
+    # the same design gives the same surrogate and score as the stored training set
+    noisy_model = lambda x: linear_model(x) + 0.1 * x[:, 0, 0, 0] ** 2  # noqa: E731
+    results = []
+    for streaming_fit in [False, True]:
+        torch.manual_seed(0)
+        lime = mt_lime_base.Lime(noisy_model, interpretable_model=TorchRidge(alpha=0.5))
+        results.append(
+            lime.attribute(
+                inputs,
+                feature_mask=feature_mask,
+                n_samples=30,
+                perturbations_per_eval=4,
+                return_input_shape=False,
+                streaming_fit=streaming_fit,
+            )
+        )
+    assert torch.allclose(results[0][0], results[1][0], atol=1e-5)
+    assert torch.isclose(results[0][1], results[1][1], atol=1e-5)
+
+    # the design is drawn block by block, so its memory does not grow with the number of samples
+    drawn = []
+
+    def spy_batch_perturb_func(original_inp, n_samples, **kwargs):
+        drawn.append(n_samples)
+        return mt_lime_base.default_batch_perturb_func(original_inp, n_samples, **kwargs)
+
+    lime = mt_lime_base.Lime(
+        linear_model, interpretable_model=TorchRidge(alpha=0.0), batch_perturb_func=spy_batch_perturb_func
+    )
+    coefs, _ = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=300,
+        perturbations_per_eval=8,
+        return_input_shape=False,
+        streaming_fit=True,
+    )
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+    assert sum(drawn) == 300
+    assert max(drawn) == 8
+
+    with pytest.raises(ValueError):
+        mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression()).attribute(
+            inputs, feature_mask=feature_mask, n_samples=10, streaming_fit=True
+        )
+
+
+def test_lime_base_adaptive_sampling():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    # the surrogate of a linear model is exact, so it converges at the first check after the minimum
+    for perturb_func in [None, mt_lime_base.default_perturb_func]:
+        lime = mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression(), perturb_func=perturb_func)
+        coefs, _, info = lime.attribute(
+            inputs,
+            feature_mask=feature_mask,
+            n_samples=30,
+            perturbations_per_eval=4,
+            return_input_shape=False,
+            max_samples=200,
+            refit_every=2,
+            return_sampling_info=True,
+        )
+        assert info == mt_lime_base.LimeSamplingInfo(n_samples=38, converged=True)
+        assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    # without convergence the sampling stops at max_samples
+    noisy_model = lambda x: linear_model(x) + torch.randn(x.shape[0])  # noqa: E731
+    lime = mt_lime_base.Lime(noisy_model, interpretable_model=SkLearnLinearRegression())
+    _, _, info = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=10,
+        perturbations_per_eval=4,
+        max_samples=31,
+        convergence_tol=0.0,
+        return_sampling_info=True,
+    )
+    assert info == mt_lime_base.LimeSamplingInfo(n_samples=31, converged=False)
+
+    # ranking criterion
+    _, _, info = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=10,
+        perturbations_per_eval=4,
+        max_samples=400,
+        convergence_tol=0.5,
+        convergence_criterion="ranking",
+        return_sampling_info=True,
+    )
+    assert info.n_samples <= 400
+
+    # without adaptive sampling exactly n_samples are used
+    _, _, info = lime.attribute(inputs, feature_mask=feature_mask, n_samples=10, return_sampling_info=True)
+    assert info == mt_lime_base.LimeSamplingInfo(n_samples=10, converged=False)
+
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, n_samples=10, max_samples=5)
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, n_samples=10, max_samples=20, refit_every=0)
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, n_samples=10, max_samples=20, convergence_criterion="other")
+
+
+def test_lime_training_set_grow():
+    training_set = mt_lime_base._LimeTrainingSet(capacity=2, device=torch.device("cpu"))
+    training_set.add(torch.ones((2, 3)), torch.tensor([1.0, 2.0]), torch.tensor([0.5, 0.5]))
+    training_set.add(torch.zeros((3, 3)), torch.tensor([3.0, 4.0, 5.0]), torch.tensor([0.1, 0.1, 0.1]))
+
+    interpretable_inps, outputs, similarities = training_set.tensors()
+    assert training_set.capacity == 5
+    assert torch.equal(interpretable_inps, torch.cat([torch.ones((2, 3)), torch.zeros((3, 3))]))
+    assert torch.equal(outputs, torch.tensor([1.0, 2.0, 3.0, 4.0, 5.0]))
+    assert similarities.shape == (5,)
+
+
+def test_convergence_monitor():
+    monitor = mt_lime_base._ConvergenceMonitor(0.1, "values")
+    assert not monitor.update(torch.tensor([1.0, 2.0]))
+    assert not monitor.update(torch.tensor([1.5, 2.0]))
+    assert monitor.update(torch.tensor([1.6, 2.0]))
+
+    monitor = mt_lime_base._ConvergenceMonitor(0.0, "ranking")
+    assert not monitor.update(torch.tensor([1.0, 2.0, 3.0]))
+    assert not monitor.update(torch.tensor([2.5, 2.0, 3.0]))
+    assert monitor.update(torch.tensor([2.6, 2.1, 3.0]))
+
+
+def test_get_attributes_adaptive_sampling():
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=10)
+    assert spatial_attributes.n_samples == 10
+
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=10, max_samples=100)
+    assert spatial_attributes.n_samples == 14
+
+    # with more band groups, so that enumerating all of them is not cheaper than n_samples
+    band_mask = torch.tensor([0, 1, 2, 3, 4])
+    band_names = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4}
+    spectral_attributes = lime.get_spectral_attributes(
+        hsi, band_mask, band_names=band_names, n_samples=10, max_samples=100, refit_every=3
+    )
+    assert spectral_attributes.n_samples == 22
+
+
+def test_lime_base_sampling_budget():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    for perturb_func in [None, mt_lime_base.default_perturb_func]:
+        calls = []
+
+        def counted_model(x):
+            calls.append(x.shape[0])
+            return linear_model(x)
+
+        lime = mt_lime_base.Lime(
+            counted_model, interpretable_model=SkLearnLinearRegression(), perturb_func=perturb_func
+        )
+        coefs, _, info = lime.attribute(
+            inputs,
+            feature_mask=feature_mask,
+            n_samples=100,
+            perturbations_per_eval=8,
+            return_input_shape=False,
+            max_forward_calls=3,
+            return_sampling_info=True,
+        )
+        assert calls == [8, 8, 8]
+        assert info == mt_lime_base.LimeSamplingInfo(n_samples=24, converged=False, truncated=True)
+        assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    # a budget which is not exhausted does not truncate the sampling
+    _, _, info = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=16,
+        perturbations_per_eval=8,
+        max_forward_calls=2,
+        return_sampling_info=True,
+    )
+    assert info == mt_lime_base.LimeSamplingInfo(n_samples=16, converged=False, truncated=False)
+
+    # at least one batch is evaluated even with an exhausted time budget
+    lime = mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression())
+    _, _, info = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=1000,
+        perturbations_per_eval=10,
+        time_budget=1e-9,
+        return_sampling_info=True,
+    )
+    assert info.n_samples == 10
+    assert info.truncated
+
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, time_budget=0)
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, max_forward_calls=0)
+
+
+def test_get_attributes_sampling_budget():
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=10)
+    assert not spatial_attributes.truncated
+
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=100, max_forward_calls=2)
+    assert spatial_attributes.truncated
+    assert spatial_attributes.n_samples == 8
+
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    spectral_attributes = lime.get_spectral_attributes(
+        hsi, band_mask, band_names={"a": 0, "b": 1, "c": 2}, n_samples=1000, time_budget=1e-9
+    )
+    assert spectral_attributes.truncated
+    assert spectral_attributes.n_samples == 4
+
+
+def test_pack_binary_samples():
+    samples = torch.tensor([[1, 0, 1], [1, 0, 1], [0, 1, 1]])
+    keys = mt_lime_base._pack_binary_samples(samples)
+    assert keys[0] == keys[1] == (5,)
+    assert keys[2] == (6,)
+
+    # more than 63 features are packed into several words
+    wide = torch.zeros((2, 70), dtype=torch.long)
+    wide[1, 65] = 1
+    keys = mt_lime_base._pack_binary_samples(wide)
+    assert keys == [(0, 0), (0, 4)]
+
+    with pytest.raises(ValueError):
+        mt_lime_base._pack_binary_samples(torch.tensor([[0.5, 1.0]]))
+
+
+def test_lime_base_deduplicate_samples():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+    calls = []
+
+    def counted_model(x):
+        calls.append(x.shape[0])
+        return linear_model(x)
+
+    # with 4 features there are only 16 distinct samples, so most of the 200 samples are repeated
+    lime = mt_lime_base.Lime(counted_model, interpretable_model=SkLearnLinearRegression())
+    torch.manual_seed(0)
+    coefs, _, info = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=200,
+        perturbations_per_eval=20,
+        return_input_shape=False,
+        deduplicate_samples=True,
+        return_sampling_info=True,
+    )
+    assert sum(calls) <= 16
+    assert len(calls) < 10
+    assert info.n_samples == 200
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    # the fit is the same as without deduplication, as repeated samples keep their weight
+    torch.manual_seed(0)
+    coefs_no_dedup, _ = lime.attribute(
+        inputs, feature_mask=feature_mask, n_samples=200, perturbations_per_eval=20, return_input_shape=False
+    )
+    assert torch.allclose(coefs, coefs_no_dedup, atol=1e-5)
+
+    lime = mt_lime_base.Lime(
+        linear_model, interpretable_model=SkLearnLinearRegression(), perturb_func=mt_lime_base.default_perturb_func
+    )
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, deduplicate_samples=True)
+
+
+def test_get_attributes_deduplicate_samples():
+    calls = []
+
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        calls.append(image.shape[0])
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+
+    band_mask = torch.tensor([0, 1, 2, 3, 4])
+    band_names = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4}
+    spectral_attributes = lime.get_spectral_attributes(
+        hsi, band_mask, band_names=band_names, n_samples=30, deduplicate_samples=True
+    )
+    assert spectral_attributes.n_samples == 30
+    assert sum(calls) < 30
+
+    calls.clear()
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=50, deduplicate_samples=True)
+    assert spatial_attributes.n_samples == 50
+    assert sum(calls) <= 8
+
+
+def test_enumerate_binary_samples():
+    samples = mt_lime_base.enumerate_binary_samples(3)
+    assert samples.shape == (8, 3)
+    assert samples[0].tolist() == [0, 0, 0]
+    assert samples[1].tolist() == [1, 0, 0]
+    assert samples[-1].tolist() == [1, 1, 1]
+    assert len({tuple(row) for row in samples.tolist()}) == 8
+
+    assert mt_lime_base.enumerate_binary_samples(0).shape == (1, 0)
+    assert torch.equal(mt_lime_base.enumerate_binary_samples(3, start=2, stop=5), samples[2:5])
+
+    with pytest.raises(ValueError):
+        mt_lime_base.enumerate_binary_samples(mt_lime_base.MAX_EXHAUSTIVE_FEATURES + 1)
+
+
+def test_lime_base_exhaustive_sampling():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+    calls = []
+
+    def counted_model(x):
+        calls.append(x.shape[0])
+        return linear_model(x)
+
+    lime = mt_lime_base.Lime(counted_model, interpretable_model=SkLearnLinearRegression())
+    coefs, _, info = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=1000,
+        perturbations_per_eval=5,
+        return_input_shape=False,
+        exhaustive=True,
+        return_sampling_info=True,
+    )
+    assert calls == [5, 5, 5, 1]
+    # the samples are enumerated block by block
+    with mock.patch.object(
+        mt_lime_base, "enumerate_binary_samples", wraps=mt_lime_base.enumerate_binary_samples
+    ) as enumerate_spy:
+        lime.attribute(inputs, feature_mask=feature_mask, perturbations_per_eval=5, exhaustive=True)
+    assert [call.kwargs["stop"] - call.kwargs["start"] for call in enumerate_spy.call_args_list] == [5, 5, 5, 1]
+    assert info == mt_lime_base.LimeSamplingInfo(n_samples=16, converged=False, truncated=False)
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, exhaustive=True, max_samples=100)
+
+    lime = mt_lime_base.Lime(
+        linear_model, interpretable_model=SkLearnLinearRegression(), perturb_func=mt_lime_base.default_perturb_func
+    )
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, exhaustive=True)
+
+
+def test_get_spectral_attributes_exhaustive():
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    band_names = {"a": 0, "b": 1, "c": 2}
+
+    # 2^3 combinations of the band groups are cheaper than the requested samples
+    spectral_attributes = lime.get_spectral_attributes(hsi, band_mask, band_names=band_names, n_samples=10)
+    assert spectral_attributes.n_samples == 8
+    expected = torch.stack([hsi.image[band_mask == i].sum() for i in range(3)])
+    assert torch.allclose(spectral_attributes.flattened_attributes, expected[band_mask], atol=1e-3)
+
+    spectral_attributes = lime.get_spectral_attributes(hsi, band_mask, band_names=band_names, n_samples=6)
+    assert spectral_attributes.n_samples == 6
+
+    # a custom sampling design or an adaptive budget is kept
+    sobol_lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+        batch_perturb_func=mt_lime_base.sobol_batch_perturb_func,
+    )
+    spectral_attributes = sobol_lime.get_spectral_attributes(hsi, band_mask, band_names=band_names, n_samples=16)
+    assert spectral_attributes.n_samples == 16
+    spectral_attributes = lime.get_spectral_attributes(
+        hsi, band_mask, band_names=band_names, n_samples=10, max_samples=40, convergence_tol=0.0
+    )
+    assert spectral_attributes.n_samples > 10
+
+
+def test_variance_reduced_batch_perturb_funcs():
+    inputs = torch.ones((1, 3, 4, 4))
+
+    design = mt_lime_base.antithetic_batch_perturb_func(inputs, n_samples=9, num_interp_features=6)
+    assert design.shape == (9, 6)
+    assert torch.equal(design[0:8:2] + design[1:8:2], torch.ones((4, 6), dtype=torch.long))
+
+    design = mt_lime_base.stratified_batch_perturb_func(inputs, n_samples=70, num_interp_features=6)
+    assert design.shape == (70, 6)
+    assert torch.bincount(design.sum(dim=1), minlength=7).tolist() == [10] * 7
+
+    design = mt_lime_base.sobol_batch_perturb_func(inputs, n_samples=64, num_interp_features=6)
+    assert design.shape == (64, 6)
+    assert design.sum(dim=0).tolist() == [32] * 6
+    torch.manual_seed(0)
+    first = mt_lime_base.sobol_batch_perturb_func(inputs, n_samples=8, num_interp_features=6)
+    torch.manual_seed(0)
+    assert torch.equal(first, mt_lime_base.sobol_batch_perturb_func(inputs, n_samples=8, num_interp_features=6))
+
+    for batch_perturb_func in [
+        mt_lime_base.antithetic_batch_perturb_func,
+        mt_lime_base.stratified_batch_perturb_func,
+        mt_lime_base.sobol_batch_perturb_func,
+    ]:
+        design = batch_perturb_func(inputs, n_samples=5, num_interp_features=3)
+        assert design.dtype == torch.long
+        assert set(design.unique().tolist()).issubset({0, 1})
+        with pytest.raises(AssertionError):
+            batch_perturb_func(inputs, n_samples=5)
+
+
+def test_lime_variance_reduced_designs():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+
+    for batch_perturb_func in [
+        mt_lime_base.antithetic_batch_perturb_func,
+        mt_lime_base.stratified_batch_perturb_func,
+        mt_lime_base.sobol_batch_perturb_func,
+    ]:
+        lime = mt_lime_base.Lime(
+            linear_model, interpretable_model=SkLearnLinearRegression(), batch_perturb_func=batch_perturb_func
+        )
+        coefs, _ = lime.attribute(
+            inputs, feature_mask=feature_mask, n_samples=32, perturbations_per_eval=8, return_input_shape=False
+        )
+        assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    def model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+        batch_perturb_func=mt_lime_base.sobol_batch_perturb_func,
+    )
+    assert lime._lime.batch_perturb_func is mt_lime_base.sobol_batch_perturb_func
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=16)
+    assert spatial_attributes.n_samples == 16
+
+
+def test_lime_base_multiple_targets():
+    inputs, feature_mask, _, _ = _linear_lime_setup()
+    weights = torch.randn(3, 16)
+    expected = torch.stack(
+        [torch.stack([weights[t][feature_mask.flatten() == i].sum() for i in range(4)]) for t in range(3)]
+    )
+    calls = []
+
+    def multi_output_model(x):
+        calls.append(x.shape[0])
+        return x.reshape(x.shape[0], -1) @ weights.T
+
+    lime = mt_lime_base.Lime(multi_output_model, interpretable_model=SkLearnLinearRegression())
+    attributions, r2s = lime.attribute(
+        inputs, feature_mask=feature_mask, n_samples=64, perturbations_per_eval=16, targets="all"
+    )
+    # all the targets are attributed from the same forward passes
+    assert calls == [16, 16, 16, 16]
+    assert attributions.shape == (3, *inputs.shape)
+    assert r2s.shape == (3,)
+    assert torch.allclose(attributions[:, 0, 0, 0, 0], expected[:, 0], atol=1e-3)
+    assert torch.allclose(attributions[:, 0, 0, 3, 3], expected[:, 3], atol=1e-3)
+
+    coefs, _ = lime.attribute(inputs, feature_mask=feature_mask, n_samples=64, targets=[2, 0], return_input_shape=False)
+    assert torch.allclose(coefs, expected[[2, 0]], atol=1e-3)
+
+    # multiple examples are stacked after the target dimension
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        attributions, r2s = lime.attribute(
+            torch.ones((2, 1, 4, 4)), feature_mask=feature_mask, n_samples=64, perturbations_per_eval=16, targets=[1, 2]
+        )
+    assert attributions.shape == (2, 2, 1, 4, 4)
+    assert r2s.shape == (2,)
+
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, target=0, targets=[1])
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, targets="first")
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, targets="all", streaming_fit=True)
+
+
+def test_get_attributes_multiple_targets():
+    calls = []
+
+    def multi_output_model(image: torch.Tensor) -> torch.Tensor:
+        calls.append(image.shape[0])
+        return torch.stack([image.sum(dim=(1, 2, 3)), -image.sum(dim=(1, 2, 3))], dim=1)
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(multi_output_model, "classification"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, target="all", n_samples=20)
+    assert len(spatial_attributes) == 2
+    assert sum(calls) == 20
+    assert torch.allclose(spatial_attributes[0].attributes, -spatial_attributes[1].attributes, atol=1e-3)
+    single_target_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, target=1, n_samples=20)
+    assert torch.allclose(spatial_attributes[1].attributes, single_target_attributes.attributes, atol=1e-3)
+
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    spectral_attributes = lime.get_spectral_attributes(
+        hsi, band_mask, band_names={"a": 0, "b": 1, "c": 2}, target=[1, 0], n_samples=10
+    )
+    assert len(spectral_attributes) == 2
+    assert spectral_attributes[0].band_names == {"a": 0, "b": 1, "c": 2}
+    assert torch.allclose(spectral_attributes[0].attributes, -spectral_attributes[1].attributes, atol=1e-3)
+
+
+def test_lime_attribute_batch():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+    calls = []
+
+    def counted_model(x):
+        calls.append(x.shape[0])
+        return linear_model(x)
+
+    other_mask = feature_mask.transpose(2, 3)
+    lime = mt_lime_base.Lime(counted_model, interpretable_model=SkLearnLinearRegression())
+    results = lime.attribute_batch(
+        [inputs, 2 * inputs, inputs],
+        [feature_mask, feature_mask, other_mask],
+        n_samples=20,
+        perturbations_per_eval=5,
+    )
+    # every forward call evaluates a block of samples of each input
+    assert calls == [15, 15, 15, 15]
+    assert len(results) == 3
+    attributions, r2 = results[0]
+    assert attributions.shape == inputs.shape
+    assert torch.allclose(attributions[0, 0, 0, :2], expected[0].repeat(2), atol=1e-3)
+    assert torch.allclose(results[1][0], 2 * attributions, atol=1e-3)
+    single, _ = lime.attribute(inputs, feature_mask=other_mask, n_samples=20)
+    assert torch.allclose(results[2][0], single, atol=1e-3)
+
+    coefs, _ = lime.attribute_batch([inputs], [feature_mask], n_samples=20, return_input_shape=False)[0]
+    assert torch.allclose(coefs.flatten(), expected, atol=1e-3)
+
+    assert lime.attribute_batch([], []) == []
+    with pytest.raises(ValueError):
+        lime.attribute_batch([inputs], [feature_mask, feature_mask])
+    with pytest.raises(ValueError):
+        lime.attribute_batch([inputs, torch.ones((1, 1, 2, 2))], [feature_mask, feature_mask])
+
+
+def test_get_spatial_attributes_batch():
+    calls = []
+
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        calls.append(image.shape[0])
+        return image.sum(dim=(1, 2, 3))
+
+    hsis = [mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600]) for _ in range(3)]
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+    segmentation_masks = [torch.randint(1, 4, (1, 10, 10)) for _ in range(3)]
+    spatial_attributes = lime.get_spatial_attributes_batch(
+        hsis, segmentation_masks, n_samples=8, perturbations_per_eval=4
+    )
+    assert calls == [12, 12]
+    assert len(spatial_attributes) == 3
+    for hsi, segmentation_mask, attributes in zip(hsis, segmentation_masks, spatial_attributes):
+        assert attributes.n_samples == 8
+        assert torch.equal(attributes.hsi.image, hsi.image)
+        single_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=8)
+        assert torch.allclose(attributes.attributes, single_attributes.attributes, atol=1e-3)
+
+    spatial_attributes = lime.get_spatial_attributes_batch(hsis[:2], segmentation_method="patch", patch_size=5)
+    assert len(spatial_attributes) == 2
+
+    with pytest.raises(ValueError):
+        lime.get_spatial_attributes_batch(hsis, segmentation_masks[:2])
+    with pytest.raises(ValueError):
+        lime.get_spatial_attributes_batch(
+            [hsis[0], mt.HSI(image=torch.rand(5, 8, 8), wavelengths=[400, 450, 500, 550, 600])]
+        )
+
+
+def test_lime_attribution_plan():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+    lime = mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression())
+    plan = lime.plan(inputs, feature_mask, n_samples=20, perturbations_per_eval=5)
+    assert plan.num_interp_features == 4
+
+    attributions, r2 = plan.attribute(inputs)
+    direct_attributions, _ = lime.attribute(inputs, feature_mask=feature_mask, n_samples=20, perturbations_per_eval=5)
+    assert torch.allclose(attributions, direct_attributions, atol=1e-3)
+    coefs, _, info = plan.attribute(2 * inputs, return_input_shape=False, return_sampling_info=True)
+    assert torch.allclose(coefs.flatten(), 2 * expected, atol=1e-3)
+    assert info.n_samples == 20
+
+    # the feature mask is shifted to start at 0 once, when the plan is created
+    with pytest.warns(UserWarning):
+        shifted_plan = lime.plan(inputs, feature_mask + 1, n_samples=20, perturbations_per_eval=5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        shifted_attributions, _ = shifted_plan.attribute(inputs)
+    assert torch.allclose(shifted_attributions, attributions, atol=1e-3)
+
+    # the other arguments of attribute are shared by the attributions of the plan
+    exhaustive_plan = lime.plan(inputs, feature_mask, n_samples=1000, perturbations_per_eval=8, exhaustive=True)
+    _, _, info = exhaustive_plan.attribute(inputs, return_sampling_info=True)
+    assert info.n_samples == 16
+
+    # the attributions of multiple targets have a leading target dimension, as in attribute
+    two_output_lime = mt_lime_base.Lime(
+        lambda x: torch.stack([linear_model(x), -linear_model(x)], dim=1), interpretable_model=SkLearnLinearRegression()
+    )
+    targets_plan = two_output_lime.plan(inputs, feature_mask, n_samples=20, perturbations_per_eval=5, targets=[0, 1])
+    targets_attributions, _ = targets_plan.attribute(inputs)
+    assert targets_attributions.shape == (2, *inputs.shape)
+    assert torch.allclose(targets_attributions[0], attributions, atol=1e-3)
+    assert torch.allclose(targets_attributions[1], -attributions, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        plan.attribute(torch.ones((1, 1, 2, 2)))
+    with pytest.raises(ValueError):
+        lime.plan(torch.ones((2, 1, 4, 4)), feature_mask)
+
+
+def test_hsi_attribution_plan():
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    hsis = [mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600]) for _ in range(3)]
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    plan = lime.plan_spatial_attributes(hsis[0], segmentation_mask, n_samples=10)
+    assert isinstance(plan, mt.HSIAttributionPlan)
+    for hsi in hsis:
+        spatial_attributes = plan(hsi)
+        assert isinstance(spatial_attributes, mt.HSISpatialAttributes)
+        single_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=10)
+        assert torch.allclose(spatial_attributes.attributes, single_attributes.attributes, atol=1e-3)
+        assert torch.equal(spatial_attributes.segmentation_mask, single_attributes.segmentation_mask)
+
+    plan = lime.plan_spatial_attributes(hsis[0], segmentation_method="patch", patch_size=5)
+    assert plan(hsis[1]).n_samples == 10
+
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    band_names = {"a": 0, "b": 1, "c": 2}
+    plan = lime.plan_spectral_attributes(hsis[0], band_mask, band_names=band_names, n_samples=10)
+    spectral_attributes = plan(hsis[2])
+    assert isinstance(spectral_attributes, mt.HSISpectralAttributes)
+    assert spectral_attributes.band_names == band_names
+    # the exhaustive enumeration is chosen as in get_spectral_attributes
+    assert spectral_attributes.n_samples == 8
+    single_attributes = lime.get_spectral_attributes(hsis[2], band_mask, band_names=band_names, n_samples=10)
+    assert torch.allclose(spectral_attributes.attributes, single_attributes.attributes, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        plan(mt.HSI(image=torch.rand(5, 8, 8), wavelengths=[400, 450, 500, 550, 600]))
+
+
+def test_lime_base_pipelined_evaluation():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+    calls = []
+
+    def counted_model(x):
+        calls.append(x.shape[0])
+        return linear_model(x)
+
+    lime = mt_lime_base.Lime(counted_model, interpretable_model=SkLearnLinearRegression())
+    torch.manual_seed(0)
+    coefs, _ = lime.attribute(inputs, feature_mask=feature_mask, n_samples=50, perturbations_per_eval=8)
+    sequential_calls = list(calls)
+
+    # the producer thread builds the same blocks ahead, so the fit and the forward calls are unchanged
+    for pipeline_depth in [1, 3]:
+        calls.clear()
+        torch.manual_seed(0)
+        pipelined_coefs, _ = lime.attribute(
+            inputs, feature_mask=feature_mask, n_samples=50, perturbations_per_eval=8, pipeline_depth=pipeline_depth
+        )
+        assert calls == sequential_calls
+        assert torch.allclose(pipelined_coefs, coefs, atol=1e-5)
+    assert torch.allclose(
+        lime.attribute(inputs, feature_mask=feature_mask, return_input_shape=False, pipeline_depth=2)[0].flatten(),
+        expected,
+        atol=1e-3,
+    )
+
+    # the blocks built ahead are dropped once the budget is exhausted
+    calls.clear()
+    _, _, info = lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=40,
+        perturbations_per_eval=4,
+        max_forward_calls=2,
+        pipeline_depth=2,
+        return_sampling_info=True,
+    )
+    assert len(calls) == 2
+    assert info.truncated
+
+    # errors of the producer thread are raised in the caller
+    def failing_similarity(*args, **kwargs):
+        raise RuntimeError("similarity failed")
+
+    failing_lime = mt_lime_base.Lime(
+        linear_model, interpretable_model=SkLearnLinearRegression(), similarity_func=failing_similarity
+    )
+    with pytest.raises(RuntimeError, match="similarity failed"):
+        failing_lime.attribute(inputs, feature_mask=feature_mask, n_samples=20, pipeline_depth=1)
+
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, pipeline_depth=-1)
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, pipeline_depth=1, deduplicate_samples=True)
+    lime = mt_lime_base.Lime(
+        linear_model, interpretable_model=SkLearnLinearRegression(), perturb_func=mt_lime_base.default_perturb_func
+    )
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, pipeline_depth=1)
+
+
+def test_get_attributes_pipelined_evaluation():
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    lime = mt_lime.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    torch.manual_seed(0)
+    spatial_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=20, pipeline_depth=2)
+    torch.manual_seed(0)
+    sequential_attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=20)
+    assert torch.allclose(spatial_attributes.attributes, sequential_attributes.attributes, atol=1e-5)
+
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    spectral_attributes = lime.get_spectral_attributes(hsi, band_mask, n_samples=10, pipeline_depth=1)
+    assert spectral_attributes.n_samples == 8
+
+
+def test_lime_base_futures_in_flight():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def future_model(x):
+        # the output is completed by a separate thread, like a model served by another process
+        future = torch.futures.Future()
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+
+        def complete(inputs_copy):
+            with lock:
+                in_flight[0] -= 1
+            future.set_result(linear_model(inputs_copy))
+
+        threading.Timer(0.01, complete, args=(x.clone(),)).start()
+        return future
+
+    lime = mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression())
+    torch.manual_seed(0)
+    coefs, _ = lime.attribute(inputs, feature_mask=feature_mask, n_samples=60, perturbations_per_eval=5)
+
+    future_lime = mt_lime_base.Lime(future_model, interpretable_model=SkLearnLinearRegression())
+    for futures_in_flight in [1, 4]:
+        max_in_flight[0] = 0
+        torch.manual_seed(0)
+        future_coefs, _, info = future_lime.attribute(
+            inputs,
+            feature_mask=feature_mask,
+            n_samples=60,
+            perturbations_per_eval=5,
+            futures_in_flight=futures_in_flight,
+            return_sampling_info=True,
+        )
+        assert max_in_flight[0] == futures_in_flight
+        assert info.n_samples == 60
+        assert torch.allclose(future_coefs, coefs, atol=1e-5)
+
+    # the dispatched forward calls count towards the budget
+    _, _, info = future_lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=60,
+        perturbations_per_eval=5,
+        futures_in_flight=4,
+        max_forward_calls=3,
+        return_sampling_info=True,
+    )
+    assert info.n_samples == 15
+    assert info.truncated
+
+    # also combined with the blocks built ahead by the pipeline
+    torch.manual_seed(0)
+    future_coefs, _ = future_lime.attribute(
+        inputs, feature_mask=feature_mask, n_samples=60, perturbations_per_eval=5, futures_in_flight=3, pipeline_depth=2
+    )
+    assert torch.allclose(future_coefs, coefs, atol=1e-5)
+
+    # futures of torch.jit.fork are awaited as well
+    def forked_model(x):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            return torch.jit.fork(linear_model, x)
+
+    forked_lime = mt_lime_base.Lime(forked_model, interpretable_model=SkLearnLinearRegression())
+    forked_coefs, _ = forked_lime.attribute(
+        inputs,
+        feature_mask=feature_mask,
+        n_samples=60,
+        perturbations_per_eval=5,
+        futures_in_flight=2,
+        return_input_shape=False,
+    )
+    assert torch.allclose(forked_coefs.flatten(), expected, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, futures_in_flight=0)
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, futures_in_flight=2, deduplicate_samples=True)
+
+
+def test_lime_base_process_pool_forward():
+    inputs, feature_mask, linear_model, expected = _linear_lime_setup()
+    lime = mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression())
+    torch.manual_seed(0)
+    coefs, _ = lime.attribute(inputs, feature_mask=feature_mask, n_samples=40, perturbations_per_eval=8)
+
+    mp_context = multiprocessing.get_context("fork")
+    with mt_lime_base.ProcessPoolForward(linear_model, max_workers=3, mp_context=mp_context) as pool:
+        assert pool.max_workers == 3
+        pool_lime = mt_lime_base.Lime(linear_model, interpretable_model=SkLearnLinearRegression(), forward_pool=pool)
+        for futures_in_flight in [1, 2]:
+            torch.manual_seed(0)
+            pool_coefs, _, info = pool_lime.attribute(
+                inputs,
+                feature_mask=feature_mask,
+                n_samples=40,
+                perturbations_per_eval=8,
+                futures_in_flight=futures_in_flight,
+                return_sampling_info=True,
+            )
+            assert torch.allclose(pool_coefs, coefs, atol=1e-5)
+            assert info.n_samples == 40
+
+        # the context of each attribution is sent to the workers once, with their first shard
+        context = pool.share(
+            mt_lime_base.default_batch_from_interp_rep_transform,
+            inputs,
+            feature_mask=feature_mask,
+            baselines=0,
+            num_interp_features=4,
+        )
+        assert context.inputs.is_shared()
+        samples = torch.tensor([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1], [1, 1, 1, 1]])
+        outputs, similarities = pool.submit(context, samples).wait()
+        assert torch.allclose(outputs, samples.float() @ expected)
+        assert similarities is None
+        assert pool._worker_context_ids == [context.context_id] * 3
+        assert torch.allclose(pool.submit(context, samples[:2]).wait()[0], expected[:2])
+
+        # the workers compute the similarities of the samples along with the outputs
+        similarity_func = mt_lime_base.get_exp_kernel_batch_similarity_function(interpretable_space=True)
+        similarity_context = pool.share(
+            mt_lime_base.default_batch_from_interp_rep_transform,
+            inputs,
+            batch_similarity_func=similarity_func,
+            feature_mask=feature_mask,
+            baselines=0,
+            num_interp_features=4,
+        )
+        _, similarities = pool.submit(similarity_context, samples).wait()
+        assert torch.allclose(similarities, similarity_func(inputs, None, samples))
+
+        # blocks of different attributions submitted from several threads get the context of their attribution
+        contexts = [context, similarity_context] * 4
+        results = [None] * len(contexts)
+
+        def submit(idx):
+            results[idx] = pool.submit(contexts[idx], samples).wait()[0]
+
+        threads = [threading.Thread(target=submit, args=(idx,)) for idx in range(len(contexts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(torch.allclose(result, samples.float() @ expected) for result in results)
+
+        # the perturbed inputs are built only by the workers
+        with mock.patch.object(pool_lime, "_prepare_interpretable_block", side_effect=AssertionError):
+            torch.manual_seed(0)
+            pool_coefs, _ = pool_lime.attribute(
+                inputs, feature_mask=feature_mask, n_samples=40, perturbations_per_eval=8, futures_in_flight=2
+            )
+        assert torch.allclose(pool_coefs, coefs, atol=1e-5)
+        with pytest.raises(ValueError):
+            pool_lime.attribute(inputs, feature_mask=feature_mask, pipeline_depth=1)
+
+        # errors of the workers are raised in the caller
+        failing_context = pool.share(mt_lime_base.default_batch_from_interp_rep_transform, inputs)
+        with pytest.raises(AssertionError):
+            pool.submit(failing_context, samples).wait()
+
+    lime = mt_lime_base.LimeBase(
+        linear_model,
+        SkLearnLinearRegression(),
+        similarity_func=mt_lime_base.get_exp_kernel_similarity_function(),
+        perturb_func=mt_lime_base.default_perturb_func,
+        perturb_interpretable_space=True,
+        from_interp_rep_transform=mt_lime_base.default_from_interp_rep_transform,
+        to_interp_rep_transform=None,
+        forward_pool=pool,
+    )
+    with pytest.raises(ValueError):
+        lime.attribute(inputs, feature_mask=feature_mask, num_interp_features=4, baselines=0)
+    with pytest.raises(ValueError):
+        mt_lime_base.ProcessPoolForward(linear_model, max_workers=0)
+
+
+def test_async_get_attributes():
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    async def async_linear_model(image: torch.Tensor) -> torch.Tensor:
+        in_flight[0] += 1
+        max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return linear_model(image)
+
+    lime = mt_lime.Lime(ExplainableModel(linear_model, "regression"), SkLearnLinearRegression())
+    async_lime = mt_lime.Lime(ExplainableModel(async_linear_model, "regression"), SkLearnLinearRegression())
+    torch.manual_seed(0)
+    expected = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=20)
+
+    async def explain():
+        ticks = []
+
+        async def ticker():
+            # the event loop keeps running while the attributions are computed
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0.001)
+
+        ticker_task = asyncio.create_task(ticker())
+        torch.manual_seed(0)
+        spatial = await async_lime.aget_spatial_attributes(hsi, segmentation_mask, n_samples=20, futures_in_flight=3)
+        spectral, sync_spectral = await asyncio.gather(
+            async_lime.aget_spectral_attributes(hsi, band_mask, n_samples=10),
+            lime.aget_spectral_attributes(hsi, band_mask=band_mask, n_samples=10),
+        )
+        ticker_task.cancel()
+        return spatial, spectral, sync_spectral, len(ticks)
+
+    spatial, spectral, sync_spectral, n_ticks = asyncio.run(explain())
+    assert isinstance(spatial, mt.HSISpatialAttributes)
+    assert torch.allclose(spatial.attributes, expected.attributes, atol=1e-5)
+    assert max_in_flight[0] == 3
+    assert n_ticks > 5
+    assert isinstance(spectral, mt.HSISpectralAttributes)
+    assert torch.allclose(spectral.attributes, sync_spectral.attributes, atol=1e-5)
+
+    # outside of an event loop the async forward function is run to completion for each batch
+    torch.manual_seed(0)
+    sync_spatial = async_lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=20)
+    assert torch.allclose(sync_spatial.attributes, expected.attributes, atol=1e-5)
+
+    async def failing_model(image: torch.Tensor) -> torch.Tensor:
+        raise RuntimeError("model unavailable")
+
+    failing_lime = mt_lime.Lime(ExplainableModel(failing_model, "regression"), SkLearnLinearRegression())
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(failing_lime.aget_spatial_attributes(hsi, segmentation_mask, n_samples=10))
+
+    # the synchronous methods would block a running event loop
+    async def explain_synchronously():
+        return async_lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=10)
+
+    with pytest.raises(RuntimeError, match="aget_spatial_attributes"):
+        asyncio.run(explain_synchronously())
+
+    # a module with an async forward method is bridged as well
+    class AsyncLinearModule(torch.nn.Module):
+        async def forward(self, image: torch.Tensor) -> torch.Tensor:
+            await asyncio.sleep(0)
+            return linear_model(image)
+
+    module_lime = mt_lime.Lime(ExplainableModel(AsyncLinearModule(), "regression"), SkLearnLinearRegression())
+    assert module_lime._async_forward is not None
+    torch.manual_seed(0)
+    module_spatial = asyncio.run(module_lime.aget_spatial_attributes(hsi, segmentation_mask, n_samples=20))
+    assert torch.allclose(module_spatial.attributes, expected.attributes, atol=1e-5)
+
+
+def test_lime_concurrent_attributions_of_one_explainer():
+    hsis = [mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600]) for _ in range(4)]
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    interpretable_model = SkLearnLinearRegression()
+    lime = mt_lime.Lime(ExplainableModel(linear_model, "regression"), interpretable_model)
+    expected = [lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=30) for hsi in hsis]
+    # the given interpretable model is never fitted, each attribution fits its own copy
+    with pytest.raises(Exception):
+        interpretable_model.get_representation()
+
+    results = [None] * len(hsis)
+    barrier = threading.Barrier(len(hsis))
+
+    def explain(idx):
+        barrier.wait()
+        for _ in range(3):
+            results[idx] = lime.get_spatial_attributes(hsis[idx], segmentation_mask, n_samples=30)
+
+    threads = [threading.Thread(target=explain, args=(idx,)) for idx in range(len(hsis))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for result, expected_result in zip(results, expected):
+        assert torch.allclose(result.attributes, expected_result.attributes, atol=1e-3)
+
+    # the default surrogates of two explainers are distinct objects
+    first = mt_lime.Lime(ExplainableModel(linear_model, "regression"))
+    second = mt_lime.Lime(ExplainableModel(linear_model, "regression"))
+    assert first.interpretable_model is not second.interpretable_model
+    assert first.interpretable_model.construct_kwargs == {"alpha": 0.08}
+
+
+def test_lime_training_data():
+    samples = torch.randint(0, 2, (6, 11))
+    data = mt_lime_base.LimeTrainingData.from_samples(
+        samples, torch.rand(6, 2), torch.rand(6) * 0.9 + 0.1, kernel_width=1.0
+    )
+    assert data.packed_samples.shape == (6, 2)
+    assert data.packed_samples.dtype == torch.uint8
+    assert data.n_samples == 6
+    assert torch.equal(data.samples(), samples.float())
+
+    assert torch.equal(data.weights(), data.similarities)
+    assert torch.allclose(data.weights(0.5), data.similarities**4)
+    assert torch.equal(data.select_target(1).outputs, data.outputs[:, 1])
+    with pytest.raises(ValueError):
+        data.weights(0.0)
+    with pytest.raises(ValueError):
+        data._replace(kernel_width=None).weights(0.5)
+    with pytest.raises(ValueError):
+        data.fit(SkLearnLinearRegression())
+    with pytest.raises(ValueError):
+        data.select_target(0).fit()
+    with pytest.raises(ValueError):
+        mt_lime_base.LimeTrainingData.from_samples(torch.rand(3, 4), torch.rand(3), torch.rand(3))
+
+    # the interpretable model kept with the training set is copied by default, never fitted itself
+    surrogate = SkLearnLinearRegression()
+    kept = data._replace(interpretable_model=surrogate).select_target(0)
+    coefs, _ = kept.fit()
+    assert torch.allclose(coefs, kept.fit(SkLearnLinearRegression())[0])
+    assert surrogate.linear is None
+
+
+def test_lime_refit_from_kept_training_set():
+    hsi = mt.HSI(image=torch.rand(5, 8, 8), wavelengths=[400, 450, 500, 550, 600])
+    segmentation_mask = torch.randint(1, 5, (1, 8, 8))
+
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    calls = []
+
+    def counting_model(image: torch.Tensor) -> torch.Tensor:
+        calls.append(len(image))
+        return linear_model(image)
+
+    lime = mt_lime.Lime(ExplainableModel(counting_model, "regression"), SkLearnLinearRegression())
+    attributes = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=40, keep_training_set=True)
+    assert attributes.training_set.n_samples == 40
+    assert attributes.training_set.kernel_width == 1.0
+    assert isinstance(attributes.training_set.interpretable_model, SkLearnLinearRegression)
+    assert attributes.training_set.feature_mask.min() == 0
+    assert "training_set" not in attributes.model_dump()
+    n_calls = len(calls)
+
+    # the same interpretable model reproduces the attribution without any forward pass
+    refitted = attributes.refit(SkLearnLinearRegression())
+    assert torch.allclose(refitted.attributes, attributes.attributes, atol=1e-4)
+    assert refitted.training_set is attributes.training_set
+    # by default the interpretable model of the attribution is refitted
+    assert torch.allclose(attributes.refit().attributes, attributes.attributes, atol=1e-4)
+    lasso = attributes.refit(SkLearnLasso(alpha=0.08), kernel_width=0.5)
+    assert lasso.score <= refitted.score
+    assert not torch.allclose(lasso.attributes, refitted.attributes)
+    assert len(calls) == n_calls
+
+    # the feature mask follows the orientation of the attributions
+    reoriented = attributes.change_orientation("HWC")
+    assert torch.allclose(reoriented.refit().attributes, reoriented.attributes, atol=1e-4)
+
+    # multiple targets keep the outputs of each target, the spectral mask maps the features to the bands
+    band_mask = torch.tensor([1, 1, 2, 2, 3])
+    lime = mt_lime.Lime(
+        ExplainableModel(
+            lambda image: torch.stack([image.sum(dim=(1, 2, 3)), image[:, 0].mean(dim=(1, 2))], 1), "regression"
+        ),
+        SkLearnLinearRegression(),
+    )
+    first, second = lime.get_spectral_attributes(
+        hsi, band_mask=band_mask, band_names={"a": 1, "b": 2, "c": 3}, target="all", keep_training_set=True
+    )
+    assert first.training_set.outputs.dim() == 1
+    assert torch.allclose(second.refit(SkLearnLinearRegression()).attributes, second.attributes, atol=1e-4)
+
+    with pytest.raises(ValueError):
+        lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=10).refit()
+    with pytest.raises(ValueError):
+        mt_lime_base.Lime(linear_model).attribute(
+            hsi.image.unsqueeze(0), n_samples=10, streaming_fit=True, keep_training_set=True
+        )
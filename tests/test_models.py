@@ -1,17 +1,30 @@
 import pytest
+import threading
+from unittest import mock
 
 import torch
 
+import meteors as mt
 
 from meteors.utils.models import (
     ExplainableModel,
+    ForwardBroker,
+    ForwardCache,
     SkLearnLasso,
     SkLearnRidge,
     SkLearnLinearRegression,
     SkLearnLogisticRegression,
     SkLearnSGDClassifier,
+    TorchLasso,
+    TorchRidge,
+)
+from meteors.utils.models.models import (
+    SkLearnLinearModel,
+    LinearModel,
+    LinearModelStatistics,
+    TorchLinearModel,
+    torch_train_linear_model,
 )
-from meteors.utils.models.models import SkLearnLinearModel, LinearModel
 
 
 def test_explainable_model():
@@ -225,3 +238,283 @@ def test_linear_model_bias_value_without_bias():
         LinearModel(train_fn=lambda x: x)._construct_model_params(
             in_features=10, out_features=2, bias=False, bias_value=torch.zeros(2)
         )
+
+
+def test_torch_ridge():
+    torch_ridge = TorchRidge()
+
+    # return empty values
+    assert torch_ridge.classes() is None
+    assert torch_ridge.bias() is None
+
+    X = torch.rand(40, 10)
+    y = torch.rand(40, 5)
+    w = torch.rand(40)
+
+    dataset = torch.utils.data.TensorDataset(X, y, w)
+    data_loader = torch.utils.data.DataLoader(dataset, batch_size=16)
+    torch_ridge.fit(train_data=data_loader)
+
+    assert torch_ridge.classes() is None
+    assert torch_ridge.bias() is not None
+    assert torch_ridge.linear.in_features == 10
+    assert torch_ridge.linear.out_features == 5
+
+    # same solution as sklearn
+    sklearn_ridge = SkLearnRidge()
+    sklearn_ridge.fit(train_data=[(X, y, w)])
+    assert torch.allclose(torch_ridge.get_representation(), sklearn_ridge.get_representation(), atol=1e-5)
+    assert torch.allclose(torch_ridge.bias(), sklearn_ridge.bias(), atol=1e-5)
+
+    # singular system without regularization falls back to the least squares solution
+    torch_ridge = TorchRidge(alpha=0.0)
+    X = torch.ones(10, 3)
+    torch_ridge.fit(train_data=[(X, torch.arange(10.0))])
+    assert torch.allclose(torch_ridge(X).flatten(), torch.full((10,), 4.5), atol=1e-5)
+
+
+def test_torch_lasso():
+    torch_lasso = TorchLasso()
+
+    # return empty values
+    assert torch_lasso.classes() is None
+    assert torch_lasso.bias() is None
+
+    torch.manual_seed(0)
+    X = torch.bernoulli(torch.full((200, 8), 0.5))
+    y = X @ torch.tensor([1.0, -2.0, 0.0, 0.5, 0.0, 3.0, 0.0, -1.0]) + 0.05 * torch.randn(200)
+    w = torch.rand(200)
+
+    for alpha, fit_intercept in [(0.01, True), (0.1, True), (0.05, False)]:
+        torch_lasso = TorchLasso(alpha=alpha, fit_intercept=fit_intercept, tol=1e-8, max_iter=10000)
+        torch_lasso.fit(train_data=[(X, y, w)])
+        sklearn_lasso = SkLearnLasso(alpha=alpha, fit_intercept=fit_intercept, tol=1e-6, max_iter=100000)
+        sklearn_lasso.fit(train_data=[(X, y, w)])
+
+        assert torch_lasso.linear.in_features == 8
+        assert torch_lasso.linear.out_features == 1
+        assert torch.allclose(torch_lasso.get_representation(), sklearn_lasso.get_representation(), atol=1e-4)
+        assert torch.allclose(torch_lasso.bias(), sklearn_lasso.bias(), atol=1e-4)
+
+    # strong regularization zeroes all the coefficients
+    torch_lasso = TorchLasso(alpha=100.0)
+    torch_lasso.fit(train_data=[(X, y)])
+    assert torch.equal(torch_lasso.get_representation(), torch.zeros(1, 8))
+    assert torch.allclose(torch_lasso.bias(), y.mean().reshape(1))
+
+
+def test_linear_model_statistics():
+    X = torch.rand(30, 4)
+    y = torch.rand(30, 2)
+    w = torch.rand(30)
+
+    statistics = LinearModelStatistics()
+    for start in range(0, 30, 7):
+        statistics.update(X[start : start + 7], y[start : start + 7], w[start : start + 7])
+    single_batch = LinearModelStatistics()
+    single_batch.update(X, y, w)
+
+    assert statistics.n_samples == 30
+    assert statistics.gram.dtype == torch.float64
+    assert torch.allclose(statistics.gram, single_batch.gram)
+    assert torch.allclose(statistics.cross, single_batch.cross)
+    assert torch.allclose(statistics.targets_sq, single_batch.targets_sq)
+    assert torch.allclose(statistics.gram[-1, -1], w.sum().double())
+
+    # the model can be trained directly from the statistics
+    torch_ridge = TorchRidge(alpha=0.5)
+    torch_train_linear_model(torch_ridge, None, torch_ridge.construct_kwargs, statistics=statistics)
+    reference = TorchRidge(alpha=0.5)
+    reference.fit(train_data=[(X, y, w)])
+    assert torch.allclose(torch_ridge.get_representation(), reference.get_representation())
+
+    with pytest.raises(ValueError):
+        LinearModelStatistics().centered()
+
+
+def test_torch_linear_model_invalid_solver():
+    with pytest.raises(ValueError):
+        TorchLinearModel(solver="invalid_solver").fit(train_data=[(torch.rand(5, 2), torch.rand(5))])
+
+
+def test_linear_model_statistics_r2_score():
+    from sklearn.metrics import r2_score
+
+    X = torch.rand(50, 4)
+    y = torch.rand(50, 2)
+    torch_ridge = TorchRidge(alpha=1.0)
+    torch_ridge.fit(train_data=[(X, y)])
+
+    statistics = LinearModelStatistics()
+    statistics.update(X, y)
+    score = statistics.r2_score(torch_ridge.get_representation(), torch_ridge.bias())
+    expected = r2_score(y.numpy(), torch_ridge(X).detach().numpy())
+    assert torch.isclose(score, torch.tensor(expected), atol=1e-5)
+
+    # constant targets
+    statistics = LinearModelStatistics()
+    statistics.update(X, torch.ones(50))
+    assert statistics.r2_score(torch.zeros(1, 4), torch.ones(1)) == 1.0
+    assert statistics.r2_score(torch.zeros(1, 4), torch.zeros(1)) == 0.0
+
+
+def test_forward_broker():
+    calls = []
+
+    def model(x):
+        calls.append(x.shape[0])
+        return x.sum(dim=1)
+
+    with ForwardBroker(model, max_batch_size=8, max_delay=0.05) as broker:
+        futures = [broker(torch.full((3, 2), float(i))) for i in range(3)]
+        outputs = [future.wait() for future in futures]
+    for i, output in enumerate(outputs):
+        assert torch.equal(output, torch.full((3,), 2.0 * i))
+    # the first two batches are merged, the third one does not fit
+    assert calls == [6, 3]
+    assert broker.n_requests == 3
+    assert broker.n_forward_calls == 2
+    with pytest.raises(RuntimeError):
+        broker(torch.ones((1, 2)))
+
+    # batches larger than the maximum are evaluated on their own
+    with ForwardBroker(model, max_batch_size=2) as broker:
+        assert broker(torch.ones((5, 2))).wait().shape == (5,)
+
+    def failing_model(x):
+        raise RuntimeError("model failed")
+
+    with ForwardBroker(failing_model) as broker:
+        with pytest.raises(RuntimeError, match="model failed"):
+            broker(torch.ones((1, 2))).wait()
+    with ForwardBroker(lambda x: x.sum()) as broker:
+        with pytest.raises(ValueError):
+            broker(torch.ones((3, 2))).wait()
+
+    with pytest.raises(ValueError):
+        ForwardBroker(model, max_batch_size=0)
+    with pytest.raises(ValueError):
+        ForwardBroker(model, max_delay=-1)
+
+
+def test_forward_broker_concurrent_explanations():
+    calls = []
+
+    def model(image):
+        calls.append(image.shape[0])
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    segmentation_mask = torch.randint(1, 4, (1, 10, 10))
+    n_threads = 4
+    results = [None] * n_threads
+
+    with ForwardBroker(model, max_batch_size=64, max_delay=0.05) as broker:
+        lime = mt.Lime(ExplainableModel(broker, "regression"), SkLearnLinearRegression())
+        barrier = threading.Barrier(n_threads)
+
+        def explain(idx):
+            barrier.wait()
+            results[idx] = lime.get_spatial_attributes(hsi, segmentation_mask, n_samples=16, perturbations_per_eval=4)
+
+        threads = [threading.Thread(target=explain, args=(idx,)) for idx in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    # every explanation evaluates 4 batches, merged across the concurrent explanations
+    assert broker.n_requests == 4 * n_threads
+    assert broker.n_forward_calls < broker.n_requests
+    assert sum(calls) == 16 * n_threads
+    expected = mt.Lime(ExplainableModel(model, "regression"), SkLearnLinearRegression()).get_spatial_attributes(
+        hsi, segmentation_mask, n_samples=16
+    )
+    for result in results:
+        assert isinstance(result, mt.HSISpatialAttributes)
+        assert torch.allclose(result.attributes, expected.attributes, atol=1e-3)
+
+
+def test_forward_cache(tmp_path):
+    calls = []
+
+    def reference(x):
+        return torch.stack([x.sum(dim=1), x.max(dim=1).values], dim=1)
+
+    def model(x):
+        calls.append(x.shape[0])
+        return reference(x)
+
+    inputs = torch.arange(12, dtype=torch.float32).reshape(4, 3)
+    with ForwardCache(model, tmp_path / "cache.sqlite", model_version="v1") as cache:
+        assert torch.equal(cache(inputs), reference(inputs))
+        # only the new samples are evaluated, a repeated sample once
+        batch = torch.cat([inputs[:2], torch.full((2, 3), -1.0)])
+        assert torch.equal(cache(batch), reference(batch))
+        assert calls == [4, 1]
+        assert cache.n_hits == 2
+        assert cache.n_misses == 5
+
+    # the outputs persist in the file and are keyed by the version of the model
+    cache = ForwardCache(model, tmp_path / "cache.sqlite", model_version="v1")
+    assert torch.equal(cache(inputs), reference(inputs))
+    assert cache.n_misses == 0
+    assert ForwardCache(model, tmp_path / "cache.sqlite", model_version="v2")(inputs[:1]).shape == (1, 2)
+    assert calls == [4, 1, 1]
+
+    # the least recently used outputs are evicted above the maximum size, 8 bytes per output row
+    small_cache = ForwardCache(model, tmp_path / "small.sqlite", model_version="v1", max_size=16)
+    small_cache(inputs[:1])
+    small_cache(inputs[1:2])
+    small_cache(inputs[:1])
+    small_cache(inputs[2:3])
+    small_cache(inputs[:2])
+    assert small_cache.n_hits == 2
+    assert small_cache.n_misses == 4
+
+    with pytest.raises(ValueError):
+        ForwardCache(lambda x: x.sum(), tmp_path / "invalid.sqlite", model_version="v1")(inputs)
+    with pytest.raises(ValueError):
+        ForwardCache(model, tmp_path / "invalid.sqlite", model_version="v1", max_size=0)
+
+
+def test_forward_cache_explanations(tmp_path):
+    calls = []
+
+    def model(image):
+        calls.append(image.shape[0])
+        return image.sum(dim=(1, 2, 3))
+
+    hsi = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    band_names = {"a": 0, "b": 1, "c": 2}
+    with ForwardCache(model, tmp_path / "cache.sqlite", model_version="v1") as cache:
+        lime = mt.Lime(ExplainableModel(cache, "regression"), SkLearnLinearRegression())
+        expected = lime.get_spectral_attributes(hsi, band_mask=band_mask, band_names=band_names)
+        n_evaluated = sum(calls)
+
+        # another surrogate reuses every output of the same perturbed images
+        lasso = mt.Lime(ExplainableModel(cache, "regression"), SkLearnLasso(alpha=0.01))
+        lasso.get_spectral_attributes(hsi, band_mask=band_mask, band_names=band_names)
+        assert sum(calls) == n_evaluated
+        result = lime.get_spectral_attributes(hsi, band_mask=band_mask, band_names=band_names)
+    assert torch.allclose(result.attributes, expected.attributes)
+    assert cache.n_hits == 2 * cache.n_misses
+
+    # the samples of an explanation are keyed by their interpretable rows, without hashing their inputs
+    with ForwardCache(model, tmp_path / "keyed.sqlite", model_version="v1") as cache:
+        lime = mt.Lime(ExplainableModel(cache, "regression"), SkLearnLinearRegression())
+        with mock.patch.object(cache, "_keys", side_effect=AssertionError):
+            lime.get_spectral_attributes(hsi, band_mask=band_mask, band_names=band_names)
+            lime.get_spectral_attributes(hsi, band_mask=band_mask, band_names=band_names)
+        assert cache.n_hits == cache.n_misses > 0
+
+        # another image has another scope
+        other = mt.HSI(image=torch.rand(5, 10, 10), wavelengths=[400, 450, 500, 550, 600])
+        n_misses = cache.n_misses
+        lime.get_spectral_attributes(other, band_mask=band_mask, band_names=band_names)
+        assert cache.n_misses > n_misses
+
+    scope = cache.scope(torch.ones(3))
+    assert scope == cache.scope(torch.ones(3)) != cache.scope(torch.zeros(3))
+    assert cache.keyed(scope, torch.rand(2, 3)) is cache
@@ -0,0 +1,120 @@
+import json
+import multiprocessing
+
+import numpy as np
+import pytest
+import torch
+
+import meteors as mt
+import meteors.runner as mt_runner
+from meteors.utils.models import ExplainableModel, SkLearnLinearRegression
+
+
+def _linear_lime():
+    def linear_model(image: torch.Tensor) -> torch.Tensor:
+        return image.sum(dim=(1, 2, 3))
+
+    return mt.Lime(
+        explainable_model=ExplainableModel(linear_model, "regression"),
+        interpretable_model=SkLearnLinearRegression(),
+    )
+
+
+def _hsi(seed: int) -> mt.HSI:
+    generator = torch.Generator().manual_seed(seed)
+    return mt.HSI(image=torch.rand((5, 8, 8), generator=generator), wavelengths=[400, 450, 500, 550, 600])
+
+
+def test_load_hsi(tmp_path):
+    image = np.random.rand(5, 4, 4).astype(np.float32)
+    wavelengths = [400, 450, 500, 550, 600]
+
+    np.save(tmp_path / "cube.npy", image)
+    hsi = mt_runner.load_hsi(tmp_path / "cube.npy", wavelengths=wavelengths)
+    assert torch.allclose(hsi.image, torch.tensor(image))
+    with pytest.raises(ValueError):
+        mt_runner.load_hsi(tmp_path / "cube.npy")
+
+    binary_mask = np.ones((5, 4, 4), dtype=bool)
+    binary_mask[:, 0, 0] = False
+    np.savez(tmp_path / "cube.npz", image=image, wavelengths=np.array(wavelengths), binary_mask=binary_mask)
+    hsi = mt_runner.load_hsi(tmp_path / "cube.npz")
+    assert hsi.wavelengths.tolist() == wavelengths
+    assert not hsi.binary_mask[0, 0, 0]
+
+    (tmp_path / "cube.txt").write_text("")
+    with pytest.raises(ValueError):
+        mt_runner.load_hsi(tmp_path / "cube.txt", wavelengths=wavelengths)
+
+
+def test_explanation_runner(tmp_path):
+    segmentation_mask = torch.randint(1, 4, (1, 8, 8))
+    runner = mt.ExplanationRunner(_linear_lime(), tmp_path / "out", segmentation_mask=segmentation_mask, n_samples=10)
+    hsis = [_hsi(seed) for seed in range(3)]
+
+    summary = runner.run(iter(hsis[:2]))
+    assert summary.completed == ["000000", "000001"]
+    assert summary.skipped == [] and summary.failed == []
+    record = torch.load(tmp_path / "out" / "attributions" / "000000.pt")
+    assert record["attributes"].shape == (5, 8, 8)
+    assert torch.equal(record["mask"], segmentation_mask.expand(5, 8, 8))
+    assert record["n_samples"] == 10
+
+    # the finished images are skipped when the run is resumed
+    summary = runner.run(hsis)
+    assert summary.skipped == ["000000", "000001"]
+    assert summary.completed == ["000002"]
+    assert set(runner.completed()) == {"000000", "000001", "000002"}
+
+    # an explanation whose file is missing is done again, and a cut line of the manifest is ignored
+    (tmp_path / "out" / "attributions" / "000001.pt").unlink()
+    with open(runner.manifest_path, "a") as manifest:
+        manifest.write('{"key": "000003", "sta')
+    assert runner.run(hsis).completed == ["000001"]
+
+    # failures are recorded and retried by the next run
+    failing_runner = mt.ExplanationRunner(_linear_lime(), tmp_path / "failing", segmentation_mask=torch.ones((1, 4, 4)))
+    summary = failing_runner.run([("a", hsis[0])])
+    assert summary.failed == ["a"]
+    with open(failing_runner.manifest_path) as manifest:
+        assert json.loads(manifest.readline())["status"] == "failed"
+    assert failing_runner.completed() == {}
+
+    with pytest.raises(ValueError):
+        runner.run([("a", hsis[0]), ("a", hsis[1])])
+    with pytest.raises(ValueError):
+        mt.ExplanationRunner(_linear_lime(), tmp_path, method="temporal")
+    with pytest.raises(ValueError):
+        mt.ExplanationRunner(_linear_lime(), tmp_path, n_workers=0)
+
+
+def test_explanation_runner_directory_with_workers(tmp_path):
+    wavelengths = [400, 450, 500, 550, 600]
+    (tmp_path / "tiles" / "nested").mkdir(parents=True)
+    for idx in range(4):
+        np.save(tmp_path / "tiles" / f"tile_{idx}.npy", _hsi(idx).image.numpy())
+    np.savez(tmp_path / "tiles" / "nested" / "tile.npz", image=_hsi(4).image.numpy(), wavelengths=wavelengths)
+    (tmp_path / "tiles" / "notes.txt").write_text("not a cube")
+
+    band_mask = torch.tensor([0, 0, 1, 1, 2])
+    runner = mt.ExplanationRunner(
+        _linear_lime(),
+        tmp_path / "out",
+        method="spectral",
+        n_workers=2,
+        mp_context=multiprocessing.get_context("fork"),
+        band_mask=band_mask,
+        band_names={"a": 0, "b": 1, "c": 2},
+    )
+    summary = runner.run(tmp_path / "tiles", wavelengths=wavelengths, max_pending=1)
+    assert sorted(summary.completed) == ["nested/tile", "tile_0", "tile_1", "tile_2", "tile_3"]
+    record = torch.load(tmp_path / "out" / "attributions" / "nested" / "tile.pt")
+    assert record["band_names"] == {"a": 0, "b": 1, "c": 2}
+    assert record["attributes"].shape == (5, 8, 8)
+
+    summary = runner.run(tmp_path / "tiles", wavelengths=wavelengths)
+    assert summary.completed == []
+    assert len(summary.skipped) == 5
+
+    with pytest.raises(ValueError):
+        runner.run(tmp_path / "tiles" / "notes.txt")
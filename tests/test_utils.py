@@ -224,3 +224,26 @@ def test_aggregate_by_mask():
     result = utils.aggregate_by_mask(data, mask, torch.mean)
     expected_result = torch.tensor([])
     assert torch.allclose(result, expected_result)
+
+
+def test_expand_values_by_mask():
+    # Test case 1: Expanding values by mask
+    values = torch.tensor([0.5, -1.0, 2.0])
+    mask = torch.tensor([[[0, 0, 1], [1, 2, 2]]])
+    expected_result = torch.tensor([[[0.5, 0.5, -1.0], [-1.0, 2.0, 2.0]]])
+    result = utils.expand_values_by_mask(values, mask)
+    assert torch.equal(result, expected_result)
+
+    # Test case 2: IDs without a corresponding value are filled
+    mask = torch.tensor([[-1, 0], [3, 2]])
+    expected_result = torch.tensor([[7.0, 0.5], [7.0, 2.0]])
+    result = utils.expand_values_by_mask(values, mask, fill_value=7.0)
+    assert torch.equal(result, expected_result)
+
+    # Test case 3: Empty values
+    result = utils.expand_values_by_mask(torch.tensor([]), mask)
+    assert torch.equal(result, torch.zeros((2, 2)))
+
+    # Test case 4: Values are not one-dimensional
+    with pytest.raises(ValueError):
+        utils.expand_values_by_mask(values.unsqueeze(0), mask)